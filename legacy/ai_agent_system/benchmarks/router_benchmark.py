@@ -0,0 +1,484 @@
+# ai_agent_system/benchmarks/router_benchmark.py
+"""
+AI Routing Benchmark
+Drives AIRouter.generate or AIComparator.batch_compare against two local fake
+providers (services/fake_provider.py) standing in for Upstage and OpenAI, so
+throughput, latency percentiles, fallback rate, event-loop lag and memory can
+be measured offline and compared across commits.
+
+Load models:
+    closed - a fixed number of workers, each sending its next request when the last one finishes
+    open   - Poisson arrivals at a fixed rate regardless of completions; latency is measured
+             from the scheduled arrival so queueing delay isn't hidden (no coordinated omission)
+
+Usage (from the directory containing ai_agent_system/):
+    python -m ai_agent_system.benchmarks.router_benchmark --mode closed --concurrency 32 --requests 2000
+    python -m ai_agent_system.benchmarks.router_benchmark --mode open --rate 200 --requests 3000 \\
+        --primary-error-rate 0.05 --output results.json
+    python -m ai_agent_system.benchmarks.router_benchmark ... --compare baseline.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import asynccontextmanager, suppress
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Callable, Awaitable, AsyncIterator, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.fake_provider import FakeProviderServer, FakeProviderConfig
+from ai_agent_system.src.services.ai_router import AIRouter, AIResponse
+from ai_agent_system.src.services.ai_comparator import AIComparator
+from ai_agent_system.src.services.hedging import HedgePolicy
+from ai_agent_system.src.services.circuit_breaker import CircuitBreakerRegistry
+from ai_agent_system.src.services.scheduler import RequestScheduler
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ("generate", "batch_compare")
+MODES = ("closed", "open")
+RESULTS_FORMAT_VERSION = 1
+
+# Metrics compared by compare_results(): (path, higher is better)
+_COMPARED_METRICS = (
+    ("throughput_rps", True),
+    ("latency_ms.p50", False),
+    ("latency_ms.p95", False),
+    ("latency_ms.p99", False),
+    ("error_rate", False),
+    ("fallback_rate", False),
+    ("event_loop_lag_ms.p99", False),
+    ("memory.peak_rss_mb", False),
+)
+
+
+@dataclass
+class BenchmarkConfig:
+    """One benchmark run: load shape plus fake provider behaviour"""
+    scenario: str = "generate"
+    mode: str = "closed"
+    requests: int = 500
+    concurrency: int = 16  # closed loop workers
+    rate: float = 50.0  # open loop arrivals per second
+    batch_size: int = 10  # prompts per batch_compare call
+    max_tokens: int = 64
+    temperature: float = 0.7
+    latency_ms: float = 200.0
+    latency_distribution: str = "lognormal"
+    tokens_per_second: float = 0.0
+    output_tokens: int = 32
+    primary_error_rate: float = 0.0
+    primary_rate_limit_rate: float = 0.0
+    secondary_latency_ms: Optional[float] = None  # Defaults to latency_ms
+    hedge: bool = False
+    client_rpm: int = 1_000_000  # Client-side limit; high so the provider, not the limiter, is measured
+    trace_memory: bool = False
+    seed: Optional[int] = 42
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, math.ceil(q * len(sorted_values)) - 1))
+    return round(sorted_values[index], 2)
+
+
+def _latency_summary(values: List[float]) -> Dict[str, Optional[float]]:
+    ordered = sorted(values)
+    return {
+        "mean": round(sum(ordered) / len(ordered), 2) if ordered else None,
+        "p50": percentile(ordered, 0.50),
+        "p95": percentile(ordered, 0.95),
+        "p99": percentile(ordered, 0.99),
+        "max": round(ordered[-1], 2) if ordered else None
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task (a proxy for blocking work)"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, (loop.time() - start - self.interval) * 1000))
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        return _latency_summary(self.samples)
+
+
+@dataclass
+class _Sample:
+    latency_ms: float
+    success: bool
+    fallback: bool = False
+    rate_limited: bool = False
+    hedged: bool = False
+    items: int = 1
+
+
+def _sample_from(result: Any, latency_ms: float) -> _Sample:
+    if isinstance(result, AIResponse):
+        return _Sample(latency_ms, result.success, result.fallback_used, result.rate_limited, result.hedged)
+    # batch_compare: a list of ComparisonResults; a comparison fails when neither provider answered
+    return _Sample(latency_ms, all(r.winner is not None for r in result), items=len(result))
+
+
+async def _timed(call: Callable[[int], Awaitable[Any]], index: int, started_at: float) -> _Sample:
+    loop = asyncio.get_running_loop()
+    try:
+        result = await call(index)
+    except Exception as e:
+        logger.warning(f"Benchmark request {index} raised: {e}")
+        return _Sample((loop.time() - started_at) * 1000, False)
+    return _sample_from(result, (loop.time() - started_at) * 1000)
+
+
+async def run_closed_loop(call: Callable[[int], Awaitable[Any]], requests: int, concurrency: int) -> List[_Sample]:
+    """concurrency workers issue requests back to back until requests have been sent"""
+    loop = asyncio.get_running_loop()
+    counter = itertools.count()
+    samples: List[_Sample] = []
+
+    async def _worker():
+        while (index := next(counter)) < requests:
+            samples.append(await _timed(call, index, loop.time()))
+
+    await asyncio.gather(*[_worker() for _ in range(max(1, concurrency))])
+    return samples
+
+
+async def run_open_loop(
+    call: Callable[[int], Awaitable[Any]],
+    requests: int,
+    rate: float,
+    rng: random.Random
+) -> List[_Sample]:
+    """Poisson arrivals at rate per second; each request starts on schedule whatever is in flight"""
+    loop = asyncio.get_running_loop()
+    tasks = []
+    next_arrival = loop.time()
+    for index in range(requests):
+        next_arrival += rng.expovariate(rate)
+        delay = next_arrival - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_timed(call, index, next_arrival)))
+    return list(await asyncio.gather(*tasks))
+
+
+@asynccontextmanager
+async def fake_providers(config: BenchmarkConfig) -> AsyncIterator[Tuple[FakeProviderServer, FakeProviderServer]]:
+    """
+    Start fake Upstage (primary) and OpenAI (secondary) servers and point the
+    settings at them for the duration of the block.
+    """
+    rng = random.Random(config.seed)
+    primary = FakeProviderServer(FakeProviderConfig(
+        latency_ms=config.latency_ms,
+        latency_distribution=config.latency_distribution,
+        tokens_per_second=config.tokens_per_second,
+        output_tokens=config.output_tokens,
+        rate_limit_rate=config.primary_rate_limit_rate,
+        server_error_rate=config.primary_error_rate,
+        seed=rng.randrange(2 ** 32)
+    ))
+    secondary = FakeProviderServer(FakeProviderConfig(
+        latency_ms=config.latency_ms if config.secondary_latency_ms is None else config.secondary_latency_ms,
+        latency_distribution=config.latency_distribution,
+        tokens_per_second=config.tokens_per_second,
+        output_tokens=config.output_tokens,
+        seed=rng.randrange(2 ** 32)
+    ))
+
+    async with primary, secondary:
+        overrides = {
+            "UPSTAGE_API_KEY": "benchmark-key",
+            "UPSTAGE_API_KEYS": None,
+            "UPSTAGE_BASE_URL": f"{primary.url}/v1/model",
+            "OPENAI_API_KEY": "benchmark-key",
+            "OPENAI_API_KEYS": None,
+            "OPENAI_BASE_URL": f"{secondary.url}/v1",
+            "AI_PRIMARY_PROVIDER": "upstage",
+        }
+        previous = {name: getattr(settings, name) for name in overrides}
+        for name, value in overrides.items():
+            setattr(settings, name, value)
+        rate_limiter = get_rate_limiter()
+        previous_limits = dict(rate_limiter.limits)
+        for provider in ("upstage", "openai"):
+            rate_limiter.set_limits(provider, config.client_rpm, config.client_rpm * 1000)
+        try:
+            yield primary, secondary
+        finally:
+            rate_limiter.limits = previous_limits
+            for name, value in previous.items():
+                setattr(settings, name, value)
+
+
+async def run_benchmark(config: BenchmarkConfig) -> Dict[str, Any]:
+    """Run one benchmark and return its summary"""
+    if config.scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{config.scenario}'")
+    if config.mode not in MODES:
+        raise ValueError(f"Unknown mode '{config.mode}'")
+
+    async with fake_providers(config) as (primary, secondary):
+        # Fresh per-run state so one run's open breakers or queues don't leak into the next
+        router = AIRouter()
+        router.response_cache = None  # Every request should reach a provider
+        router.hedging = HedgePolicy(enabled=config.hedge)
+        router.circuit_breakers = CircuitBreakerRegistry()
+        if router.scheduler:
+            router.scheduler = RequestScheduler()
+
+        if config.scenario == "generate":
+            async def call(index: int):
+                return await router.generate(
+                    prompt=f"Benchmark prompt {index}: summarize the discussion.",
+                    temperature=config.temperature,
+                    max_tokens=config.max_tokens
+                )
+        else:
+            comparator = AIComparator()
+            comparator.ai_router = router
+
+            async def call(index: int):
+                prompts = [f"Benchmark prompt {index}.{i}: summarize the discussion." for i in range(config.batch_size)]
+                return await comparator.batch_compare(prompts, temperature=config.temperature, max_tokens=config.max_tokens)
+
+        if config.trace_memory:
+            tracemalloc.start()
+        lag_monitor = LoopLagMonitor()
+        lag_monitor.start()
+        start = time.perf_counter()
+        try:
+            if config.mode == "closed":
+                samples = await run_closed_loop(call, config.requests, config.concurrency)
+            else:
+                samples = await run_open_loop(call, config.requests, config.rate, random.Random(config.seed))
+        finally:
+            duration = time.perf_counter() - start
+            await lag_monitor.stop()
+            traced_peak = tracemalloc.get_traced_memory()[1] if config.trace_memory else None
+            if config.trace_memory:
+                tracemalloc.stop()
+
+        usage = router.get_usage_stats()
+        await router.close()
+        provider_stats = {"primary": primary.get_stats(), "secondary": secondary.get_stats()}
+
+    succeeded = [s for s in samples if s.success]
+    total = len(samples) or 1
+    items = sum(s.items for s in succeeded)
+    return {
+        "requests": len(samples),
+        "succeeded": len(succeeded),
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(succeeded) / duration, 2) if duration > 0 else None,
+        "items_per_s": round(items / duration, 2) if duration > 0 else None,
+        "offered_rps": config.rate if config.mode == "open" else None,
+        "error_rate": round(1 - len(succeeded) / total, 4),
+        "fallback_rate": round(sum(s.fallback for s in samples) / total, 4),
+        "hedge_rate": round(sum(s.hedged for s in samples) / total, 4),
+        "rate_limited_rate": round(sum(s.rate_limited for s in samples) / total, 4),
+        "latency_ms": _latency_summary([s.latency_ms for s in samples]),
+        "event_loop_lag_ms": lag_monitor.get_stats(),
+        "memory": {
+            "peak_rss_mb": _peak_rss_mb(),
+            "tracemalloc_peak_mb": round(traced_peak / (1024 * 1024), 2) if traced_peak is not None else None
+        },
+        "fake_providers": provider_stats,
+        "router": {key: usage.get(key) for key in ("scheduler", "circuit_breakers", "hedging", "http_pool")}
+    }
+
+
+def build_report(config: BenchmarkConfig, results: Dict[str, Any]) -> Dict[str, Any]:
+    """Machine-readable record of one run, with enough context to compare across commits"""
+    return {
+        "benchmark": "ai_routing",
+        "format_version": RESULTS_FORMAT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": asdict(config),
+        "results": results
+    }
+
+
+def _metric(results: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = results
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    tolerance: float = 0.05
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare two reports from build_report().
+
+    Args:
+        baseline: Earlier report
+        current: Report to check
+        tolerance: Relative change treated as noise rather than a regression
+
+    Returns:
+        Dict mapping metric to baseline, current, relative change and whether it regressed
+    """
+    comparison = {}
+    for path, higher_is_better in _COMPARED_METRICS:
+        before, after = _metric(baseline["results"], path), _metric(current["results"], path)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else None
+        regressed = change is not None and (change < -tolerance if higher_is_better else change > tolerance)
+        comparison[path] = {
+            "baseline": before,
+            "current": after,
+            "change_pct": round(change * 100, 1) if change is not None else None,
+            "regressed": regressed
+        }
+    return comparison
+
+
+def _print_summary(report: Dict[str, Any]):
+    results = report["results"]
+    latency = results["latency_ms"]
+    print(f"\n--- {report['config']['scenario']} ({report['config']['mode']} loop) @ {report['git_commit'] or 'unknown'} ---")
+    print(f"Requests: {results['requests']} ({results['succeeded']} ok) in {results['duration_s']}s")
+    print(f"Throughput: {results['throughput_rps']} req/s ({results['items_per_s']} items/s)")
+    print(f"Latency ms: p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}")
+    print(f"Error rate: {results['error_rate']:.2%}  Fallback rate: {results['fallback_rate']:.2%}  "
+          f"Hedge rate: {results['hedge_rate']:.2%}")
+    print(f"Event loop lag ms: p99={results['event_loop_lag_ms']['p99']} max={results['event_loop_lag_ms']['max']}")
+    print(f"Peak RSS: {results['memory']['peak_rss_mb']} MB")
+
+
+def _parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    defaults = BenchmarkConfig()
+    parser = argparse.ArgumentParser(description="Benchmark AIRouter / AIComparator against local fake providers")
+    parser.add_argument("--scenario", choices=SCENARIOS, default=defaults.scenario)
+    parser.add_argument("--mode", choices=MODES, default=defaults.mode)
+    parser.add_argument("--requests", type=int, default=defaults.requests)
+    parser.add_argument("--concurrency", type=int, default=defaults.concurrency, help="Closed loop workers")
+    parser.add_argument("--rate", type=float, default=defaults.rate, help="Open loop arrivals per second")
+    parser.add_argument("--batch-size", type=int, default=defaults.batch_size)
+    parser.add_argument("--max-tokens", type=int, default=defaults.max_tokens)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--distribution", default=defaults.latency_distribution)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens)
+    parser.add_argument("--primary-error-rate", type=float, default=defaults.primary_error_rate)
+    parser.add_argument("--primary-rate-limit-rate", type=float, default=defaults.primary_rate_limit_rate)
+    parser.add_argument("--secondary-latency-ms", type=float, default=None)
+    parser.add_argument("--hedge", action="store_true")
+    parser.add_argument("--client-rpm", type=int, default=defaults.client_rpm)
+    parser.add_argument("--trace-memory", action="store_true", help="Track Python allocations (slower)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--log-level", default="CRITICAL", help="Log level while the benchmark runs")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    return parser.parse_args(argv)
+
+
+async def main(argv: Optional[List[str]] = None):
+    args = _parse_args(argv)
+    # Per-request logging is part of what a real worker pays for, but floods the console here
+    logging.getLogger().setLevel(args.log_level.upper())
+
+    config = BenchmarkConfig(
+        scenario=args.scenario,
+        mode=args.mode,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        rate=args.rate,
+        batch_size=args.batch_size,
+        max_tokens=args.max_tokens,
+        latency_ms=args.latency_ms,
+        latency_distribution=args.distribution,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        primary_error_rate=args.primary_error_rate,
+        primary_rate_limit_rate=args.primary_rate_limit_rate,
+        secondary_latency_ms=args.secondary_latency_ms,
+        hedge=args.hedge,
+        client_rpm=args.client_rpm,
+        trace_memory=args.trace_memory,
+        seed=args.seed
+    )
+    report = build_report(config, await run_benchmark(config))
+    _print_summary(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\n--- Compared with {baseline.get('git_commit') or args.compare} ---")
+        for metric, row in compare_results(baseline, report).items():
+            flag = "  REGRESSED" if row["regressed"] else ""
+            change = f"{row['change_pct']:+}%" if row["change_pct"] is not None else "n/a"
+            print(f"{metric:<24} {row['baseline']:>10} -> {row['current']:>10} ({change}){flag}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
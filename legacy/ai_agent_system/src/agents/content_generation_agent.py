@@ -1,5 +1,5 @@
 # ai_agent_system/src/agents/content_generation_agent.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
 from datetime import datetime, timezone
 from uuid import uuid4
 import asyncio
@@ -32,6 +32,27 @@ class ContentGenerationAgent:
         results_docs = results_collection.find({"discordMessageId": {"$in": discord_message_ids}})
         return [IntentAnalysisResult(**doc) for doc in results_docs]
 
+    def _build_prompt(
+        self,
+        content_type: str,
+        messages: List[DiscordMessage],
+        intent_results: List[IntentAnalysisResult]
+    ) -> Optional[str]:
+        """Builds the generation prompt for a content type, or None if unsupported."""
+        prompt = ""
+        if content_type == "summary":
+            prompt = self.prompt_engineer.generate_summary_prompt(messages)
+        elif content_type == "faq_answer":
+            # For FAQ, need a question. Placeholder for now.
+            dummy_question = "핵심 질문은 무엇인가요?"
+            prompt = self.prompt_engineer.generate_faq_answer_prompt(dummy_question, messages)
+        elif content_type == "idea_list":
+            prompt = self.prompt_engineer.generate_idea_prompt(intent_results, messages)
+        else:
+            print(f"Unsupported content type: {content_type}")
+            return None
+        return prompt
+
     async def generate_content(
         self,
         discord_message_ids: List[str],
@@ -57,17 +78,8 @@ class ContentGenerationAgent:
             print(f"No Discord messages found for IDs: {discord_message_ids}")
             return None
 
-        prompt = ""
-        if content_type == "summary":
-            prompt = self.prompt_engineer.generate_summary_prompt(messages)
-        elif content_type == "faq_answer":
-            # For FAQ, need a question. Placeholder for now.
-            dummy_question = "핵심 질문은 무엇인가요?"
-            prompt = self.prompt_engineer.generate_faq_answer_prompt(dummy_question, messages)
-        elif content_type == "idea_list":
-            prompt = self.prompt_engineer.generate_idea_prompt(intent_results, messages)
-        else:
-            print(f"Unsupported content type: {content_type}")
+        prompt = self._build_prompt(content_type, messages, intent_results)
+        if prompt is None:
             return None
 
         if not prompt:
@@ -94,6 +106,17 @@ class ContentGenerationAgent:
             print(f"AI generation failed: {ai_response.error}")
             return None
 
+        return self._save_generated_content(discord_message_ids, content_type, prompt, gen_params, ai_response)
+
+    def _save_generated_content(
+        self,
+        discord_message_ids: List[str],
+        content_type: str,
+        prompt: str,
+        gen_params: Dict[str, Any],
+        ai_response: AIResponse
+    ) -> Optional[GeneratedContent]:
+        """Saves a successful AI response as GeneratedContent."""
         generated_text = ai_response.text
         if ai_response.fallback_used:
             print(f"Note: Used fallback provider {ai_response.provider.value}")
@@ -110,7 +133,8 @@ class ContentGenerationAgent:
             "promptUsed": prompt,
             "temperature": gen_params.get("temperature", 0.7),
             "generatedAt": datetime.now(timezone.utc),
-            "latencyMs": ai_response.latency_ms
+            "latencyMs": ai_response.latency_ms,
+            "timeToFirstTokenMs": ai_response.time_to_first_token_ms
         }
         generated_content = GeneratedContent(**generated_content_data)
 
@@ -123,6 +147,58 @@ class ContentGenerationAgent:
             print(f"Error saving generated content to DB: {e}")
             return None
 
+    async def generate_content_stream(
+        self,
+        discord_message_ids: List[str],
+        content_type: str,
+        generation_parameters: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streams generated content to interactive callers as it is produced.
+        The complete text is saved to the database once the stream finishes successfully.
+        :param discord_message_ids: List of Discord message IDs to use as context.
+        :param content_type: Type of content to generate (e.g., 'summary', 'faq_answer').
+        :param generation_parameters: Optional parameters for text generation (temperature, max_tokens, etc.).
+        :return: Async iterator of generated text deltas.
+        """
+        if not discord_message_ids:
+            print("No Discord message IDs provided for content generation.")
+            return
+
+        messages = await self._get_discord_messages(discord_message_ids)
+        intent_results = await self._get_intent_analysis_results(discord_message_ids)
+
+        if not messages:
+            print(f"No Discord messages found for IDs: {discord_message_ids}")
+            return
+
+        prompt = self._build_prompt(content_type, messages, intent_results)
+        if prompt is None:
+            return
+
+        if not prompt:
+            print("Failed to generate prompt for Upstage API.")
+            return
+
+        gen_params = generation_parameters if generation_parameters else {}
+        async for chunk in self.ai_router.generate_stream(
+            prompt=prompt,
+            model_name=gen_params.get("model_name"),
+            temperature=gen_params.get("temperature", 0.7),
+            max_tokens=gen_params.get("max_tokens", 500),
+            top_p=gen_params.get("top_p", 1.0),
+            stop_sequences=gen_params.get("stop_sequences")
+        ):
+            if not chunk.done:
+                yield chunk.text
+                continue
+
+            ai_response = chunk.response
+            if not ai_response.success or not ai_response.text:
+                print(f"AI generation failed: {ai_response.error}")
+                return
+            self._save_generated_content(discord_message_ids, content_type, prompt, gen_params, ai_response)
+
 # Example usage (for testing)
 async def main():
     from ai_agent_system.src.config.settings import settings
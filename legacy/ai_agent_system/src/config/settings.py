@@ -3,32 +3,168 @@ import os
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
-# Assuming .env file is in the project root or ai_agent_system root
-load_dotenv(dotenv_path=os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.env'))
-load_dotenv() # Load from current directory if exists
+# Assuming .env file is in the project root or ai_agent_system root, then the current directory.
+# Each file is read at most once; load_dotenv() without a path would walk the call stack to find one.
+_ENV_PATHS = [
+    os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.env')),
+    os.path.join(os.getcwd(), '.env')
+]
+for _env_path in dict.fromkeys(_ENV_PATHS):
+    if os.path.isfile(_env_path):
+        load_dotenv(dotenv_path=_env_path)
 
 class Settings:
     DISCORD_BOT_TOKEN: str = os.getenv("DISCORD_BOT_TOKEN")
     UPSTAGE_API_KEY: str = os.getenv("UPSTAGE_API_KEY")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY")
+    # Optional key pools 'key1:weight,key2' (weight ~ the key's share of org limits); override the single keys
+    UPSTAGE_API_KEYS: str = os.getenv("UPSTAGE_API_KEYS")
+    OPENAI_API_KEYS: str = os.getenv("OPENAI_API_KEYS")
+    AI_KEY_COOLDOWN_SECONDS: float = float(os.getenv("AI_KEY_COOLDOWN_SECONDS", "30.0"))  # After 429 without Retry-After
+    AI_KEY_AUTH_COOLDOWN_SECONDS: float = float(os.getenv("AI_KEY_AUTH_COOLDOWN_SECONDS", "300.0"))  # After 401/403
     DATABASE_URL: str = os.getenv("DATABASE_URL", "mongodb://localhost:27017/talkstudio")
 
     # AI Provider settings (US5)
-    AI_PRIMARY_PROVIDER: str = os.getenv("AI_PRIMARY_PROVIDER", "upstage")  # upstage or openai
+    AI_PRIMARY_PROVIDER: str = os.getenv("AI_PRIMARY_PROVIDER", "upstage")  # upstage, openai or fake
+    UPSTAGE_BASE_URL: str = os.getenv("UPSTAGE_BASE_URL", "https://api.upstage.ai/v1/model")
+    OPENAI_BASE_URL: str = os.getenv("OPENAI_BASE_URL")  # None uses the SDK default
     AI_FALLBACK_ENABLED: bool = os.getenv("AI_FALLBACK_ENABLED", "true").lower() == "true"
     AI_FALLBACK_MAX_RETRIES: int = int(os.getenv("AI_FALLBACK_MAX_RETRIES", "2"))
+    AI_STREAM_FIRST_TOKEN_TIMEOUT: float = float(os.getenv("AI_STREAM_FIRST_TOKEN_TIMEOUT", "10.0"))
+
+    # Token counting: 'exact' uses model tokenizers when installed, 'approximate' is always heuristic
+    TOKEN_COUNT_MODE: str = os.getenv("TOKEN_COUNT_MODE", "exact").lower()
+    UPSTAGE_TOKENIZER_PATH: str = os.getenv("UPSTAGE_TOKENIZER_PATH")  # Local tokenizer.json for Solar models
+
+    # Client-side rate limiting (requests/min and tokens/min per provider, model and key)
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    UPSTAGE_RPM: int = int(os.getenv("UPSTAGE_RPM", "100"))
+    UPSTAGE_TPM: int = int(os.getenv("UPSTAGE_TPM", "100000"))
+    OPENAI_RPM: int = int(os.getenv("OPENAI_RPM", "500"))
+    OPENAI_TPM: int = int(os.getenv("OPENAI_TPM", "200000"))
+    FAKE_RPM: int = int(os.getenv("FAKE_RPM", "100000"))
+    FAKE_TPM: int = int(os.getenv("FAKE_TPM", "100000000"))
+    DEFAULT_RPM: int = int(os.getenv("DEFAULT_RPM", "60"))
+    DEFAULT_TPM: int = int(os.getenv("DEFAULT_TPM", "100000"))
+
+    # Shared HTTP transport settings
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP2_MAX_STREAMS_PER_CONNECTION: int = int(os.getenv("HTTP2_MAX_STREAMS_PER_CONNECTION", "100"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "30.0"))
+
+    # Response cache (in-memory LRU + SQLite tier); used by default for temperature 0 requests
+    AI_CACHE_ENABLED: bool = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+    AI_CACHE_PATH: str = os.getenv(
+        "AI_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.cache/ai_response_cache.sqlite3')
+    )  # Empty disables the on-disk tier
+    AI_CACHE_TTL_SECONDS: float = float(os.getenv("AI_CACHE_TTL_SECONDS", "86400"))
+    AI_CACHE_MAX_ENTRIES: int = int(os.getenv("AI_CACHE_MAX_ENTRIES", "1000"))
+    AI_CACHE_MAX_DISK_ENTRIES: int = int(os.getenv("AI_CACHE_MAX_DISK_ENTRIES", "100000"))
+    # Share one upstream call between identical concurrent temperature-0 requests
+    AI_COALESCE_ENABLED: bool = os.getenv("AI_COALESCE_ENABLED", "true").lower() == "true"
+
+    # Circuit breakers per provider and model
+    CIRCUIT_BREAKER_ENABLED: bool = os.getenv("CIRCUIT_BREAKER_ENABLED", "true").lower() == "true"
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # Consecutive failures
+    CIRCUIT_ERROR_RATE_THRESHOLD: float = float(os.getenv("CIRCUIT_ERROR_RATE_THRESHOLD", "0.5"))
+    CIRCUIT_WINDOW_SIZE: int = int(os.getenv("CIRCUIT_WINDOW_SIZE", "20"))  # Requests in the rolling window
+    CIRCUIT_MIN_REQUESTS: int = int(os.getenv("CIRCUIT_MIN_REQUESTS", "10"))  # Before the error rate applies
+    CIRCUIT_RECOVERY_TIMEOUT: float = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", "30.0"))
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", "1"))
+
+    # Hedged requests: duplicate a slow primary call on the secondary provider
+    AI_HEDGE_ENABLED: bool = os.getenv("AI_HEDGE_ENABLED", "false").lower() == "true"
+    AI_HEDGE_DELAY_MS: float = float(os.getenv("AI_HEDGE_DELAY_MS", "0"))  # 0 = use the primary's live percentile
+    AI_HEDGE_PERCENTILE: float = float(os.getenv("AI_HEDGE_PERCENTILE", "0.95"))
+    AI_HEDGE_BUDGET_RATIO: float = float(os.getenv("AI_HEDGE_BUDGET_RATIO", "0.05"))  # Max extra requests
+    AI_HEDGE_MIN_SAMPLES: int = int(os.getenv("AI_HEDGE_MIN_SAMPLES", "20"))  # Before the live percentile is used
+
+    # Primary provider selection per request: static (AI_PRIMARY_PROVIDER), latency or weighted
+    AI_ROUTING_POLICY: str = os.getenv("AI_ROUTING_POLICY", "static").lower()
+    AI_ROUTING_EWMA_ALPHA: float = float(os.getenv("AI_ROUTING_EWMA_ALPHA", "0.2"))
+    AI_ROUTING_EXPLORATION: float = float(os.getenv("AI_ROUTING_EXPLORATION", "0.05"))
+
+    # Provider registry (see services/provider_registry.py)
+    AI_FALLBACK_CHAIN: str = os.getenv("AI_FALLBACK_CHAIN", "")  # e.g. "upstage,vllm,openai"; empty = registration order
+    AI_EXTRA_PROVIDERS: str = os.getenv("AI_EXTRA_PROVIDERS", "")  # JSON list of OpenAI/Upstage-compatible endpoints
+
+    # Cheap provider:model tiers generate_cascade tries before escalating to the regular route
+    AI_CASCADE_MODELS: str = os.getenv("AI_CASCADE_MODELS", "upstage:solar-mini")
+
+    # Batch API for bulk, latency-insensitive generation (provider must speak the OpenAI format)
+    AI_BATCH_PROVIDER: str = os.getenv("AI_BATCH_PROVIDER", "openai").lower()  # openai or fake
+    AI_BATCH_DB_PATH: str = os.getenv(
+        "AI_BATCH_DB_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.cache/ai_batches.sqlite3')
+    )  # Requests, batches and results; empty keeps them in memory (no resume)
+    AI_BATCH_DIR: str = os.getenv(
+        "AI_BATCH_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.cache/batches')
+    )  # Copies of the submitted JSONL files; empty skips writing them
+    AI_BATCH_MAX_REQUESTS: int = int(os.getenv("AI_BATCH_MAX_REQUESTS", "50000"))  # Per batch file
+    AI_BATCH_FLUSH_SECONDS: float = float(os.getenv("AI_BATCH_FLUSH_SECONDS", "60.0"))  # Max wait to fill a batch
+    AI_BATCH_POLL_SECONDS: float = float(os.getenv("AI_BATCH_POLL_SECONDS", "30.0"))
+    AI_BATCH_COMPLETION_WINDOW: str = os.getenv("AI_BATCH_COMPLETION_WINDOW", "24h")
+
+    # Columnar store for comparison runs (see services/comparison_store.py)
+    AI_COMPARISON_STORE_DIR: str = os.getenv(
+        "AI_COMPARISON_STORE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.cache/comparisons')
+    )
+
+    # Checkpoints for resumable comparison jobs (see services/comparison_jobs.py)
+    AI_COMPARISON_JOBS_DB_PATH: str = os.getenv(
+        "AI_COMPARISON_JOBS_DB_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../.cache/comparison_jobs.sqlite3')
+    )  # Empty keeps checkpoints in memory (no resume)
+
+    # Local fake provider (see services/fake_provider.py) for offline testing and benchmarks
+    FAKE_PROVIDER_URL: str = os.getenv("FAKE_PROVIDER_URL")  # e.g. http://127.0.0.1:8765; enables AIProvider.FAKE
+    FAKE_PROVIDER_API_FORMAT: str = os.getenv("FAKE_PROVIDER_API_FORMAT", "upstage").lower()  # upstage or openai
+    FAKE_PROVIDER_MODEL: str = os.getenv("FAKE_PROVIDER_MODEL", "fake-model")
+    FAKE_PROVIDER_LATENCY_MS: float = float(os.getenv("FAKE_PROVIDER_LATENCY_MS", "200.0"))  # Median time to first token
+    FAKE_PROVIDER_LATENCY_DISTRIBUTION: str = os.getenv("FAKE_PROVIDER_LATENCY_DISTRIBUTION", "lognormal").lower()
+    FAKE_PROVIDER_LATENCY_JITTER: float = float(os.getenv("FAKE_PROVIDER_LATENCY_JITTER", "0.5"))
+    FAKE_PROVIDER_TOKENS_PER_SECOND: float = float(os.getenv("FAKE_PROVIDER_TOKENS_PER_SECOND", "50.0"))
+    FAKE_PROVIDER_OUTPUT_TOKENS: int = int(os.getenv("FAKE_PROVIDER_OUTPUT_TOKENS", "64"))
+    FAKE_PROVIDER_RATE_LIMIT_RATE: float = float(os.getenv("FAKE_PROVIDER_RATE_LIMIT_RATE", "0.0"))  # Injected 429s
+    FAKE_PROVIDER_SERVER_ERROR_RATE: float = float(os.getenv("FAKE_PROVIDER_SERVER_ERROR_RATE", "0.0"))  # Injected 5xx
+    FAKE_PROVIDER_RPM: int = int(os.getenv("FAKE_PROVIDER_RPM", "0"))  # Server-side request limit; 0 disables
+
+    # Request scheduler: priority lanes (interactive before bulk) with a global in-flight cap
+    AI_SCHEDULER_ENABLED: bool = os.getenv("AI_SCHEDULER_ENABLED", "true").lower() == "true"
+    AI_MAX_IN_FLIGHT: int = int(os.getenv("AI_MAX_IN_FLIGHT", "32"))
+    AI_INTERACTIVE_RESERVED_SLOTS: int = int(os.getenv("AI_INTERACTIVE_RESERVED_SLOTS", "4"))  # Bulk can't use these
+    AI_SCHEDULER_QUEUE_SIZE: int = int(os.getenv("AI_SCHEDULER_QUEUE_SIZE", "1000"))  # Per lane
+    AI_SCHEDULER_REJECT_WHEN_FULL: bool = os.getenv("AI_SCHEDULER_REJECT_WHEN_FULL", "false").lower() == "true"
+
+    # Shadow traffic: mirror a sample of routed requests to the other provider for comparison
+    AI_SHADOW_SAMPLE_RATE: float = float(os.getenv("AI_SHADOW_SAMPLE_RATE", "0.0"))  # 0 disables
+    AI_SHADOW_MAX_LOAD: float = float(os.getenv("AI_SHADOW_MAX_LOAD", "0.5"))  # Share of AI_MAX_IN_FLIGHT shadow calls may use
+
+    _validated: bool = False
+
+    @classmethod
+    def ensure_validated(cls):
+        """Validate once per process; services call this lazily instead of validating at import"""
+        if not cls._validated:
+            cls.validate()
 
     @classmethod
     def validate(cls):
+        cls._validated = True
         if not cls.DISCORD_BOT_TOKEN:
             print("WARNING: DISCORD_BOT_TOKEN is not set.")
-        if not cls.UPSTAGE_API_KEY:
+        if not cls.UPSTAGE_API_KEY and not cls.UPSTAGE_API_KEYS:
             print("WARNING: UPSTAGE_API_KEY is not set.")
-        if not cls.OPENAI_API_KEY:
+        if not cls.OPENAI_API_KEY and not cls.OPENAI_API_KEYS:
             print("WARNING: OPENAI_API_KEY is not set. Fallback to OpenAI will not work.")
         if not cls.DATABASE_URL:
             print("ERROR: DATABASE_URL is not set. Please set it in .env file.")
             exit(1)
 
 settings = Settings()
-settings.validate()
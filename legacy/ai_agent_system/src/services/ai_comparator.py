@@ -4,12 +4,19 @@ AI Comparator Service (US5)
 Compares responses from multiple AI providers for quality evaluation.
 """
 import asyncio
+import json
 import logging
-from typing import Optional, Dict, Any, List
+import os
+from typing import Optional, Dict, Any, List, Sequence, AsyncIterator, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 
-from ai_agent_system.src.services.ai_router import get_ai_router, AIProvider, AIResponse
+from ai_agent_system.src.services.ai_router import get_ai_router, AIRouter, AIProvider, AIResponse
+from ai_agent_system.src.utils.token_counter import count_tokens
+from ai_agent_system.src.utils.concurrency import bounded_map
+from ai_agent_system.src.utils.quantile_sketch import QuantileSketch
+from ai_agent_system.src.services.similarity_scorer import SimilarityScorer
+from ai_agent_system.src.services.scheduler import Priority
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -35,16 +42,131 @@ class ComparisonResult:
     winner: Optional[str]  # 'upstage', 'openai', 'tie', or None if both failed
 
 
+class ProviderReport:
+    """Per-provider success rate plus latency and token-throughput sketches"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.requests = 0
+        self.successes = 0
+        self.latency_ms = QuantileSketch(relative_accuracy)
+        self.tokens_per_second = QuantileSketch(relative_accuracy)
+
+    def add(self, response: Dict[str, Any]):
+        self.requests += 1
+        if not response.get("success"):
+            return
+        self.successes += 1
+        metrics = response["metrics"]
+        self.latency_ms.add(metrics["latency_ms"])
+        if metrics["latency_ms"] > 0:
+            self.tokens_per_second.add(metrics["estimated_tokens"] / (metrics["latency_ms"] / 1000))
+
+    def merge(self, other: "ProviderReport"):
+        self.requests += other.requests
+        self.successes += other.successes
+        self.latency_ms.merge(other.latency_ms)
+        self.tokens_per_second.merge(other.tokens_per_second)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "success_rate": round(self.successes / self.requests, 3) if self.requests else None,
+            "latency_ms": self.latency_ms.summary(),
+            "tokens_per_second": self.tokens_per_second.summary()
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "latency_ms": self.latency_ms.to_dict(),
+            "tokens_per_second": self.tokens_per_second.to_dict()
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ProviderReport":
+        report = cls()
+        report.requests = state["requests"]
+        report.successes = state["successes"]
+        report.latency_ms = QuantileSketch.from_dict(state["latency_ms"])
+        report.tokens_per_second = QuantileSketch.from_dict(state["tokens_per_second"])
+        return report
+
+
+class ComparisonReport:
+    """
+    Running summary of comparison results, updated one result at a time in fixed memory.
+    Reports from parallel workers or shards merge into one (merge, or to_state/from_state
+    across processes).
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.total = 0
+        self.wins: Dict[Optional[str], int] = {"upstage": 0, "openai": 0, "tie": 0, None: 0}
+        self.providers = {"upstage": ProviderReport(relative_accuracy), "openai": ProviderReport(relative_accuracy)}
+
+    def add(self, result: ComparisonResult):
+        self.total += 1
+        self.wins[result.winner] = self.wins.get(result.winner, 0) + 1
+        for provider, response in (("upstage", result.upstage_response), ("openai", result.openai_response)):
+            if response:
+                self.providers[provider].add(response)
+
+    def merge(self, other: "ComparisonReport") -> "ComparisonReport":
+        self.total += other.total
+        for winner, count in other.wins.items():
+            self.wins[winner] = self.wins.get(winner, 0) + count
+        for provider, report in other.providers.items():
+            self.providers[provider].merge(report)
+        return self
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = self.total
+        return {
+            "total_comparisons": total,
+            "upstage_wins": self.wins["upstage"],
+            "openai_wins": self.wins["openai"],
+            "ties": self.wins["tie"],
+            "failures": self.wins[None],
+            "upstage_win_rate": round(self.wins["upstage"] / total * 100, 1) if total > 0 else 0,
+            "openai_win_rate": round(self.wins["openai"] / total * 100, 1) if total > 0 else 0,
+            "avg_upstage_latency_ms": self.providers["upstage"].latency_ms.summary()["mean"],
+            "avg_openai_latency_ms": self.providers["openai"].latency_ms.summary()["mean"],
+            "providers": {provider: report.to_dict() for provider, report in self.providers.items()}
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        """JSON-safe state for merging reports across processes"""
+        return {
+            "total": self.total,
+            "wins": {str(winner): count for winner, count in self.wins.items()},  # None -> "None"
+            "providers": {provider: report.to_state() for provider, report in self.providers.items()}
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "ComparisonReport":
+        report = cls()
+        report.total = state["total"]
+        report.wins = {None if winner == "None" else winner: count for winner, count in state["wins"].items()}
+        report.providers = {
+            provider: ProviderReport.from_state(provider_state)
+            for provider, provider_state in state["providers"].items()
+        }
+        return report
+
+
 class AIComparator:
     """
     Compares AI responses from different providers.
     Useful for A/B testing and quality evaluation.
     """
 
-    def __init__(self):
-        self.ai_router = get_ai_router()
+    def __init__(self, ai_router: Optional[AIRouter] = None):
+        self.ai_router = ai_router or get_ai_router()
+        self.similarity_scorer = SimilarityScorer()
 
-    def _calculate_metrics(self, text: Optional[str], latency_ms: float) -> ComparisonMetrics:
+    def _calculate_metrics(self, text: Optional[str], latency_ms: float, model: Optional[str] = None) -> ComparisonMetrics:
         """Calculate comparison metrics for a response"""
         if not text:
             return ComparisonMetrics(
@@ -59,12 +181,12 @@ class AIComparator:
             response_length=len(text),
             word_count=len(words),
             latency_ms=latency_ms,
-            estimated_tokens=int(len(words) * 1.3)  # Rough token estimate
+            estimated_tokens=count_tokens(text, model)
         )
 
     def _response_to_dict(self, response: AIResponse) -> Dict[str, Any]:
         """Convert AIResponse to dictionary"""
-        metrics = self._calculate_metrics(response.text, response.latency_ms)
+        metrics = self._calculate_metrics(response.text, response.latency_ms, response.model)
         return {
             "text": response.text,
             "provider": response.provider.value,
@@ -124,7 +246,11 @@ class AIComparator:
         self,
         prompt: str,
         temperature: float = 0.7,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        reference: Optional[str] = None,
+        score_similarity: bool = True
     ) -> ComparisonResult:
         """
         Generate responses from both providers and compare them.
@@ -133,6 +259,10 @@ class AIComparator:
             prompt: The input prompt
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            priority: Scheduler lane for the provider calls
+            tenant: Tenant/job name for fair sharing within the lane
+            reference: Expected answer to score both responses against
+            score_similarity: Add similarity scores to the comparison summary (see score_results)
 
         Returns:
             ComparisonResult with both responses and comparison metrics
@@ -143,9 +273,26 @@ class AIComparator:
         responses = await self.ai_router.generate_with_both(
             prompt=prompt,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            priority=priority,
+            tenant=tenant
         )
+        result = self.build_result(prompt, responses)
+        if score_similarity:
+            self.score_results([result], [reference])
+        return result
+
+    def build_result(self, prompt: str, responses: Dict[str, AIResponse]) -> ComparisonResult:
+        """
+        Compare responses that were already generated (e.g. mirrored shadow traffic).
+
+        Args:
+            prompt: The prompt both responses answer
+            responses: Dict with 'upstage' and/or 'openai' responses
 
+        Returns:
+            ComparisonResult without similarity scores (see score_results)
+        """
         upstage_response = responses.get("upstage")
         openai_response = responses.get("openai")
 
@@ -192,28 +339,170 @@ class AIComparator:
             winner=winner
         )
 
+    def score_results(
+        self,
+        results: Sequence[ComparisonResult],
+        references: Optional[Sequence[Optional[str]]] = None
+    ):
+        """
+        Add text similarity scores to each result's comparison_summary in one vectorized pass:
+        pairwise_similarity between the two responses and, where a reference answer is given,
+        upstage_reference_similarity / openai_reference_similarity.
+        """
+        def _text(response: Optional[Dict[str, Any]]) -> Optional[str]:
+            return response.get("text") if response and response.get("success") else None
+
+        scores = self.similarity_scorer.score_batch(
+            [_text(r.upstage_response) for r in results],
+            [_text(r.openai_response) for r in results],
+            references
+        )
+        for result, score in zip(results, scores):
+            result.comparison_summary.update(score)
+
+    async def iter_batch_compare(
+        self,
+        prompts: Sequence[str],
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        tenant: str = "batch_compare",
+        concurrency: int = 8,
+        ordered: bool = False,
+        report: Optional[ComparisonReport] = None,
+        output_path: Optional[str] = None,
+        run_writer: Optional[Any] = None,
+        references: Optional[Sequence[Optional[str]]] = None,
+        score_batch_size: int = 64
+    ) -> AsyncIterator[Tuple[int, ComparisonResult]]:
+        """
+        Compare many prompts with at most `concurrency` comparisons in flight, yielding each
+        result as it finishes. Nothing is kept in memory: pass a report to keep running totals,
+        output_path to write every result as a JSON line as soon as it arrives and/or a
+        run_writer to append it to the columnar comparison store.
+        Runs in the scheduler's BULK lane so it never delays interactive requests.
+
+        Args:
+            prompts: Prompts to compare
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            tenant: Job name for fair sharing with other bulk jobs
+            concurrency: Maximum comparisons in flight (each one calls both providers)
+            ordered: Yield in input order instead of completion order
+            report: ComparisonReport updated with every result
+            output_path: JSONL file for the results (overwritten), one {"index", ...result} per line
+            run_writer: ComparisonRunWriter (see comparison_store) to append results to; flushed at the end
+            references: Reference answers per prompt (None entries allowed) for the similarity scores
+            score_batch_size: Most finished results similarity-scored in one vectorized pass. Results
+                are never held back to fill a group: whatever has finished by the time the previous
+                group was yielded is scored together (0 disables scoring)
+
+        Yields:
+            (prompt index, ComparisonResult) tuples
+        """
+        async def _compare(prompt: str) -> ComparisonResult:
+            return await self.compare(
+                prompt, temperature, max_tokens, priority=Priority.BULK, tenant=tenant, score_similarity=False
+            )
+
+        def _record(index: int, result: ComparisonResult):
+            if report is not None:
+                report.add(result)
+            if output:
+                output.write(json.dumps({"index": index, **asdict(result)}, ensure_ascii=False) + "\n")
+                output.flush()
+            if run_writer is not None:
+                run_writer.append(index, result)
+
+        def _score(batch: List[Tuple[int, ComparisonResult]]):
+            if score_batch_size > 0:
+                self.score_results(
+                    [result for _, result in batch],
+                    [references[index] for index, _ in batch] if references is not None else None
+                )
+
+        # Comparisons finish into a small queue; each scoring pass takes everything already there
+        finished: asyncio.Queue = asyncio.Queue(maxsize=max(1, score_batch_size))
+        done = object()
+
+        async def _produce():
+            try:
+                async for index, result in bounded_map(prompts, _compare, concurrency=concurrency, ordered=ordered):
+                    if result is None:
+                        result = ComparisonResult(
+                            prompt=prompts[index],
+                            timestamp=datetime.now(timezone.utc).isoformat(),
+                            upstage_response=None,
+                            openai_response=None,
+                            comparison_summary={"both_succeeded": False, "error": "Comparison failed"},
+                            winner=None
+                        )
+                    await finished.put((index, result))
+            except Exception:
+                await finished.put(done)  # Wake the consumer; awaiting the producer re-raises
+                raise
+            await finished.put(done)
+
+        output = None
+        if output_path:
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            output = open(output_path, "w", encoding="utf-8")
+        producer = asyncio.ensure_future(_produce())
+        try:
+            while True:
+                batch = [await finished.get()]
+                while batch[-1] is not done and not finished.empty():
+                    batch.append(finished.get_nowait())
+                last = batch[-1] is done
+                if last:
+                    batch.pop()
+                _score(batch)
+                for item in batch:
+                    _record(*item)
+                    yield item
+                if last:
+                    break
+            await producer  # Re-raise anything that went wrong while producing
+        finally:
+            producer.cancel()
+            if output:
+                output.close()
+            if run_writer is not None:
+                run_writer.flush()
+
     async def batch_compare(
         self,
         prompts: List[str],
         temperature: float = 0.7,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        tenant: str = "batch_compare",
+        concurrency: int = 8,
+        run_writer: Optional[Any] = None,
+        references: Optional[Sequence[Optional[str]]] = None,
+        score_batch_size: int = 64
     ) -> List[ComparisonResult]:
         """
-        Compare multiple prompts in parallel.
+        Compare multiple prompts in parallel and collect the results in prompt order.
+        For large evaluations use iter_batch_compare, which doesn't hold every result.
 
         Args:
             prompts: List of prompts to compare
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            tenant: Job name for fair sharing with other bulk jobs
+            concurrency: Maximum comparisons in flight
+            run_writer: ComparisonRunWriter to append results to while the batch runs
+            references: Reference answers per prompt for the similarity scores
+            score_batch_size: Most results similarity-scored per vectorized pass (see iter_batch_compare)
 
         Returns:
             List of ComparisonResults
         """
-        tasks = [
-            self.compare(prompt, temperature, max_tokens)
-            for prompt in prompts
+        return [
+            result async for _, result in self.iter_batch_compare(
+                prompts, temperature, max_tokens, tenant=tenant, concurrency=concurrency, ordered=True,
+                run_writer=run_writer, references=references, score_batch_size=score_batch_size
+            )
         ]
-        return await asyncio.gather(*tasks)
 
     def generate_report(self, results: List[ComparisonResult]) -> Dict[str, Any]:
         """
@@ -223,38 +512,13 @@ class AIComparator:
             results: List of ComparisonResults
 
         Returns:
-            Summary report dictionary
+            Summary report dictionary, including per-provider success rate and
+            p50/p90/p99 latency and token throughput under 'providers'
         """
-        total = len(results)
-        upstage_wins = sum(1 for r in results if r.winner == "upstage")
-        openai_wins = sum(1 for r in results if r.winner == "openai")
-        ties = sum(1 for r in results if r.winner == "tie")
-        failures = sum(1 for r in results if r.winner is None)
-
-        avg_upstage_latency = 0
-        avg_openai_latency = 0
-        upstage_count = 0
-        openai_count = 0
-
-        for r in results:
-            if r.upstage_response and r.upstage_response.get("success"):
-                avg_upstage_latency += r.upstage_response["metrics"]["latency_ms"]
-                upstage_count += 1
-            if r.openai_response and r.openai_response.get("success"):
-                avg_openai_latency += r.openai_response["metrics"]["latency_ms"]
-                openai_count += 1
-
-        return {
-            "total_comparisons": total,
-            "upstage_wins": upstage_wins,
-            "openai_wins": openai_wins,
-            "ties": ties,
-            "failures": failures,
-            "upstage_win_rate": round(upstage_wins / total * 100, 1) if total > 0 else 0,
-            "openai_win_rate": round(openai_wins / total * 100, 1) if total > 0 else 0,
-            "avg_upstage_latency_ms": round(avg_upstage_latency / upstage_count, 2) if upstage_count > 0 else None,
-            "avg_openai_latency_ms": round(avg_openai_latency / openai_count, 2) if openai_count > 0 else None
-        }
+        report = ComparisonReport()
+        for result in results:
+            report.add(result)
+        return report.to_dict()
 
     async def close(self):
         """Close the AI router"""
@@ -5,23 +5,38 @@ Routes requests between Upstage and OpenAI with automatic failover.
 """
 import asyncio
 import logging
-from typing import Optional, List, Dict, Any, Literal
+import random
+import time
+from contextlib import nullcontext
+from typing import Optional, List, Dict, Any, Literal, AsyncIterator, Tuple, Callable, Awaitable, Set
 from dataclasses import dataclass
-from enum import Enum
 
 from ai_agent_system.src.config.settings import settings
 from ai_agent_system.src.services.upstage_client import UpstageClient
 from ai_agent_system.src.services.openai_client import OpenAIClient
+from ai_agent_system.src.services.provider_registry import AIProvider, ProviderRegistry, get_provider_registry
+from ai_agent_system.src.utils.concurrency import bounded_map
+from ai_agent_system.src.utils.single_flight import SingleFlight
+from ai_agent_system.src.utils.deadline import Deadline
+from ai_agent_system.src.services.provider_errors import RateLimitError
+from ai_agent_system.src.utils.token_counter import count_tokens, fit_max_tokens, get_context_window
+from ai_agent_system.src.services.http_transport import get_http_transport, close_http_transport
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+from ai_agent_system.src.services.api_key_pool import APIKeyPool
+from ai_agent_system.src.services.circuit_breaker import CircuitBreakerRegistry, get_circuit_breakers
+from ai_agent_system.src.services.hedging import HedgePolicy
+from ai_agent_system.src.services.provider_selector import ProviderSelector
+from ai_agent_system.src.services.scheduler import Priority, RequestScheduler, SchedulerFullError, get_request_scheduler
+from ai_agent_system.src.services.response_cache import ResponseCache, get_response_cache, make_cache_key
+from ai_agent_system.src.services.batch_api import BatchProcessor
+from ai_agent_system.src.services.cascade import (
+    CascadeTracker, Validator, parse_cascade_tiers, run_validator, ESCALATE_ERROR, ESCALATE_INVALID
+)
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 
-class AIProvider(Enum):
-    UPSTAGE = "upstage"
-    OPENAI = "openai"
-
-
 @dataclass
 class AIResponse:
     """Standardized response from AI providers"""
@@ -32,51 +47,130 @@ class AIResponse:
     error: Optional[str] = None
     latency_ms: float = 0.0
     fallback_used: bool = False
+    time_to_first_token_ms: Optional[float] = None
+    rate_limited: bool = False
+    cached: bool = False
+    circuit_open: bool = False
+    hedged: bool = False
+    deadline_exceeded: bool = False
+    escalated: bool = False
+
+
+@dataclass
+class AIStreamChunk:
+    """A streamed text delta; the final chunk has done=True and carries the full AIResponse"""
+    text: str
+    provider: AIProvider
+    model: str
+    done: bool = False
+    response: Optional[AIResponse] = None
 
 
 class AIRouter:
     """
-    Routes AI requests with automatic fallback between providers.
-    Primary provider is configurable via AI_PRIMARY_PROVIDER env var.
+    Routes AI requests with automatic fallback along an ordered chain of providers
+    from the provider registry. Primary provider is configurable via AI_PRIMARY_PROVIDER env var.
     """
 
     def __init__(self):
-        self.upstage_client: Optional[UpstageClient] = None
-        self.openai_client: Optional[OpenAIClient] = None
-
-        # Initialize clients based on available API keys
-        if settings.UPSTAGE_API_KEY:
-            try:
-                self.upstage_client = UpstageClient()
-                logger.info("Upstage client initialized")
-            except Exception as e:
-                logger.warning(f"Failed to initialize Upstage client: {e}")
-
-        if settings.OPENAI_API_KEY:
-            try:
-                self.openai_client = OpenAIClient()
-                logger.info("OpenAI client initialized")
-            except Exception as e:
-                logger.warning(f"Failed to initialize OpenAI client: {e}")
+        # Provider clients are built on first use (see _get_client), so importing or
+        # constructing the router never touches keys, SDKs or the network
+        self._clients: Dict[AIProvider, Any] = {}
+        self._batch_processor: Optional[BatchProcessor] = None
+        self.providers: ProviderRegistry = get_provider_registry()
 
         # Determine primary provider
-        self.primary_provider = AIProvider(settings.AI_PRIMARY_PROVIDER.lower())
+        self.primary_provider = self.providers.resolve(settings.AI_PRIMARY_PROVIDER)
         self.fallback_enabled = settings.AI_FALLBACK_ENABLED
         self.max_retries = settings.AI_FALLBACK_MAX_RETRIES
+        self.stream_first_token_timeout = settings.AI_STREAM_FIRST_TOKEN_TIMEOUT
+        self.response_cache: Optional[ResponseCache] = get_response_cache() if settings.AI_CACHE_ENABLED else None
+        self.coalesce_enabled = settings.AI_COALESCE_ENABLED
+        self.single_flight = SingleFlight()
+        self.circuit_breakers: CircuitBreakerRegistry = get_circuit_breakers()
+        self.hedging = HedgePolicy()
+        self.selector = ProviderSelector()
+        self.scheduler: Optional[RequestScheduler] = get_request_scheduler() if settings.AI_SCHEDULER_ENABLED else None
+        self.cascade = CascadeTracker()
+
+        # Shadow traffic: a sample of successful generate() calls is mirrored to the next provider
+        # in the chain after the caller has its answer; shadow_sink(prompt, response, shadow_response)
+        # receives each pair (see shadow_traffic.attach_shadow_comparisons)
+        self.shadow_sample_rate = settings.AI_SHADOW_SAMPLE_RATE
+        self.shadow_sink: Optional[Callable[[str, AIResponse, AIResponse], Awaitable[None]]] = None
+        self._shadow_tasks: Set[asyncio.Task] = set()
+        self._shadow_stats = {"sampled": 0, "dropped": 0, "completed": 0, "failed": 0}
 
         logger.info(f"AI Router initialized: Primary={self.primary_provider.value}, Fallback={self.fallback_enabled}")
 
-    def _get_secondary_provider(self) -> AIProvider:
-        """Get the secondary/fallback provider"""
-        if self.primary_provider == AIProvider.UPSTAGE:
-            return AIProvider.OPENAI
-        return AIProvider.UPSTAGE
+    def _fallback_chain(self, primary: Optional[AIProvider] = None) -> List[AIProvider]:
+        """Available providers to fall back to after primary, in order (see ProviderRegistry.fallback_chain)"""
+        return [
+            provider for provider in self.providers.fallback_chain(primary or self.primary_provider)
+            if self._is_provider_available(provider)
+        ]
+
+    def _select_primary(self, model_name: Optional[str] = None) -> AIProvider:
+        """
+        Pick the primary provider for one request via the routing policy.
+        An explicit model_name belongs to the configured primary, so it pins the choice.
+        """
+        if model_name:
+            return self.primary_provider
+        candidates = []
+        for provider in self.providers.names():
+            model = self._get_default_model(provider)
+            if self._is_provider_available(provider) and not self.circuit_breakers.is_open(provider.value, model):
+                candidates.append((provider, provider.value, model))
+        return self.selector.choose(candidates, default=self.primary_provider)
+
+    def _get_default_model(self, provider: AIProvider) -> str:
+        """Get the default model name for a provider"""
+        spec = self.providers.get(provider)
+        return spec.default_model if spec else "unknown"
+
+    def count_tokens(self, text: str, provider: Optional[AIProvider] = None, model_name: Optional[str] = None) -> int:
+        """Count tokens for a provider/model so callers can size max_tokens and trim context"""
+        provider = provider or self.primary_provider
+        return count_tokens(text, model_name or self._get_default_model(provider))
+
+    @property
+    def upstage_client(self) -> Optional[UpstageClient]:
+        return self._get_client(AIProvider.UPSTAGE)
+
+    @upstage_client.setter
+    def upstage_client(self, client: Optional[UpstageClient]):
+        self._clients[AIProvider.UPSTAGE] = client
+
+    @property
+    def openai_client(self) -> Optional[OpenAIClient]:
+        return self._get_client(AIProvider.OPENAI)
+
+    @openai_client.setter
+    def openai_client(self, client: Optional[OpenAIClient]):
+        self._clients[AIProvider.OPENAI] = client
+
+    def _create_client(self, provider: AIProvider):
+        """Build a provider client via its registry factory (None if the provider isn't configured)"""
+        spec = self.providers.get(provider)
+        if spec is None:
+            logger.warning(f"Unknown provider: {provider}")
+            return None
+        try:
+            client = spec.build_client()
+            if client is None:
+                return None
+            logger.info(f"{provider.value} client initialized")
+            return client
+        except Exception as e:
+            logger.warning(f"Failed to initialize {provider.value} client: {e}")
+            return None
 
     def _get_client(self, provider: AIProvider):
-        """Get client for specified provider"""
-        if provider == AIProvider.UPSTAGE:
-            return self.upstage_client
-        return self.openai_client
+        """Get client for specified provider, creating it on first use"""
+        if provider not in self._clients:
+            self._clients[provider] = self._create_client(provider)
+        return self._clients[provider]
 
     def _is_provider_available(self, provider: AIProvider) -> bool:
         """Check if provider client is available"""
@@ -91,10 +185,13 @@ class AIRouter:
         temperature: float = 0.7,
         max_tokens: int = 500,
         top_p: float = 1.0,
-        stop_sequences: Optional[List[str]] = None
+        stop_sequences: Optional[List[str]] = None,
+        timeout: Optional[float] = None
     ) -> AIResponse:
-        """Call a specific AI provider"""
-        import time
+        """
+        Call a specific AI provider.
+        timeout bounds the whole call (rate limit wait + HTTP request) and sets the HTTP timeout.
+        """
         start_time = time.time()
 
         client = self._get_client(provider)
@@ -109,24 +206,55 @@ class AIRouter:
 
         # Set default model based on provider
         if not model_name:
-            if provider == AIProvider.UPSTAGE:
-                model_name = "solar-pro"
-            else:
-                model_name = "gpt-4o-mini"
+            model_name = self._get_default_model(provider)
+
+        # Budget the completion against the model's context window
+        budget = fit_max_tokens(prompt, model_name, max_tokens)
+        if budget <= 0:
+            return AIResponse(
+                text=None,
+                provider=provider,
+                model=model_name,
+                success=False,
+                error=f"Prompt exceeds context window of {model_name} ({get_context_window(model_name)} tokens)"
+            )
+        max_tokens = budget
+
+        if timeout is not None and timeout <= 0:
+            return self._deadline_response(provider, model_name)
 
+        breaker = self.circuit_breakers.get(provider.value, model_name) if self.circuit_breakers.enabled else None
+        if breaker and not breaker.allow_request():
+            return AIResponse(
+                text=None,
+                provider=provider,
+                model=model_name,
+                success=False,
+                error=f"Circuit open for {provider.value}/{model_name}",
+                circuit_open=True
+            )
+
+        # None leaves the breaker untouched (rate limited or cancelled)
+        succeeded: Optional[bool] = None
         try:
-            result = await client.text_generation(
+            call_kwargs = {"timeout": timeout} if timeout is not None else {}
+            generation = client.text_generation(
                 prompt=prompt,
                 model_name=model_name,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 top_p=top_p,
-                stop_sequences=stop_sequences
+                stop_sequences=stop_sequences,
+                raise_on_error=True,
+                **call_kwargs
             )
+            result = await (asyncio.wait_for(generation, timeout) if timeout is not None else generation)
 
             latency = (time.time() - start_time) * 1000
 
+            succeeded = bool(result)
             if result:
+                self.hedging.record_latency(provider.value, model_name, latency)
                 return AIResponse(
                     text=result,
                     provider=provider,
@@ -144,8 +272,47 @@ class AIRouter:
                     latency_ms=latency
                 )
 
+        except RateLimitError as e:
+            latency = (time.time() - start_time) * 1000
+            logger.warning(f"Rate limited by {provider.value}: {e}")
+            self.selector.record(provider.value, model_name, latency, False)
+            return AIResponse(
+                text=None,
+                provider=provider,
+                model=model_name,
+                success=False,
+                error=str(e),
+                latency_ms=latency,
+                rate_limited=True
+            )
+        except asyncio.TimeoutError as e:
+            if timeout is not None:
+                # Our budget ran out, not necessarily the provider's fault: leave the breaker alone
+                logger.warning(f"Call to {provider.value} cut off after {timeout:.2f}s by the request deadline")
+                response = self._deadline_response(provider, model_name)
+                response.latency_ms = (time.time() - start_time) * 1000
+                self.hedging.record_censored(provider.value, model_name, response.latency_ms)
+                return response
+            # No deadline of ours: the client itself timed out, an ordinary provider failure
+            latency = (time.time() - start_time) * 1000
+            self.hedging.record_censored(provider.value, model_name, latency)
+            succeeded = False
+            logger.error(f"Error calling {provider.value}: timed out")
+            return AIResponse(
+                text=None,
+                provider=provider,
+                model=model_name,
+                success=False,
+                error=str(e) or "Provider call timed out",
+                latency_ms=latency
+            )
+        except asyncio.CancelledError:
+            # Hedge loser or abandoned caller: the call took at least this long
+            self.hedging.record_censored(provider.value, model_name, (time.time() - start_time) * 1000)
+            raise
         except Exception as e:
             latency = (time.time() - start_time) * 1000
+            succeeded = False
             logger.error(f"Error calling {provider.value}: {e}")
             return AIResponse(
                 text=None,
@@ -155,6 +322,16 @@ class AIRouter:
                 error=str(e),
                 latency_ms=latency
             )
+        finally:
+            if succeeded is not None:
+                self.selector.record(provider.value, model_name, (time.time() - start_time) * 1000, succeeded)
+            if breaker:
+                if succeeded is None:
+                    breaker.release()
+                elif succeeded:
+                    breaker.record_success()
+                else:
+                    breaker.record_failure()
 
     async def generate(
         self,
@@ -164,7 +341,12 @@ class AIRouter:
         max_tokens: int = 500,
         top_p: float = 1.0,
         stop_sequences: Optional[List[str]] = None,
-        force_provider: Optional[AIProvider] = None
+        force_provider: Optional[AIProvider] = None,
+        use_cache: Optional[bool] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        timeout_budget: Optional[float] = None,
+        deadline: Optional[Deadline] = None
     ) -> AIResponse:
         """
         Generate text with automatic fallback.
@@ -176,10 +358,208 @@ class AIRouter:
             max_tokens: Maximum tokens to generate
             top_p: Nucleus sampling parameter
             stop_sequences: Stop sequences
-            force_provider: Force specific provider (bypasses fallback)
+            force_provider: Force specific provider (bypasses fallback; ValueError if not registered)
+            use_cache: Serve/store via the response cache (defaults to True only for temperature 0).
+                Cacheable requests are also coalesced with identical in-flight calls.
+            priority: Scheduler lane (INTERACTIVE requests are always served before BULK)
+            tenant: Tenant/job name for fair sharing within the lane
+            timeout_budget: Seconds the whole call may take, including queueing, fallback and backoff
+            deadline: Deadline inherited from the caller (the earlier of the two applies)
 
         Returns:
-            AIResponse with generated text and metadata
+            AIResponse with generated text and metadata (deadline_exceeded=True when the budget ran out)
+        """
+        deadline = Deadline.resolve(deadline, timeout_budget)
+        if use_cache is None:
+            use_cache = temperature == 0
+        use_cache = use_cache and self.response_cache is not None
+        # Identical concurrent requests may share one answer whenever a cached one would do
+        coalesce = self.coalesce_enabled and (use_cache or temperature == 0)
+
+        start_time = time.time()
+        force_provider = self.providers.resolve(force_provider) if force_provider else None
+        provider = force_provider or self.primary_provider
+        request_key = None
+        if use_cache or coalesce:
+            request_key = make_cache_key(
+                provider.value,
+                model_name or self._get_default_model(provider),
+                prompt,
+                {
+                    "temperature": temperature,
+                    "max_tokens": max_tokens,
+                    "top_p": top_p,
+                    "stop_sequences": stop_sequences,
+                    "fallback": self.fallback_enabled and not force_provider
+                }
+            )
+
+        if use_cache:
+            entry = await self.response_cache.get(request_key)
+            if entry is not None:
+                return AIResponse(
+                    text=entry["text"],
+                    provider=AIProvider(entry["provider"]),
+                    model=entry["model"],
+                    success=True,
+                    latency_ms=(time.time() - start_time) * 1000,
+                    fallback_used=entry.get("fallback_used", False),
+                    cached=True
+                )
+
+        led = False
+
+        async def _generate_and_store() -> AIResponse:
+            nonlocal led
+            led = True
+            try:
+                async with self._scheduled(priority, tenant):
+                    response = await self._generate_uncached(
+                        prompt, model_name, temperature, max_tokens, top_p, stop_sequences, force_provider, deadline
+                    )
+            except SchedulerFullError as e:
+                logger.warning(f"Request rejected by scheduler: {e}")
+                return AIResponse(
+                    text=None,
+                    provider=provider,
+                    model=model_name or "unknown",
+                    success=False,
+                    error=str(e)
+                )
+            if use_cache and response.success:
+                await self.response_cache.set(request_key, {
+                    "text": response.text,
+                    "provider": response.provider.value,
+                    "model": response.model,
+                    "fallback_used": response.fallback_used
+                })
+            # Here rather than in generate() so coalesced followers don't mirror the same call again
+            if not force_provider:
+                self._maybe_shadow(prompt, response, temperature, max_tokens, top_p, stop_sequences)
+            return response
+
+        async def _coalesced() -> AIResponse:
+            # Keyed per lane so a BULK leader never queues INTERACTIVE followers behind it
+            response = await self.single_flight.do(f"{request_key}:{priority.name}", _generate_and_store)
+            if response.deadline_exceeded and not led:
+                # The leader's budget ran out, not ours; retry under this caller's own deadline
+                response = await _generate_and_store()
+            return response
+
+        if coalesce:
+            pending = _coalesced()
+        else:
+            pending = _generate_and_store()
+        if deadline is None:
+            return await pending
+        try:
+            # Also bounds time spent queued in the scheduler or waiting on a coalesced call
+            return await asyncio.wait_for(pending, timeout=deadline.remaining())
+        except asyncio.TimeoutError:
+            response = self._deadline_response(provider, model_name)
+            response.error = f"Deadline exceeded ({deadline.budget:.2f}s budget)"
+            response.latency_ms = (time.time() - start_time) * 1000
+            return response
+
+    def _maybe_shadow(
+        self,
+        prompt: str,
+        response: AIResponse,
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        stop_sequences: Optional[List[str]]
+    ):
+        """Sample a successful response for shadow comparison; never blocks the caller"""
+        if self.shadow_sink is None or not response.success or self.shadow_sample_rate <= 0:
+            return
+        if random.random() >= self.shadow_sample_rate:
+            return
+        self._shadow_stats["sampled"] += 1
+        task = asyncio.create_task(
+            self._shadow(prompt, response, temperature, max_tokens, top_p, stop_sequences)
+        )
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    async def _shadow(
+        self,
+        prompt: str,
+        response: AIResponse,
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        stop_sequences: Optional[List[str]]
+    ):
+        """
+        Mirror one request to the next provider in the chain in the SHADOW scheduler lane,
+        which never queues: under load the shadow call is dropped instead of competing with
+        real traffic. It is also dropped without a scheduler to bound it, or when the provider's
+        rate limit has no spare capacity, so it never waits in the bucket ahead of real requests.
+        No cache, coalescing, fallback or retries.
+        """
+        other = next((p for p in self._fallback_chain(response.provider) if p != response.provider), None)
+        if other is None or self.scheduler is None:
+            self._shadow_stats["dropped"] += 1
+            return
+        try:
+            async with self.scheduler.slot(Priority.SHADOW, "shadow"):
+                if not self._has_spare_capacity(other, prompt, max_tokens):
+                    self._shadow_stats["dropped"] += 1
+                    return
+                shadow_response = await self._call_provider(
+                    other, prompt, temperature=temperature, max_tokens=max_tokens,
+                    top_p=top_p, stop_sequences=stop_sequences
+                )
+        except SchedulerFullError:
+            self._shadow_stats["dropped"] += 1
+            return
+        try:
+            await self.shadow_sink(prompt, response, shadow_response)
+            self._shadow_stats["completed"] += 1
+        except Exception as e:
+            self._shadow_stats["failed"] += 1
+            logger.warning(f"Shadow comparison failed: {e}")
+
+    def get_shadow_stats(self) -> Dict[str, Any]:
+        return {
+            "sample_rate": self.shadow_sample_rate,
+            "enabled": self.shadow_sink is not None and self.shadow_sample_rate > 0,
+            "in_flight": len(self._shadow_tasks),
+            **self._shadow_stats
+        }
+
+    def _deadline_response(self, provider: AIProvider, model_name: Optional[str]) -> AIResponse:
+        return AIResponse(
+            text=None,
+            provider=provider,
+            model=model_name or "unknown",
+            success=False,
+            error="Deadline exceeded",
+            deadline_exceeded=True
+        )
+
+    def _scheduled(self, priority: Priority, tenant: str):
+        """In-flight slot from the scheduler (no-op when scheduling is disabled)"""
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(priority, tenant)
+
+    async def _generate_uncached(
+        self,
+        prompt: str,
+        model_name: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        stop_sequences: Optional[List[str]],
+        force_provider: Optional[AIProvider],
+        deadline: Optional[Deadline] = None
+    ) -> AIResponse:
+        """
+        Call the primary provider, then walk the fallback chain on failure
+        (up to max_retries attempts per fallback provider).
+        With a deadline, each attempt gets an even share of the remaining budget.
         """
         # If specific provider forced, use it directly
         if force_provider:
@@ -190,104 +570,557 @@ class AIRouter:
                 temperature=temperature,
                 max_tokens=max_tokens,
                 top_p=top_p,
-                stop_sequences=stop_sequences
+                stop_sequences=stop_sequences,
+                timeout=deadline.remaining() if deadline else None
             )
 
+        rate_limited = False
+
         # Try primary provider
-        primary = self.primary_provider
+        primary = self._select_primary(model_name)
+        chain = self._fallback_chain(primary) if self.fallback_enabled else []
+        fallback_attempts = self.max_retries * len(chain)
         if self._is_provider_available(primary):
-            response = await self._call_provider(
-                provider=primary,
-                prompt=prompt,
-                model_name=model_name,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                top_p=top_p,
-                stop_sequences=stop_sequences
+            response = await self._call_primary_with_hedge(
+                primary, prompt, model_name, temperature, max_tokens, top_p, stop_sequences,
+                timeout=deadline.share(1 + fallback_attempts) if deadline else None
             )
 
             if response.success:
                 return response
 
+            rate_limited = response.rate_limited
             logger.warning(f"Primary provider {primary.value} failed: {response.error}")
         else:
             logger.warning(f"Primary provider {primary.value} not available")
 
-        # Try fallback if enabled
-        if self.fallback_enabled:
-            secondary = self._get_secondary_provider()
-            if self._is_provider_available(secondary):
-                logger.info(f"Attempting fallback to {secondary.value}")
-
-                for attempt in range(self.max_retries):
-                    response = await self._call_provider(
-                        provider=secondary,
-                        prompt=prompt,
-                        model_name=None,  # Use default for fallback provider
-                        temperature=temperature,
-                        max_tokens=max_tokens,
-                        top_p=top_p,
-                        stop_sequences=stop_sequences
-                    )
+        # Walk the fallback chain if enabled
+        attempts_left = fallback_attempts
+        for secondary in chain:
+            logger.info(f"Attempting fallback to {secondary.value}")
 
-                    if response.success:
-                        response.fallback_used = True
-                        logger.info(f"Fallback to {secondary.value} succeeded")
-                        return response
+            for attempt in range(self.max_retries):
+                if deadline and deadline.expired():
+                    logger.warning(f"Deadline exceeded before fallback attempt {attempt + 1} on {secondary.value}")
+                    break
+                response = await self._call_provider(
+                    provider=secondary,
+                    prompt=prompt,
+                    model_name=None,  # Use default for fallback provider
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    top_p=top_p,
+                    stop_sequences=stop_sequences,
+                    timeout=deadline.share(attempts_left) if deadline else None
+                )
+                attempts_left -= 1
+
+                if response.success:
+                    response.fallback_used = True
+                    logger.info(f"Fallback to {secondary.value} succeeded")
+                    return response
 
-                    logger.warning(f"Fallback attempt {attempt + 1}/{self.max_retries} failed")
-                    if attempt < self.max_retries - 1:
-                        await asyncio.sleep(1)  # Brief delay before retry
+                rate_limited = rate_limited or response.rate_limited
+                logger.warning(f"Fallback attempt {attempt + 1}/{self.max_retries} on {secondary.value} failed")
+                if response.circuit_open:
+                    # Skip this provider's remaining retries; they go to the rest of the chain
+                    attempts_left -= self.max_retries - attempt - 1
+                    break
+                if attempt < self.max_retries - 1:
+                    # Brief delay before retry, never more than a tenth of the next attempt's share
+                    backoff = 1.0
+                    if deadline:
+                        backoff = min(backoff, deadline.share(attempts_left) * 0.1)
+                    await asyncio.sleep(backoff)
+            if deadline and deadline.expired():
+                break
 
         # All attempts failed
+        if deadline and deadline.expired():
+            response = self._deadline_response(self.primary_provider, model_name)
+            response.error = f"Deadline exceeded ({deadline.budget:.2f}s budget): all attempts failed or timed out"
+            response.rate_limited = rate_limited
+            return response
         return AIResponse(
             text=None,
             provider=self.primary_provider,
             model=model_name or "unknown",
             success=False,
-            error="All AI providers failed"
+            error="All AI providers failed",
+            rate_limited=rate_limited
         )
 
-    async def generate_with_both(
+    def _has_spare_capacity(self, provider: AIProvider, prompt: str, max_tokens: int) -> bool:
+        """
+        Whether an optional extra call (hedge or shadow) can go out now: the provider is
+        available, healthy and has rate limit headroom, so the call never waits in the bucket
+        """
+        client = self._get_client(provider)
+        if client is None:
+            return False
+        model = self._get_default_model(provider)
+        if self.circuit_breakers.is_open(provider.value, model):
+            return False
+        # The key the client's pool would hand out next, not just its primary key
+        key_pool = getattr(client, "key_pool", None)
+        api_key = key_pool.peek().key if isinstance(key_pool, APIKeyPool) else getattr(client, "api_key", None)
+        rate_limit = get_rate_limiter().get(provider.value, model, api_key)
+        return rate_limit.has_capacity(count_tokens(prompt, model) + max_tokens)
+
+    async def _call_primary_with_hedge(
+        self,
+        primary: AIProvider,
+        prompt: str,
+        model_name: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        stop_sequences: Optional[List[str]],
+        timeout: Optional[float] = None
+    ) -> AIResponse:
+        """
+        Call the primary; if it is slower than the hedge delay, race the same request
+        on the first fallback provider that can take it and keep the first success.
+        The loser is cancelled.
+        """
+        call_kwargs = dict(
+            prompt=prompt,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            top_p=top_p,
+            stop_sequences=stop_sequences,
+            timeout=timeout
+        )
+        delay = None
+        if self.fallback_enabled:
+            delay = self.hedging.hedge_delay(primary.value, model_name or self._get_default_model(primary))
+        if delay is None or (timeout is not None and delay >= timeout):
+            return await self._call_provider(provider=primary, model_name=model_name, **call_kwargs)
+
+        primary_task = asyncio.ensure_future(self._call_provider(provider=primary, model_name=model_name, **call_kwargs))
+        tasks = [primary_task]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary_task.result()
+
+            secondary = next(
+                (p for p in self._fallback_chain(primary) if self._has_spare_capacity(p, prompt, max_tokens)), None
+            )
+            if secondary is None or not self.hedging.try_spend():
+                return await primary_task
+
+            logger.info(f"Primary {primary.value} slower than {delay * 1000:.0f}ms; hedging to {secondary.value}")
+            tasks.append(asyncio.ensure_future(self._call_provider(provider=secondary, model_name=None, **call_kwargs)))
+            pending = set(tasks)
+            response = None
+            while pending and not (response and response.success):
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Prefer the primary when both finish in the same tick
+                for task in sorted(done, key=lambda t: t is not primary_task):
+                    response = task.result()
+                    if response.success:
+                        break
+
+            response.hedged = True
+            if response.success and response.provider == secondary:
+                self.hedging.hedges_won += 1
+            return response
+        finally:
+            # Cancel the loser (or everything, if we were cancelled ourselves)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def generate_many(
+        self,
+        prompts: List[str],
+        concurrency: int = 8,
+        ordered: bool = False,
+        **generate_kwargs
+    ) -> AsyncIterator[Tuple[int, AIResponse]]:
+        """
+        Generate for many prompts with a bounded in-flight window (with fallback per prompt).
+        Rate-limited failures shrink the window and are retried.
+
+        Args:
+            prompts: Prompts to generate for
+            concurrency: Maximum concurrent generate() calls
+            ordered: Yield in input order instead of completion order
+            **generate_kwargs: Passed through to generate() (priority defaults to BULK)
+
+        Yields:
+            (prompt index, AIResponse) tuples
+        """
+        generate_kwargs.setdefault("priority", Priority.BULK)
+
+        async def _generate(prompt: str) -> AIResponse:
+            return await self.generate(prompt=prompt, **generate_kwargs)
+
+        async for index, response in bounded_map(
+            prompts,
+            _generate,
+            concurrency=concurrency,
+            ordered=ordered,
+            is_rate_limited=lambda r: not r.success and r.rate_limited
+        ):
+            if response is None:
+                response = AIResponse(
+                    text=None,
+                    provider=self.primary_provider,
+                    model=generate_kwargs.get("model_name") or "unknown",
+                    success=False,
+                    error="Batch generation failed"
+                )
+            yield index, response
+
+    async def generate_stream(
         self,
         prompt: str,
+        model_name: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: int = 500
-    ) -> Dict[str, AIResponse]:
+        max_tokens: int = 500,
+        top_p: float = 1.0,
+        stop_sequences: Optional[List[str]] = None,
+        force_provider: Optional[AIProvider] = None,
+        first_token_timeout: Optional[float] = None,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default"
+    ) -> AsyncIterator[AIStreamChunk]:
         """
-        Generate text from both providers for comparison (US5).
+        Stream generated text with automatic fallback.
 
-        Returns:
-            Dict with 'upstage' and 'openai' responses
+        Fallback only happens before the first token: if the primary errors, returns
+        nothing, or stalls longer than first_token_timeout, the secondary is tried.
+        Once text has been yielded the stream is committed to that provider.
+
+        Args:
+            prompt: The input prompt
+            model_name: Optional model name (provider-specific)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            top_p: Nucleus sampling parameter
+            stop_sequences: Stop sequences
+            force_provider: Force specific provider (bypasses fallback; ValueError if not registered)
+            first_token_timeout: Seconds to wait for the first token before falling back
+            priority: Scheduler lane; the slot is held until the stream finishes
+            tenant: Tenant/job name for fair sharing within the lane
+
+        Yields:
+            AIStreamChunk deltas, then a final chunk with done=True and the full AIResponse
         """
-        results = {}
+        force_provider = self.providers.resolve(force_provider) if force_provider else None
+        try:
+            async with self._scheduled(priority, tenant):
+                async for chunk in self._generate_stream_unscheduled(
+                    prompt, model_name, temperature, max_tokens, top_p, stop_sequences,
+                    force_provider, first_token_timeout
+                ):
+                    yield chunk
+        except SchedulerFullError as e:
+            logger.warning(f"Stream rejected by scheduler: {e}")
+            provider = force_provider or self.primary_provider
+            yield AIStreamChunk(
+                text="",
+                provider=provider,
+                model=model_name or "unknown",
+                done=True,
+                response=AIResponse(
+                    text=None,
+                    provider=provider,
+                    model=model_name or "unknown",
+                    success=False,
+                    error=str(e)
+                )
+            )
 
-        # Run both providers in parallel
-        tasks = []
-        providers = []
+    async def _generate_stream_unscheduled(
+        self,
+        prompt: str,
+        model_name: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        top_p: float,
+        stop_sequences: Optional[List[str]],
+        force_provider: Optional[AIProvider],
+        first_token_timeout: Optional[float]
+    ) -> AsyncIterator[AIStreamChunk]:
+        """Stream with pre-first-token fallback (see generate_stream)"""
+        if first_token_timeout is None:
+            first_token_timeout = self.stream_first_token_timeout
+
+        # Ordered list of (provider, model, is_fallback) attempts
+        attempts = []
+        if force_provider:
+            attempts.append((force_provider, model_name, False))
+        else:
+            primary = self._select_primary(model_name)
+            attempts.append((primary, model_name, False))
+            if self.fallback_enabled:
+                for secondary in self._fallback_chain(primary):
+                    attempts.extend([(secondary, None, True)] * self.max_retries)
+
+        last_error = "All AI providers failed"
+        for provider, attempt_model, is_fallback in attempts:
+            client = self._get_client(provider)
+            if not client:
+                logger.warning(f"Provider {provider.value} not available for streaming")
+                last_error = f"{provider.value} client not available"
+                continue
 
-        if self._is_provider_available(AIProvider.UPSTAGE):
-            tasks.append(self._call_provider(
-                provider=AIProvider.UPSTAGE,
+            attempt_model = attempt_model or self._get_default_model(provider)
+            budget = fit_max_tokens(prompt, attempt_model, max_tokens)
+            if budget <= 0:
+                last_error = f"Prompt exceeds context window of {attempt_model}"
+                logger.warning(last_error)
+                continue
+
+            breaker = self.circuit_breakers.get(provider.value, attempt_model) if self.circuit_breakers.enabled else None
+            if breaker and not breaker.allow_request():
+                last_error = f"Circuit open for {provider.value}/{attempt_model}"
+                logger.warning(last_error)
+                continue
+
+            start_time = time.time()
+            stream = client.text_generation_stream(
                 prompt=prompt,
+                model_name=attempt_model,
                 temperature=temperature,
-                max_tokens=max_tokens
-            ))
-            providers.append(AIProvider.UPSTAGE)
+                max_tokens=budget,
+                top_p=top_p,
+                stop_sequences=stop_sequences
+            )
 
-        if self._is_provider_available(AIProvider.OPENAI):
-            tasks.append(self._call_provider(
-                provider=AIProvider.OPENAI,
-                prompt=prompt,
+            # Wait for the first token; anything short of one allows fallback
+            try:
+                first_delta = await asyncio.wait_for(stream.__anext__(), timeout=first_token_timeout)
+            except StopAsyncIteration:
+                last_error = "Empty response from provider"
+                logger.warning(f"Streaming from {provider.value} returned no tokens")
+                if breaker:
+                    breaker.record_failure()
+                continue
+            except asyncio.TimeoutError:
+                last_error = f"No first token from {provider.value} within {first_token_timeout}s"
+                logger.warning(last_error)
+                await stream.aclose()
+                if breaker:
+                    breaker.record_failure()
+                continue
+            except RateLimitError as e:
+                last_error = str(e)
+                logger.warning(f"Streaming from {provider.value} rate limited: {e}")
+                await stream.aclose()
+                if breaker:
+                    breaker.release()
+                continue
+            except Exception as e:
+                last_error = str(e)
+                logger.warning(f"Streaming from {provider.value} failed before first token: {e}")
+                await stream.aclose()
+                if breaker:
+                    breaker.record_failure()
+                continue
+            except BaseException:
+                if breaker:
+                    breaker.release()
+                raise
+
+            if breaker:
+                breaker.record_success()
+
+            ttft = (time.time() - start_time) * 1000
+            parts = [first_delta]
+            yield AIStreamChunk(text=first_delta, provider=provider, model=attempt_model)
+
+            error = None
+            try:
+                async for delta in stream:
+                    parts.append(delta)
+                    yield AIStreamChunk(text=delta, provider=provider, model=attempt_model)
+            except Exception as e:
+                error = str(e)
+                logger.error(f"Streaming from {provider.value} failed mid-stream: {e}")
+            finally:
+                await stream.aclose()
+
+            if is_fallback:
+                logger.info(f"Streaming fallback to {provider.value} succeeded")
+            yield AIStreamChunk(
+                text="",
+                provider=provider,
+                model=attempt_model,
+                done=True,
+                response=AIResponse(
+                    text="".join(parts),
+                    provider=provider,
+                    model=attempt_model,
+                    success=error is None,
+                    error=error,
+                    latency_ms=(time.time() - start_time) * 1000,
+                    fallback_used=is_fallback,
+                    time_to_first_token_ms=ttft
+                )
+            )
+            return
+
+        # All attempts failed before producing a token
+        provider = force_provider or self.primary_provider
+        yield AIStreamChunk(
+            text="",
+            provider=provider,
+            model=model_name or "unknown",
+            done=True,
+            response=AIResponse(
+                text=None,
+                provider=provider,
+                model=model_name or "unknown",
+                success=False,
+                error=last_error if force_provider else "All AI providers failed"
+            )
+        )
+
+    def _cascade_tiers(self, tiers: Optional[List[Tuple[AIProvider, str]]] = None) -> List[Tuple[AIProvider, str]]:
+        """
+        Cheap tiers to try first (AI_CASCADE_MODELS by default), skipping providers without a client.
+        Raises ValueError for a provider that isn't registered.
+        """
+        if tiers is None:
+            tiers = parse_cascade_tiers(settings.AI_CASCADE_MODELS)
+        resolved = [(self.providers.resolve(provider), model) for provider, model in tiers]
+        return [(provider, model) for provider, model in resolved if self._is_provider_available(provider)]
+
+    async def generate_cascade(
+        self,
+        prompt: str,
+        validator: Validator,
+        task_type: str = "default",
+        tiers: Optional[List[Tuple[AIProvider, str]]] = None,
+        model_name: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        timeout_budget: Optional[float] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AIResponse:
+        """
+        Small-model-first generation: each cheap tier answers in turn and the first answer the
+        validator accepts is returned. If none is accepted, the request escalates to the regular
+        generate() path (default models with fallback). Escalations are tracked per task_type.
+
+        Args:
+            prompt: The input prompt
+            validator: Called with the generated text; return True to accept it (raising rejects it)
+            task_type: Label for the escalation metrics (e.g. "conversation")
+            tiers: (provider, model) pairs to try first (default: AI_CASCADE_MODELS)
+            model_name: Model for the final escalation (default: the routed provider's default)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            priority: Scheduler lane
+            tenant: Tenant/job name for fair sharing within the lane
+            timeout_budget: Seconds the whole cascade may take
+            deadline: Deadline inherited from the caller (the earlier of the two applies)
+
+        Returns:
+            AIResponse (escalated=True if a cheap tier was rejected; success=False with the last
+            text kept when even the final answer failed validation)
+        """
+        deadline = Deadline.resolve(deadline, timeout_budget)
+        cheap_tiers = self._cascade_tiers(tiers)
+        escalated = False
+
+        for index, (provider, model) in enumerate(cheap_tiers):
+            tier_label = f"{provider.value}:{model}"
+            # Leave an even share for every tier still to come, including the final one
+            tier_deadline = Deadline.resolve(deadline, deadline.share(len(cheap_tiers) - index + 1)) if deadline else None
+            response = await self.generate(
+                prompt,
+                model_name=model,
                 temperature=temperature,
-                max_tokens=max_tokens
-            ))
-            providers.append(AIProvider.OPENAI)
+                max_tokens=max_tokens,
+                force_provider=provider,
+                priority=priority,
+                tenant=tenant,
+                deadline=tier_deadline
+            )
+            if not response.success:
+                self.cascade.record_escalation(task_type, tier_label, ESCALATE_ERROR)
+            elif not run_validator(validator, response.text):
+                self.cascade.record_escalation(task_type, tier_label, ESCALATE_INVALID)
+            else:
+                response.escalated = escalated
+                self.cascade.record_outcome(task_type, tier_label, escalated)
+                return response
+            logger.info(f"Cascade [{task_type}] escalating past {tier_label}")
+            escalated = True
 
-        if tasks:
-            responses = await asyncio.gather(*tasks, return_exceptions=True)
+        response = await self.generate(
+            prompt,
+            model_name=model_name,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            priority=priority,
+            tenant=tenant,
+            deadline=deadline
+        )
+        response.escalated = escalated
+        tier_label = f"{response.provider.value}:{response.model}"
+        if response.success and run_validator(validator, response.text):
+            self.cascade.record_outcome(task_type, tier_label, escalated)
+            return response
 
-            for provider, response in zip(providers, responses):
+        if response.success:
+            self.cascade.record_escalation(task_type, tier_label, ESCALATE_INVALID)
+            response.success = False
+            response.error = "Response failed validation"
+        else:
+            self.cascade.record_escalation(task_type, tier_label, ESCALATE_ERROR)
+        self.cascade.record_outcome(task_type, None, escalated)
+        return response
+
+    async def generate_with_all(
+        self,
+        prompt: str,
+        providers: Optional[List[AIProvider]] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default"
+    ) -> Dict[str, AIResponse]:
+        """
+        Generate text from several providers in parallel for comparison.
+        Each provider call takes its own scheduler slot in the given lane.
+
+        Args:
+            prompt: The input prompt
+            providers: Providers to ask (default: every registered provider)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            priority: Scheduler lane
+            tenant: Tenant/job name for fair sharing within the lane
+
+        Returns:
+            Dict of provider name -> response, for the providers that are available
+        """
+        results = {}
+
+        async def _scheduled_call(provider: AIProvider) -> AIResponse:
+            async with self._scheduled(priority, tenant):
+                return await self._call_provider(
+                    provider=provider,
+                    prompt=prompt,
+                    temperature=temperature,
+                    max_tokens=max_tokens
+                )
+
+        candidates = self.providers.names() if providers is None else [self.providers.resolve(p) for p in providers]
+        available = [provider for provider in candidates if self._is_provider_available(provider)]
+
+        if available:
+            responses = await asyncio.gather(*[_scheduled_call(p) for p in available], return_exceptions=True)
+
+            for provider, response in zip(available, responses):
                 if isinstance(response, Exception):
                     results[provider.value] = AIResponse(
                         text=None,
@@ -301,31 +1134,207 @@ class AIRouter:
 
         return results
 
+    async def generate_with_both(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default"
+    ) -> Dict[str, AIResponse]:
+        """
+        Generate text from Upstage and OpenAI for comparison (US5).
+        See generate_with_all for other providers.
+
+        Returns:
+            Dict with 'upstage' and 'openai' responses
+        """
+        return await self.generate_with_all(
+            prompt,
+            providers=[AIProvider.UPSTAGE, AIProvider.OPENAI],
+            temperature=temperature,
+            max_tokens=max_tokens,
+            priority=priority,
+            tenant=tenant
+        )
+
+    def get_batch_processor(self) -> Optional[BatchProcessor]:
+        """
+        Batch API processor on the AI_BATCH_PROVIDER client, created on first use.
+        None if that provider isn't configured or doesn't speak the OpenAI format.
+        """
+        if self._batch_processor is None:
+            client = self._get_client(self.providers.resolve(settings.AI_BATCH_PROVIDER))
+            if isinstance(client, OpenAIClient):
+                self._batch_processor = BatchProcessor(client)
+        return self._batch_processor
+
+    async def generate_batch(
+        self,
+        prompts: List[str],
+        model_name: Optional[str] = None,
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        custom_ids: Optional[List[str]] = None,
+        flush: bool = True
+    ) -> List[AIResponse]:
+        """
+        Generate through the provider's Batch API: cheaper and outside the real-time rate limits,
+        but answers arrive when the batch finishes (up to AI_BATCH_COMPLETION_WINDOW). No fallback.
+        Requests are persisted, so after a restart get_batch_processor().resume() continues them
+        and results can be read back by custom_id.
+
+        Args:
+            prompts: Prompts to generate for
+            model_name: Model (default: the batch provider's default model)
+            temperature: Sampling temperature
+            max_tokens: Maximum tokens to generate
+            custom_ids: Stable ids per prompt, to find results again after a restart
+            flush: Submit right away instead of waiting for the batch to fill (AI_BATCH_FLUSH_SECONDS)
+
+        Returns:
+            AIResponses in prompt order
+        """
+        provider = self.providers.resolve(settings.AI_BATCH_PROVIDER)
+        model_name = model_name or self._get_default_model(provider)
+        processor = self.get_batch_processor()
+        if processor is None:
+            return [
+                AIResponse(
+                    text=None,
+                    provider=provider,
+                    model=model_name,
+                    success=False,
+                    error=f"Batch API not available for {provider.value}"
+                )
+                for _ in prompts
+            ]
+
+        start_time = time.time()
+        futures = []
+        for index, prompt in enumerate(prompts):
+            futures.append(await processor.submit(
+                prompt,
+                model_name=model_name,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                custom_id=custom_ids[index] if custom_ids else None
+            ))
+        if flush:
+            await processor.flush()
+
+        responses = []
+        for result in await asyncio.gather(*futures):
+            responses.append(AIResponse(
+                text=result.text,
+                provider=provider,
+                model=result.model or model_name,
+                success=result.success,
+                error=result.error,
+                latency_ms=(time.time() - start_time) * 1000
+            ))
+        return responses
+
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get combined usage statistics from all providers"""
-        stats = {
-            "upstage": None,
-            "openai": None
+        # Only clients that were actually built; stats must not create them
+        stats = {}
+        for provider in self.providers.names():
+            client = self._clients.get(provider)
+            stats[provider.value] = client.get_usage_stats() if client else None
+
+        stats["http_pool"] = get_http_transport().get_metrics()
+        stats["rate_limits"] = get_rate_limiter().get_stats()
+        if self.response_cache:
+            stats["response_cache"] = self.response_cache.get_stats()
+        stats["coalescing"] = self.single_flight.get_stats()
+        stats["circuit_breakers"] = self.circuit_breakers.get_stats()
+        stats["hedging"] = self.hedging.get_stats()
+        stats["routing"] = self.selector.get_stats()
+        stats["providers"] = self.get_provider_health()
+        stats["cascade"] = self.cascade.get_stats()
+        stats["shadow"] = self.get_shadow_stats()
+        if self.scheduler:
+            stats["scheduler"] = self.scheduler.get_stats()
+        if self._batch_processor:
+            stats["batch_api"] = self._batch_processor.get_stats()
+
+        return stats
+
+    def get_provider_health(self) -> Dict[str, Any]:
+        """
+        Registry declaration plus live health per provider: client state, circuit breaker
+        and routing EWMA for the default model. Never builds clients.
+        """
+        routing = self.selector.get_stats()["providers"]
+        health = {}
+        for spec in self.providers:
+            client = self._clients.get(spec.name, False)
+            entry = spec.get_stats()
+            entry["client"] = "not built" if client is False else ("ready" if client else "unavailable")
+            entry["circuit_open"] = self.circuit_breakers.is_open(spec.name, spec.default_model)
+            entry["routing"] = routing.get(f"{spec.name}/{spec.default_model}")
+            health[spec.name] = entry
+        return health
+
+    async def warmup(self, probe: bool = False, connections_per_origin: int = 1) -> Dict[str, Any]:
+        """
+        Build the provider clients and open pooled connections before the first request,
+        so it doesn't pay for DNS, TCP and TLS set-up.
+
+        Args:
+            probe: Also send a tiny generation (max_tokens=1) per provider to check keys end to end
+            connections_per_origin: Pooled connections to open per provider origin
+
+        Returns:
+            Dict with 'connections' (origin -> reachable) and, when probing, 'probes' (provider -> success)
+        """
+        providers = [provider for provider in self.providers.names() if self._is_provider_available(provider)]
+        urls = [self._get_client(provider).base_url for provider in providers]
+        result: Dict[str, Any] = {
+            "connections": await get_http_transport().warmup(urls, connections_per_origin=connections_per_origin)
         }
 
-        if self.upstage_client:
-            stats["upstage"] = {
-                "api_call_count": self.upstage_client.api_call_count,
-                "total_input_tokens": self.upstage_client.total_input_tokens,
-                "total_output_tokens": self.upstage_client.total_output_tokens
+        if probe:
+            # Straight to the provider: no cache, coalescing, scheduler or fallback
+            responses = await asyncio.gather(*[
+                self._call_provider(provider, "ping", temperature=0.0, max_tokens=1)
+                for provider in providers
+            ])
+            result["probes"] = {
+                provider.value: response.success for provider, response in zip(providers, responses)
             }
+            for provider, response in zip(providers, responses):
+                if not response.success:
+                    logger.warning(f"Warm-up probe to {provider.value} failed: {response.error}")
 
-        if self.openai_client:
-            stats["openai"] = self.openai_client.get_usage_stats()
+        logger.info(f"AI Router warmed up: {result}")
+        return result
 
-        return stats
+    async def __aenter__(self) -> "AIRouter":
+        await self.warmup()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     async def close(self):
         """Close all client connections"""
-        if self.upstage_client:
-            await self.upstage_client.close()
-        if self.openai_client:
-            await self.openai_client.close()
+        # Shadow calls are best-effort; don't hold shutdown for them
+        for task in list(self._shadow_tasks):
+            task.cancel()
+        if self._shadow_tasks:
+            await asyncio.gather(*self._shadow_tasks, return_exceptions=True)
+        if self._batch_processor:
+            await self._batch_processor.close()
+            self._batch_processor = None
+        for client in self._clients.values():
+            if client:
+                await client.close()
+        self._clients.clear()
+        if self.response_cache is not None:
+            await asyncio.to_thread(self.response_cache.close)
+        await close_http_transport()
         logger.info("AI Router closed")
 
 
@@ -337,6 +1346,7 @@ def get_ai_router() -> AIRouter:
     """Get or create AI Router singleton"""
     global _router_instance
     if _router_instance is None:
+        settings.ensure_validated()
         _router_instance = AIRouter()
     return _router_instance
 
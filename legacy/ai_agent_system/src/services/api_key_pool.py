@@ -0,0 +1,162 @@
+# ai_agent_system/src/services/api_key_pool.py
+"""
+API Key Pool
+Spreads requests for one provider over several API keys (e.g. separate orgs
+with their own rate limits) using weighted least-outstanding-requests.
+Keys that hit 429 or 401/403 are cooled down and skipped until they recover.
+"""
+import logging
+import time
+from typing import Optional, List, Dict, Any, Sequence, Tuple, Union
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.rate_limiter import key_fingerprint
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Request outcomes reported back to the pool
+KEY_SUCCESS = "success"
+KEY_ERROR = "error"
+KEY_RATE_LIMITED = "rate_limited"
+KEY_AUTH_ERROR = "auth_error"
+KEY_CANCELLED = "cancelled"  # Caller gave up (cancelled or deadline): says nothing about the key
+
+
+def parse_api_keys(value: Optional[str]) -> List[Tuple[str, float]]:
+    """
+    Parse 'key1:3,key2,key3:0.5' into [(key, weight), ...]. Weight defaults to 1.
+    """
+    keys = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        key, weight = item, 1.0
+        if ":" in item:
+            candidate, _, raw_weight = item.rpartition(":")
+            try:
+                key, weight = candidate, float(raw_weight)
+            except ValueError:
+                pass
+        keys.append((key, weight))
+    return keys
+
+
+class PooledKey:
+    """One API key with its weight, load and health"""
+
+    def __init__(self, key: str, weight: float = 1.0):
+        self.key = key
+        self.weight = max(weight, 0.01)
+        self.fingerprint = key_fingerprint(key)
+        self.outstanding = 0
+        self.cooldown_until = 0.0
+
+        # --- Metrics ---
+        self.requests = 0
+        self.successes = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.auth_errors = 0
+
+    def is_available(self, now: float) -> bool:
+        return self.cooldown_until <= now
+
+    def load(self) -> float:
+        """Outstanding requests per unit weight if one more request is sent"""
+        return (self.outstanding + 1) / self.weight
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "weight": self.weight,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "successes": self.successes,
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "auth_errors": self.auth_errors,
+            "cooling_down_s": round(max(0.0, self.cooldown_until - time.monotonic()), 2)
+        }
+
+
+class APIKeyPool:
+    """Weighted least-outstanding-requests selection over a provider's API keys"""
+
+    def __init__(
+        self,
+        keys: Sequence[Union[str, Tuple[str, float]]],
+        rate_limit_cooldown: Optional[float] = None,
+        auth_cooldown: Optional[float] = None
+    ):
+        self.keys: List[PooledKey] = []
+        for entry in keys:
+            key, weight = entry if isinstance(entry, tuple) else (entry, 1.0)
+            if key and key not in [k.key for k in self.keys]:
+                self.keys.append(PooledKey(key, weight))
+        if not self.keys:
+            raise ValueError("APIKeyPool needs at least one API key")
+        self.rate_limit_cooldown = rate_limit_cooldown or settings.AI_KEY_COOLDOWN_SECONDS
+        self.auth_cooldown = auth_cooldown or settings.AI_KEY_AUTH_COOLDOWN_SECONDS
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def primary(self) -> PooledKey:
+        return self.keys[0]
+
+    def peek(self) -> PooledKey:
+        """The key acquire() would pick right now, without counting a request"""
+        now = time.monotonic()
+        available = [k for k in self.keys if k.is_available(now)]
+        if available:
+            return min(available, key=lambda k: (k.load(), -k.weight))
+        return min(self.keys, key=lambda k: k.cooldown_until)
+
+    def acquire(self) -> PooledKey:
+        """
+        Pick the healthy key with the lowest weighted load and count the request
+        as outstanding. If every key is cooling down, the one recovering first is used.
+        Every acquire() must be paired with release().
+        """
+        chosen = self.peek()
+        chosen.outstanding += 1
+        chosen.requests += 1
+        return chosen
+
+    def release(self, pooled_key: PooledKey, outcome: str = KEY_SUCCESS, retry_after: Optional[float] = None):
+        """Finish a request and update the key's health"""
+        pooled_key.outstanding = max(0, pooled_key.outstanding - 1)
+        if outcome == KEY_SUCCESS:
+            pooled_key.successes += 1
+        elif outcome == KEY_RATE_LIMITED:
+            pooled_key.rate_limited += 1
+            self._cool_down(pooled_key, retry_after if retry_after is not None else self.rate_limit_cooldown)
+        elif outcome == KEY_AUTH_ERROR:
+            pooled_key.auth_errors += 1
+            self._cool_down(pooled_key, self.auth_cooldown)
+        elif outcome == KEY_CANCELLED:
+            pass
+        else:
+            pooled_key.errors += 1
+
+    def _cool_down(self, pooled_key: PooledKey, seconds: float):
+        # Only rotate away when another key can take the traffic
+        if len(self.keys) == 1:
+            return
+        pooled_key.cooldown_until = max(pooled_key.cooldown_until, time.monotonic() + seconds)
+        logger.warning(f"API key {pooled_key.fingerprint} cooling down for {seconds:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Usage per key, keyed by fingerprint (never the raw key)"""
+        return {k.fingerprint: k.get_stats() for k in self.keys}
+
+
+def outcome_for_status(status_code: Optional[int]) -> str:
+    """Map an HTTP status from a failed call to a pool outcome"""
+    if status_code == 429:
+        return KEY_RATE_LIMITED
+    if status_code in (401, 403):
+        return KEY_AUTH_ERROR
+    return KEY_ERROR
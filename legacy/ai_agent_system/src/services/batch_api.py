@@ -0,0 +1,447 @@
+# ai_agent_system/src/services/batch_api.py
+"""
+Batch API
+Submits bulk, latency-insensitive generations through the OpenAI-style Batch
+API (cheaper, and outside the real-time rate limits).
+
+Requests are accumulated and written as JSONL batch files, uploaded, submitted
+as a batch and polled until the batch finishes; results are mapped back to the
+callers' futures and kept in a SQLite results store. Every request and batch is
+persisted before it is sent, so after a restart resume() picks up in-flight
+batches and unsent requests, and results can be read back by custom_id.
+Delivery is at-least-once: a crash between upload and bookkeeping resubmits.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List, Tuple, Set
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.openai_client import OpenAIClient
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_BATCH_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+# Request states in the store
+REQUEST_QUEUED = "queued"
+REQUEST_SUBMITTED = "submitted"
+REQUEST_COMPLETED = "completed"
+REQUEST_FAILED = "failed"
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one batched request"""
+    custom_id: str
+    success: bool
+    text: Optional[str] = None
+    error: Optional[str] = None
+    model: Optional[str] = None
+
+
+def parse_batch_output(content: str) -> List[BatchResult]:
+    """Parse a Batch API output or error file (JSONL, one result per line)"""
+    results = []
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        status_code = response.get("status_code") or 0
+        if item.get("error") or status_code >= 400:
+            error = item.get("error") or body.get("error") or {}
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            results.append(BatchResult(item["custom_id"], False, error=message or f"HTTP {status_code}"))
+            continue
+        choices = body.get("choices") or []
+        text = (choices[0].get("message") or {}).get("content") if choices else None
+        results.append(BatchResult(
+            item["custom_id"], bool(text), text=text, error=None if text else "Empty response",
+            model=body.get("model")
+        ))
+    return results
+
+
+class BatchStore:
+    """
+    SQLite record of batched requests and batches, the source of truth for resuming.
+    An empty db_path keeps everything in memory (no resume across restarts).
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path if db_path is not None else settings.AI_BATCH_DB_PATH
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use so constructing a store never touches the filesystem
+        if self._db is None:
+            if self.db_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path or ":memory:", check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS batch_requests ("
+                "custom_id TEXT PRIMARY KEY, body TEXT NOT NULL, status TEXT NOT NULL, batch_id TEXT, "
+                "text TEXT, error TEXT, model TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_batch_requests_status ON batch_requests (status, created_at)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_batch_requests_batch ON batch_requests (batch_id)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS batch_jobs ("
+                "batch_id TEXT PRIMARY KEY, status TEXT NOT NULL, input_file_id TEXT, output_file_id TEXT, "
+                "error_file_id TEXT, request_count INTEGER NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def add_request(self, custom_id: str, body: Dict[str, Any]) -> bool:
+        """Queue a request; False if the custom_id is already known (e.g. resubmitted after a restart)"""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO batch_requests (custom_id, body, status, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (custom_id, json.dumps(body, ensure_ascii=False), REQUEST_QUEUED, now, now)
+            )
+            db.commit()
+            return cursor.rowcount > 0
+
+    def queued_requests(self, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT custom_id, body FROM batch_requests WHERE status = ? ORDER BY created_at LIMIT ?",
+                (REQUEST_QUEUED, limit)
+            ).fetchall()
+        return [(custom_id, json.loads(body)) for custom_id, body in rows]
+
+    def record_batch(self, batch_id: str, status: str, input_file_id: str, custom_ids: List[str]):
+        """Persist a submitted batch and move its requests out of the queue in one transaction"""
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO batch_jobs "
+                "(batch_id, status, input_file_id, request_count, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (batch_id, status, input_file_id, len(custom_ids), now, now)
+            )
+            db.executemany(
+                "UPDATE batch_requests SET status = ?, batch_id = ?, updated_at = ? WHERE custom_id = ?",
+                [(REQUEST_SUBMITTED, batch_id, now, custom_id) for custom_id in custom_ids]
+            )
+            db.commit()
+
+    def update_batch(self, batch_id: str, status: str, output_file_id: Optional[str], error_file_id: Optional[str]):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "UPDATE batch_jobs SET status = ?, output_file_id = ?, error_file_id = ?, updated_at = ? "
+                "WHERE batch_id = ?",
+                (status, output_file_id, error_file_id, time.time(), batch_id)
+            )
+            db.commit()
+
+    def active_batches(self) -> List[str]:
+        placeholders = ",".join("?" * len(TERMINAL_BATCH_STATUSES))
+        with self._lock:
+            rows = self._conn().execute(
+                f"SELECT batch_id FROM batch_jobs WHERE status NOT IN ({placeholders}) ORDER BY created_at",
+                TERMINAL_BATCH_STATUSES
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def save_results(self, batch_id: str, results: List[BatchResult], missing_error: str) -> Dict[str, BatchResult]:
+        """
+        Store a finished batch's results. Requests of the batch without a result
+        are failed with missing_error. Returns every result of the batch by custom_id.
+        """
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            db.executemany(
+                "UPDATE batch_requests SET status = ?, text = ?, error = ?, model = ?, updated_at = ? "
+                "WHERE custom_id = ? AND batch_id = ?",
+                [
+                    (REQUEST_COMPLETED if r.success else REQUEST_FAILED, r.text, r.error, r.model, now, r.custom_id, batch_id)
+                    for r in results
+                ]
+            )
+            db.execute(
+                "UPDATE batch_requests SET status = ?, error = ?, updated_at = ? WHERE batch_id = ? AND status = ?",
+                (REQUEST_FAILED, missing_error, now, batch_id, REQUEST_SUBMITTED)
+            )
+            db.commit()
+            rows = db.execute(
+                "SELECT custom_id, status, text, error, model FROM batch_requests WHERE batch_id = ?", (batch_id,)
+            ).fetchall()
+        return {row[0]: self._result_from_row(row) for row in rows}
+
+    @staticmethod
+    def _result_from_row(row: Tuple) -> BatchResult:
+        custom_id, status, text, error, model = row
+        return BatchResult(custom_id, status == REQUEST_COMPLETED, text=text, error=error, model=model)
+
+    def get_result(self, custom_id: str) -> Optional[BatchResult]:
+        """The finished result for a request, or None while it is queued or in a running batch"""
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT custom_id, status, text, error, model FROM batch_requests WHERE custom_id = ? AND status IN (?, ?)",
+                (custom_id, REQUEST_COMPLETED, REQUEST_FAILED)
+            ).fetchone()
+        return self._result_from_row(row) if row else None
+
+    def get_batch_id(self, custom_id: str) -> Optional[str]:
+        """Batch a request was submitted in, or None while it is still queued"""
+        with self._lock:
+            row = self._conn().execute(
+                "SELECT batch_id FROM batch_requests WHERE custom_id = ?", (custom_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_counts(self) -> Dict[str, int]:
+        """Requests per state"""
+        with self._lock:
+            rows = self._conn().execute("SELECT status, COUNT(*) FROM batch_requests GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class BatchProcessor:
+    """
+    Accumulates requests, submits them as Batch API jobs on an OpenAI-format client
+    and resolves each caller's future when its batch finishes.
+    """
+
+    def __init__(
+        self,
+        client: OpenAIClient,
+        store: Optional[BatchStore] = None,
+        work_dir: Optional[str] = None,
+        max_batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        completion_window: Optional[str] = None
+    ):
+        self.client = client
+        self.store = store or BatchStore()
+        self.work_dir = work_dir if work_dir is not None else settings.AI_BATCH_DIR
+        self.max_batch_size = max_batch_size or settings.AI_BATCH_MAX_REQUESTS
+        self.flush_interval = flush_interval if flush_interval is not None else settings.AI_BATCH_FLUSH_SECONDS
+        self.poll_interval = poll_interval if poll_interval is not None else settings.AI_BATCH_POLL_SECONDS
+        self.completion_window = completion_window or settings.AI_BATCH_COMPLETION_WINDOW
+
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._queued = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._flushes: Set[asyncio.Task] = set()
+        self._pollers: Dict[str, asyncio.Task] = {}
+
+        # --- Metrics ---
+        self.requests_submitted = 0
+        self.batches_created = 0
+        self.batches_finished = 0
+        self.batches_failed = 0
+
+    async def submit(
+        self,
+        prompt: str,
+        model_name: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        top_p: float = 1.0,
+        stop_sequences: Optional[List[str]] = None,
+        custom_id: Optional[str] = None
+    ) -> "asyncio.Future[BatchResult]":
+        """
+        Queue one request for the next batch.
+
+        Args:
+            custom_id: Stable id to find the result again after a restart; generated if omitted.
+                Submitting a known custom_id again attaches to the existing request.
+
+        Returns:
+            Future resolved with the BatchResult when the request's batch finishes
+        """
+        custom_id = custom_id or uuid.uuid4().hex
+        future = self._futures.get(custom_id)
+        if future is None:
+            future = self._futures[custom_id] = asyncio.get_running_loop().create_future()
+
+        body: Dict[str, Any] = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": top_p
+        }
+        if stop_sequences:
+            body["stop"] = stop_sequences
+
+        if not await asyncio.to_thread(self.store.add_request, custom_id, body):
+            finished = await asyncio.to_thread(self.store.get_result, custom_id)
+            if finished is not None:
+                self._resolve(finished)
+                return future
+            # Known but unfinished (e.g. from before a restart): make sure something resolves it
+            batch_id = await asyncio.to_thread(self.store.get_batch_id, custom_id)
+            if batch_id is not None:
+                self._start_polling(batch_id)
+            elif self._flush_timer is None or self._flush_timer.done():
+                self._flush_timer = asyncio.create_task(self._flush_later())
+            return future
+
+        self.requests_submitted += 1
+        self._queued += 1
+        if self._queued >= self.max_batch_size:
+            self._queued = 0
+            task = asyncio.create_task(self._flush_logged())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.create_task(self._flush_later())
+        return future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self._flush_logged()
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception as e:
+            # Requests stay queued in the store; the next flush (or resume) retries them
+            logger.error(f"Batch submission failed, retrying in {self.flush_interval}s: {e}")
+            self._flush_timer = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> List[str]:
+        """Submit every queued request now. Returns the ids of the batches created."""
+        batch_ids = []
+        async with self._flush_lock:
+            while True:
+                rows = await asyncio.to_thread(self.store.queued_requests, self.max_batch_size)
+                if not rows:
+                    break
+                batch_ids.append(await self._create_batch(rows))
+            self._queued = 0
+        return batch_ids
+
+    def _write_batch_file(self, filename: str, content: bytes):
+        if not self.work_dir:
+            return
+        os.makedirs(self.work_dir, exist_ok=True)
+        with open(os.path.join(self.work_dir, filename), "wb") as f:
+            f.write(content)
+
+    async def _create_batch(self, rows: List[Tuple[str, Dict[str, Any]]]) -> str:
+        content = "".join(
+            json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}, ensure_ascii=False) + "\n"
+            for custom_id, body in rows
+        ).encode("utf-8")
+        filename = f"batch-{int(time.time())}-{uuid.uuid4().hex[:8]}.jsonl"
+        await asyncio.to_thread(self._write_batch_file, filename, content)
+
+        uploaded = await self.client.client.files.create(file=(filename, content), purpose="batch")
+        batch = await self.client.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window
+        )
+        await asyncio.to_thread(self.store.record_batch, batch.id, batch.status, uploaded.id, [cid for cid, _ in rows])
+        self.batches_created += 1
+        logger.info(f"Submitted batch {batch.id} with {len(rows)} requests")
+        self._start_polling(batch.id)
+        return batch.id
+
+    def _start_polling(self, batch_id: str):
+        if batch_id not in self._pollers or self._pollers[batch_id].done():
+            self._pollers[batch_id] = asyncio.create_task(self._poll(batch_id))
+
+    async def _poll(self, batch_id: str):
+        """Poll a batch until it finishes, then store its results and resolve futures"""
+        while True:
+            try:
+                batch = await self.client.client.batches.retrieve(batch_id)
+            except Exception as e:
+                logger.warning(f"Polling batch {batch_id} failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await asyncio.to_thread(self.store.update_batch, batch_id, batch.status, batch.output_file_id, batch.error_file_id)
+            if batch.status in TERMINAL_BATCH_STATUSES:
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        results: List[BatchResult] = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await self.client.client.files.content(file_id)
+                results.extend(parse_batch_output(content.text))
+
+        if batch.status == "completed":
+            self.batches_finished += 1
+        else:
+            self.batches_failed += 1
+            logger.warning(f"Batch {batch_id} ended as {batch.status}")
+        finished = await asyncio.to_thread(
+            self.store.save_results, batch_id, results, f"Batch {batch.status} without a result for this request"
+        )
+        for result in finished.values():
+            self._resolve(result)
+        self._pollers.pop(batch_id, None)
+
+    def _resolve(self, result: BatchResult):
+        future = self._futures.pop(result.custom_id, None)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    async def resume(self) -> List[str]:
+        """
+        Continue work left by a previous process: poll unfinished batches and submit
+        requests that were queued but never sent. Returns the batch ids being polled.
+        """
+        active = await asyncio.to_thread(self.store.active_batches)
+        for batch_id in active:
+            self._start_polling(batch_id)
+        created = await self.flush()
+        if active or created:
+            logger.info(f"Resumed {len(active)} batches, submitted {len(created)} new")
+        return active + created
+
+    async def get_result(self, custom_id: str) -> Optional[BatchResult]:
+        """Look up a finished result in the results store"""
+        return await asyncio.to_thread(self.store.get_result, custom_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests_submitted": self.requests_submitted,
+            "queued": self._queued,
+            "batches_created": self.batches_created,
+            "batches_active": len(self._pollers),
+            "batches_finished": self.batches_finished,
+            "batches_failed": self.batches_failed
+        }
+
+    async def close(self):
+        """Stop flushing and polling; everything in flight is persisted and can be resumed"""
+        tasks = [task for task in [self._flush_timer, *self._flushes, *self._pollers.values()] if task and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._pollers.clear()
+        self.store.close()
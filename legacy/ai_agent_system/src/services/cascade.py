@@ -0,0 +1,119 @@
+# ai_agent_system/src/services/cascade.py
+"""
+Model Cascade
+Small-model-first routing: cheaper, faster models answer first and a
+caller-supplied validator decides whether to accept the answer or escalate to
+the next tier. Tracks escalation rates per task type so the tiers can be tuned.
+"""
+import json
+import logging
+import re
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Validators get the generated text and return True to accept it
+Validator = Callable[[str], bool]
+
+# Escalation reasons
+ESCALATE_ERROR = "error"
+ESCALATE_INVALID = "invalid"
+
+_CODE_FENCE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.DOTALL)
+
+
+def parse_cascade_tiers(value: Optional[str]) -> List[Tuple[str, str]]:
+    """Parse 'upstage:solar-mini,openai:gpt-4o-mini' into [(provider, model), ...]"""
+    tiers = []
+    for item in (value or "").split(","):
+        provider, _, model = item.strip().partition(":")
+        if provider and model:
+            tiers.append((provider.strip().lower(), model.strip()))
+    return tiers
+
+
+def json_messages_validator(expected_count: Optional[int] = None, key: str = "messages") -> Validator:
+    """
+    Validator for conversation generation: the text must be JSON (optionally in a
+    code fence) holding a list of messages, either top-level or under key, where
+    every message has non-empty content/text and, if given, there are expected_count of them.
+    """
+    def _validate(text: str) -> bool:
+        match = _CODE_FENCE.match(text)
+        try:
+            data = json.loads(match.group(1) if match else text)
+        except (json.JSONDecodeError, TypeError):
+            return False
+        messages = data.get(key) if isinstance(data, dict) else data
+        if not isinstance(messages, list) or not messages:
+            return False
+        if expected_count is not None and len(messages) != expected_count:
+            return False
+        return all(
+            isinstance(message, dict) and str(message.get("content") or message.get("text") or "").strip()
+            for message in messages
+        )
+
+    return _validate
+
+
+def run_validator(validator: Validator, text: Optional[str]) -> bool:
+    """A validator that raises rejects the answer instead of failing the request"""
+    if not text:
+        return False
+    try:
+        return bool(validator(text))
+    except Exception as e:
+        logger.warning(f"Cascade validator raised, escalating: {e}")
+        return False
+
+
+class _TaskStats:
+    def __init__(self):
+        self.requests = 0
+        self.escalated = 0  # Requests not settled by the first tier
+        self.failed = 0  # Requests no tier could answer acceptably
+        self.accepted_by: Dict[str, int] = {}
+        self.escalations: Dict[str, Dict[str, int]] = {}  # tier -> reason -> count
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "escalation_rate": round(self.escalated / self.requests, 3) if self.requests else 0.0,
+            "failure_rate": round(self.failed / self.requests, 3) if self.requests else 0.0,
+            "accepted_by": dict(self.accepted_by),
+            "escalations": {tier: dict(reasons) for tier, reasons in self.escalations.items()}
+        }
+
+
+class CascadeTracker:
+    """Escalation metrics per task type"""
+
+    def __init__(self):
+        self._tasks: Dict[str, _TaskStats] = {}
+
+    def _task(self, task_type: str) -> _TaskStats:
+        stats = self._tasks.get(task_type)
+        if stats is None:
+            stats = self._tasks[task_type] = _TaskStats()
+        return stats
+
+    def record_escalation(self, task_type: str, tier: str, reason: str):
+        """A tier's answer was rejected (reason: ESCALATE_ERROR or ESCALATE_INVALID)"""
+        reasons = self._task(task_type).escalations.setdefault(tier, {})
+        reasons[reason] = reasons.get(reason, 0) + 1
+
+    def record_outcome(self, task_type: str, accepted_tier: Optional[str], escalated: bool):
+        """Finish a cascaded request; accepted_tier is None when every tier failed"""
+        stats = self._task(task_type)
+        stats.requests += 1
+        if escalated:
+            stats.escalated += 1
+        if accepted_tier is None:
+            stats.failed += 1
+        else:
+            stats.accepted_by[accepted_tier] = stats.accepted_by.get(accepted_tier, 0) + 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {task_type: stats.get_stats() for task_type, stats in self._tasks.items()}
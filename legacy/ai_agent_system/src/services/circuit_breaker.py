@@ -0,0 +1,177 @@
+# ai_agent_system/src/services/circuit_breaker.py
+"""
+Circuit Breaker
+Per (provider, model) breakers so an outage fails fast instead of costing a
+full request timeout on every call before the router falls back.
+
+CLOSED    -> requests flow; opens on N consecutive failures or a high rolling error rate
+OPEN      -> requests are rejected until the recovery timeout elapses
+HALF_OPEN -> a limited number of probe requests decide between CLOSED and OPEN
+"""
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Optional, Dict, Any, Tuple
+
+from ai_agent_system.src.config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Breaker for one (provider, model)"""
+
+    def __init__(
+        self,
+        name: str = "",
+        failure_threshold: Optional[int] = None,
+        error_rate_threshold: Optional[float] = None,
+        window_size: Optional[int] = None,
+        min_requests: Optional[int] = None,
+        recovery_timeout: Optional[float] = None,
+        half_open_max_calls: Optional[int] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_FAILURE_THRESHOLD
+        self.error_rate_threshold = error_rate_threshold or settings.CIRCUIT_ERROR_RATE_THRESHOLD
+        self.min_requests = min_requests or settings.CIRCUIT_MIN_REQUESTS
+        self.recovery_timeout = recovery_timeout if recovery_timeout is not None else settings.CIRCUIT_RECOVERY_TIMEOUT
+        self.half_open_max_calls = half_open_max_calls or settings.CIRCUIT_HALF_OPEN_MAX_CALLS
+
+        self._state = CircuitState.CLOSED
+        self._outcomes = deque(maxlen=window_size or settings.CIRCUIT_WINDOW_SIZE)  # True = failure
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+
+        # --- Metrics ---
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def _transition(self, state: CircuitState):
+        if state == self._state:
+            return
+        logger.info(f"Circuit {self.name}: {self._state.value} -> {state.value}")
+        self._state = state
+        self._probes_in_flight = 0
+        if state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            self.times_opened += 1
+        elif state == CircuitState.CLOSED:
+            self._outcomes.clear()
+            self._consecutive_failures = 0
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent. In HALF_OPEN an allowed request is a
+        probe and must be finished with record_success/record_failure/release.
+        """
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+            self._probes_in_flight += 1
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self):
+        if self._state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+            return
+        self._outcomes.append(False)
+        self._consecutive_failures = 0
+
+    def record_failure(self):
+        if self._state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+            return
+        self._outcomes.append(True)
+        self._consecutive_failures += 1
+        if self._state == CircuitState.CLOSED and (
+            self._consecutive_failures >= self.failure_threshold
+            or (len(self._outcomes) >= self.min_requests and self.error_rate() >= self.error_rate_threshold)
+        ):
+            logger.warning(
+                f"Circuit {self.name} opened: {self._consecutive_failures} consecutive failures, "
+                f"error rate {self.error_rate():.0%}"
+            )
+            self._transition(CircuitState.OPEN)
+
+    def release(self):
+        """Finish a request without counting it (cancelled, rate limited, rejected locally)"""
+        if self._state == CircuitState.HALF_OPEN and self._probes_in_flight > 0:
+            self._probes_in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state.value,
+            "error_rate": round(self.error_rate(), 3),
+            "consecutive_failures": self._consecutive_failures,
+            "window_requests": len(self._outcomes),
+            "rejected": self.rejected,
+            "times_opened": self.times_opened
+        }
+
+
+class CircuitBreakerRegistry:
+    """Breakers keyed by (provider, model)"""
+
+    def __init__(self, enabled: Optional[bool] = None, **breaker_kwargs):
+        self.enabled = settings.CIRCUIT_BREAKER_ENABLED if enabled is None else enabled
+        self.breaker_kwargs = breaker_kwargs
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, provider: str, model: str) -> CircuitBreaker:
+        key = (provider, model)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(name=f"{provider}/{model}", **self.breaker_kwargs)
+            self._breakers[key] = breaker
+        return breaker
+
+    def allow_request(self, provider: str, model: str) -> bool:
+        return not self.enabled or self.get(provider, model).allow_request()
+
+    def is_open(self, provider: str, model: str) -> bool:
+        """Check without taking a half-open probe slot"""
+        if not self.enabled or (provider, model) not in self._breakers:
+            return False
+        return self._breakers[(provider, model)].state == CircuitState.OPEN
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            f"{provider}/{model}": breaker.get_stats()
+            for (provider, model), breaker in self._breakers.items()
+        }
+
+
+# Singleton instance
+_circuit_breakers_instance: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Get or create the process-wide circuit breaker registry"""
+    global _circuit_breakers_instance
+    if _circuit_breakers_instance is None:
+        _circuit_breakers_instance = CircuitBreakerRegistry()
+    return _circuit_breakers_instance
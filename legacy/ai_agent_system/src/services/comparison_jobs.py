@@ -0,0 +1,270 @@
+# ai_agent_system/src/services/comparison_jobs.py
+"""
+Checkpointed Comparison Jobs
+Long batch comparisons recorded to a durable SQLite checkpoint as they go:
+each finished comparison is stored under its prompt hash, so restarting a
+job with the same id skips everything already paid for and continues at the
+job's original concurrency. Checkpoint I/O runs in a worker thread so the
+comparisons in flight never wait on a commit.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict
+from typing import Optional, Dict, Any, Sequence, Set, Iterator, Tuple
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.ai_comparator import AIComparator, ComparisonResult, ComparisonReport
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Job statuses
+JOB_RUNNING = "running"
+JOB_PARTIAL = "partial"  # Ran to the end but some items failed; run again to retry them
+JOB_COMPLETED = "completed"
+
+
+def prompt_hash(prompt: str, reference: Optional[str] = None) -> str:
+    """Checkpoint key for one job item"""
+    return hashlib.sha256(json.dumps([prompt, reference], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ComparisonCheckpoint:
+    """
+    SQLite record of comparison jobs and their finished items.
+    An empty db_path keeps everything in memory (no resume across restarts).
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path if db_path is not None else settings.AI_COMPARISON_JOBS_DB_PATH
+        self._db: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _conn(self) -> sqlite3.Connection:
+        # Opened on first use so constructing a checkpoint never touches the filesystem
+        if self._db is None:
+            if self.db_path:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path or ":memory:", check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS comparison_jobs ("
+                "job_id TEXT PRIMARY KEY, status TEXT NOT NULL, params TEXT NOT NULL, concurrency INTEGER NOT NULL, "
+                "total INTEGER NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS comparison_job_items ("
+                "job_id TEXT NOT NULL, prompt_hash TEXT NOT NULL, item_index INTEGER NOT NULL, result TEXT NOT NULL, "
+                "completed_at REAL NOT NULL, PRIMARY KEY (job_id, prompt_hash))"
+            )
+            self._db.commit()
+        return self._db
+
+    def start_job(self, job_id: str, params: Dict[str, Any], concurrency: Optional[int], total: int) -> int:
+        """
+        Create the job, or resume it if it exists. Returns the concurrency to run at: the job's
+        original one unless a new value is given. Raises ValueError if the generation
+        parameters differ from the original run.
+        """
+        now = time.time()
+        params_json = json.dumps(params, sort_keys=True)
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT params, concurrency FROM comparison_jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                concurrency = concurrency or 8
+                db.execute(
+                    "INSERT INTO comparison_jobs (job_id, status, params, concurrency, total, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (job_id, JOB_RUNNING, params_json, concurrency, total, now, now)
+                )
+            else:
+                if row[0] != params_json:
+                    raise ValueError(f"Job {job_id} was started with different parameters: {row[0]}")
+                concurrency = concurrency or row[1]
+                db.execute(
+                    "UPDATE comparison_jobs SET status = ?, concurrency = ?, total = ?, updated_at = ? WHERE job_id = ?",
+                    (JOB_RUNNING, concurrency, total, now, job_id)
+                )
+            db.commit()
+        return concurrency
+
+    def completed_hashes(self, job_id: str) -> Set[str]:
+        with self._lock:
+            rows = self._conn().execute(
+                "SELECT prompt_hash FROM comparison_job_items WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def save(self, job_id: str, item_hash: str, index: int, result: ComparisonResult):
+        """Durably record one finished comparison"""
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO comparison_job_items (job_id, prompt_hash, item_index, result, completed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, item_hash, index, json.dumps(asdict(result), ensure_ascii=False), time.time())
+            )
+            db.commit()
+
+    def finish(self, job_id: str, status: str = JOB_COMPLETED):
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "UPDATE comparison_jobs SET status = ?, updated_at = ? WHERE job_id = ?",
+                (status, time.time(), job_id)
+            )
+            db.commit()
+
+    def results(self, job_id: str, batch_size: int = 500) -> Iterator[Tuple[int, ComparisonResult]]:
+        """Stored results in item order, read a page at a time"""
+        last_index = -1
+        last_hash = ""
+        while True:
+            with self._lock:
+                rows = self._conn().execute(
+                    "SELECT item_index, prompt_hash, result FROM comparison_job_items "
+                    "WHERE job_id = ? AND (item_index > ? OR (item_index = ? AND prompt_hash > ?)) "
+                    "ORDER BY item_index, prompt_hash LIMIT ?",
+                    (job_id, last_index, last_index, last_hash, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for index, _, result in rows:
+                yield index, ComparisonResult(**json.loads(result))
+            last_index, last_hash = rows[-1][0], rows[-1][1]
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT status, params, concurrency, total, created_at, updated_at FROM comparison_jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            completed = db.execute(
+                "SELECT COUNT(*) FROM comparison_job_items WHERE job_id = ?", (job_id,)
+            ).fetchone()[0]
+        status, params, concurrency, total, created_at, updated_at = row
+        return {
+            "job_id": job_id,
+            "status": status,
+            "params": json.loads(params),
+            "concurrency": concurrency,
+            "total": total,
+            "completed": completed,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+class ComparisonJob:
+    """A named, resumable batch comparison"""
+
+    def __init__(self, comparator: AIComparator, job_id: str, checkpoint: Optional[ComparisonCheckpoint] = None):
+        self.comparator = comparator
+        self.job_id = job_id
+        self.checkpoint = checkpoint or ComparisonCheckpoint()
+
+    async def run(
+        self,
+        prompts: Sequence[str],
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        concurrency: Optional[int] = None,
+        references: Optional[Sequence[Optional[str]]] = None,
+        tenant: Optional[str] = None,
+        run_writer: Optional[Any] = None,
+        score_batch_size: int = 64
+    ) -> ComparisonReport:
+        """
+        Compare every prompt not yet in the checkpoint, saving each result as it is yielded.
+        If cancelled or crashed, run again with the same job id and prompts to continue; only
+        comparisons that had finished but were still waiting to be scored are redone.
+        Comparisons where both providers failed aren't checkpointed: the job then ends as
+        "partial" instead of "completed", and running it again retries them.
+
+        Args:
+            prompts: Prompts to compare (items are matched by prompt and reference, not position;
+                repeated items are compared once)
+            temperature: Sampling temperature (must match the original run)
+            max_tokens: Maximum tokens to generate (must match the original run)
+            concurrency: Maximum comparisons in flight (default: the job's original value, else 8)
+            references: Reference answers per prompt for the similarity scores
+            tenant: Scheduler tenant (default: the job id)
+            run_writer: ComparisonRunWriter for the newly finished results
+            score_batch_size: Most results similarity-scored per vectorized pass (see
+                AIComparator.iter_batch_compare; finished results are never held back to fill one)
+
+        Returns:
+            ComparisonReport over the whole job, including items finished in earlier runs
+        """
+        params = {"temperature": temperature, "max_tokens": max_tokens}
+        hashes = [
+            prompt_hash(prompt, references[index] if references is not None else None)
+            for index, prompt in enumerate(prompts)
+        ]
+        # One item per distinct prompt/reference, at its first position: the job's total counts the same items
+        first_index: Dict[str, int] = {}
+        for index, item_hash in enumerate(hashes):
+            first_index.setdefault(item_hash, index)
+        concurrency = await asyncio.to_thread(
+            self.checkpoint.start_job, self.job_id, params, concurrency, len(first_index)
+        )
+        done = await asyncio.to_thread(self.checkpoint.completed_hashes, self.job_id)
+        todo = [index for item_hash, index in first_index.items() if item_hash not in done]
+
+        report = ComparisonReport()
+        for _, result in self.checkpoint.results(self.job_id):
+            report.add(result)
+        logger.info(
+            f"Comparison job {self.job_id}: {len(first_index) - len(todo)} done, {len(todo)} to go "
+            f"(concurrency {concurrency})"
+        )
+
+        async for position, result in self.comparator.iter_batch_compare(
+            [prompts[index] for index in todo],
+            temperature,
+            max_tokens,
+            tenant=tenant or self.job_id,
+            concurrency=concurrency,
+            report=report,
+            run_writer=run_writer,
+            references=[references[index] for index in todo] if references is not None else None,
+            score_batch_size=score_batch_size
+        ):
+            if result.winner is None:
+                continue  # Both providers failed: nothing paid for, retried on the next run
+            index = todo[position]
+            await asyncio.to_thread(self.checkpoint.save, self.job_id, hashes[index], index, result)
+
+        done = await asyncio.to_thread(self.checkpoint.completed_hashes, self.job_id)
+        missing = sum(1 for item_hash in first_index if item_hash not in done)
+        if missing:
+            await asyncio.to_thread(self.checkpoint.finish, self.job_id, JOB_PARTIAL)
+            logger.warning(f"Comparison job {self.job_id} finished with {missing} failed items; run it again to retry")
+        else:
+            await asyncio.to_thread(self.checkpoint.finish, self.job_id)
+            logger.info(f"Comparison job {self.job_id} completed")
+        return report
+
+    def results(self) -> Iterator[Tuple[int, ComparisonResult]]:
+        return self.checkpoint.results(self.job_id)
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        return self.checkpoint.get_job(self.job_id)
@@ -0,0 +1,302 @@
+# ai_agent_system/src/services/comparison_store.py
+"""
+Comparison Store
+Columnar on-disk store for comparison runs: NumPy arrays per chunk plus a
+per-run string table, so hundreds of thousands of comparisons load and filter
+without re-parsing JSON. Writers append chunks while a batch comparison is
+still running; a chunk only becomes visible once it is completely written.
+
+Layout:
+    <store>/<run_id>/strings.jsonl     one JSON string per line; line number = string id
+    <store>/<run_id>/chunk-000001.npz  numeric columns and string ids for up to chunk_size rows
+"""
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+
+import numpy as np
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.ai_comparator import ComparisonResult
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("upstage", "openai")
+WINNERS = (None, "upstage", "openai", "tie")  # Column value = position
+NO_STRING = -1
+
+_CHUNK_PATTERN = re.compile(r"^chunk-(\d+)\.npz$")
+
+# Column -> dtype; per-provider columns are prefixed with the provider name
+_ROW_COLUMNS = {
+    "index": np.int64,
+    "timestamp": np.float64,
+    "winner": np.int8,
+    "prompt": np.int64,
+    "pairwise_similarity": np.float32,  # NaN when not scored
+}
+_PROVIDER_COLUMNS = {
+    "present": np.bool_,
+    "success": np.bool_,
+    "latency_ms": np.float32,
+    "response_length": np.int32,
+    "word_count": np.int32,
+    "estimated_tokens": np.int32,
+    "model": np.int64,
+    "text": np.int64,
+    "error": np.int64,
+    "reference_similarity": np.float32,
+}
+STRING_COLUMNS = {"prompt"} | {f"{p}_{c}" for p in PROVIDERS for c in ("model", "text", "error")}
+
+
+def _column_dtypes() -> Dict[str, Any]:
+    dtypes = dict(_ROW_COLUMNS)
+    for provider in PROVIDERS:
+        for column, dtype in _PROVIDER_COLUMNS.items():
+            dtypes[f"{provider}_{column}"] = dtype
+    return dtypes
+
+
+def _parse_timestamp(value: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def _score(value: Optional[float]) -> float:
+    return np.nan if value is None else value
+
+
+def _missing_column(dtype, rows: int) -> np.ndarray:
+    """Fill for score columns added after a chunk was written (not scored)"""
+    return np.full(rows, np.nan, dtype=dtype)
+
+
+class ComparisonRunWriter:
+    """Appends one run's results; rows are buffered and written chunk_size at a time"""
+
+    def __init__(self, run_dir: str, chunk_size: int = 1000):
+        self.run_dir = run_dir
+        self.chunk_size = max(1, chunk_size)
+        os.makedirs(run_dir, exist_ok=True)
+        self._strings_path = os.path.join(run_dir, "strings.jsonl")
+        # Continue an existing run after the strings and chunks already on disk
+        self._next_string_id = 0
+        if os.path.exists(self._strings_path):
+            with open(self._strings_path, encoding="utf-8") as f:
+                self._next_string_id = sum(1 for _ in f)
+        self._next_chunk = 1 + max(
+            [int(m.group(1)) for m in map(_CHUNK_PATTERN.match, os.listdir(run_dir)) if m], default=0
+        )
+        self._strings = open(self._strings_path, "a", encoding="utf-8")
+        self._interned: Dict[str, int] = {}  # Short repeated strings (models, errors)
+        self._rows: List[Dict[str, Any]] = []
+        self.rows_written = 0
+
+    def _string(self, value: Optional[str], intern: bool = False) -> int:
+        if value is None:
+            return NO_STRING
+        if intern and value in self._interned:
+            return self._interned[value]
+        string_id = self._next_string_id
+        self._next_string_id += 1
+        self._strings.write(json.dumps(value, ensure_ascii=False) + "\n")
+        if intern:
+            self._interned[value] = string_id
+        return string_id
+
+    def append(self, index: int, result: ComparisonResult):
+        row = {
+            "index": index,
+            "timestamp": _parse_timestamp(result.timestamp),
+            "winner": WINNERS.index(result.winner) if result.winner in WINNERS else 0,
+            "prompt": self._string(result.prompt),
+            "pairwise_similarity": _score(result.comparison_summary.get("pairwise_similarity")),
+        }
+        for provider in PROVIDERS:
+            response = getattr(result, f"{provider}_response") or {}
+            metrics = response.get("metrics") or {}
+            row[f"{provider}_present"] = bool(response)
+            row[f"{provider}_success"] = bool(response.get("success"))
+            row[f"{provider}_latency_ms"] = metrics.get("latency_ms", 0.0)
+            row[f"{provider}_response_length"] = metrics.get("response_length", 0)
+            row[f"{provider}_word_count"] = metrics.get("word_count", 0)
+            row[f"{provider}_estimated_tokens"] = metrics.get("estimated_tokens", 0)
+            row[f"{provider}_model"] = self._string(response.get("model"), intern=True)
+            row[f"{provider}_text"] = self._string(response.get("text"))
+            row[f"{provider}_error"] = self._string(response.get("error"), intern=True)
+            row[f"{provider}_reference_similarity"] = _score(
+                result.comparison_summary.get(f"{provider}_reference_similarity")
+            )
+        self._rows.append(row)
+        if len(self._rows) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a new chunk (strings first, so a visible chunk never points past them)"""
+        if not self._rows:
+            return
+        self._strings.flush()
+        os.fsync(self._strings.fileno())
+        columns = {
+            name: np.array([row[name] for row in self._rows], dtype=dtype)
+            for name, dtype in _column_dtypes().items()
+        }
+        path = os.path.join(self.run_dir, f"chunk-{self._next_chunk:06d}.npz")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, path)
+        self._next_chunk += 1
+        self.rows_written += len(self._rows)
+        self._rows = []
+
+    def close(self):
+        self.flush()
+        self._strings.close()
+
+    def __enter__(self) -> "ComparisonRunWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _nanmean(values: np.ndarray) -> Optional[float]:
+    scored = values[~np.isnan(values)]
+    return round(float(scored.mean()), 4) if scored.size else None
+
+
+class ComparisonTable:
+    """Loaded comparison rows as NumPy columns, with filter and aggregate helpers"""
+
+    def __init__(self, columns: Dict[str, np.ndarray], runs: List[str], run_dirs: Dict[str, str]):
+        self.columns = columns
+        self.runs = runs  # 'run' column value = position in this list
+        self._run_dirs = run_dirs
+        self._string_tables: Dict[str, List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["index"])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def _strings_for(self, run: str) -> List[str]:
+        table = self._string_tables.get(run)
+        if table is None:
+            with open(os.path.join(self._run_dirs[run], "strings.jsonl"), encoding="utf-8") as f:
+                table = self._string_tables[run] = [json.loads(line) for line in f]
+        return table
+
+    def string(self, column: str, row: int) -> Optional[str]:
+        """Resolve a string column (prompt, upstage_text, openai_model, ...) for one row"""
+        string_id = int(self.columns[column][row])
+        if string_id == NO_STRING:
+            return None
+        return self._strings_for(self.runs[self.columns["run"][row]])[string_id]
+
+    def filter(
+        self,
+        mask: Optional[np.ndarray] = None,
+        run: Optional[str] = None,
+        winner: Optional[str] = "any",
+        both_succeeded: Optional[bool] = None
+    ) -> "ComparisonTable":
+        """Rows matching every given condition (winner=None selects comparisons both providers failed)"""
+        keep = np.ones(len(self), dtype=bool) if mask is None else np.asarray(mask, dtype=bool).copy()
+        if run is not None:
+            keep &= self.columns["run"] == (self.runs.index(run) if run in self.runs else -1)
+        if winner != "any":
+            keep &= self.columns["winner"] == WINNERS.index(winner)
+        if both_succeeded is not None:
+            both = self.columns["upstage_success"] & self.columns["openai_success"]
+            keep &= both if both_succeeded else ~both
+        table = ComparisonTable({name: values[keep] for name, values in self.columns.items()}, self.runs, self._run_dirs)
+        table._string_tables = self._string_tables
+        return table
+
+    def win_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.columns["winner"], minlength=len(WINNERS))
+        return {str(winner) if winner else "failures": int(counts[i]) for i, winner in enumerate(WINNERS)}
+
+    def provider_summary(self, provider: str, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Any]:
+        present = self.columns[f"{provider}_present"]
+        success = self.columns[f"{provider}_success"]
+        latency = self.columns[f"{provider}_latency_ms"][success]
+        summary = {
+            "requests": int(present.sum()),
+            "successes": int(success.sum()),
+            "success_rate": round(float(success.sum() / present.sum()), 3) if present.any() else None,
+            "mean_latency_ms": round(float(latency.mean()), 2) if latency.size else None,
+            "mean_tokens": round(float(self.columns[f"{provider}_estimated_tokens"][success].mean()), 2) if latency.size else None,
+            "mean_reference_similarity": _nanmean(self.columns[f"{provider}_reference_similarity"])
+        }
+        for p, value in zip(percentiles, np.percentile(latency, percentiles) if latency.size else [None] * len(percentiles)):
+            summary[f"p{p:g}_latency_ms"] = round(float(value), 2) if value is not None else None
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": len(self),
+            "wins": self.win_counts(),
+            "mean_pairwise_similarity": _nanmean(self.columns["pairwise_similarity"]),
+            "providers": {provider: self.provider_summary(provider) for provider in PROVIDERS}
+        }
+
+    def summary_by_run(self) -> Dict[str, Dict[str, Any]]:
+        return {run: self.filter(run=run).summary() for run in self.runs}
+
+
+class ComparisonStore:
+    """Directory of comparison runs"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.AI_COMPARISON_STORE_DIR
+        os.makedirs(self.path, exist_ok=True)
+
+    def writer(self, run_id: Optional[str] = None, chunk_size: int = 1000) -> ComparisonRunWriter:
+        """Writer for a run (default: a new timestamped run id); an existing run is appended to"""
+        run_id = run_id or datetime.now().strftime("run-%Y%m%d-%H%M%S-%f")
+        if os.sep in run_id or run_id.startswith("."):
+            raise ValueError(f"Invalid run id: {run_id}")
+        return ComparisonRunWriter(os.path.join(self.path, run_id), chunk_size=chunk_size)
+
+    def runs(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.path)
+            if os.path.isfile(os.path.join(self.path, name, "strings.jsonl"))
+        )
+
+    def load(self, runs: Optional[List[str]] = None) -> ComparisonTable:
+        """Load the numeric columns of the given runs (default: all); strings load on demand"""
+        runs = self.runs() if runs is None else list(runs)
+        parts: List[Tuple[int, Dict[str, np.ndarray]]] = []
+        for run_index, run in enumerate(runs):
+            run_dir = os.path.join(self.path, run)
+            for name in sorted(os.listdir(run_dir)):
+                if _CHUNK_PATTERN.match(name):
+                    with np.load(os.path.join(run_dir, name)) as chunk:
+                        parts.append((run_index, {column: chunk[column] for column in chunk.files}))
+
+        dtypes = _column_dtypes()
+        columns = {
+            name: np.concatenate([
+                part[name] if name in part else _missing_column(dtype, len(part["index"])) for _, part in parts
+            ]) if parts else np.array([], dtype=dtype)
+            for name, dtype in dtypes.items()
+        }
+        columns["run"] = (
+            np.concatenate([np.full(len(part["index"]), run_index, dtype=np.int32) for run_index, part in parts])
+            if parts else np.array([], dtype=np.int32)
+        )
+        run_dirs = {run: os.path.join(self.path, run) for run in runs}
+        logger.info(f"Loaded {len(columns['index'])} comparisons from {len(runs)} runs")
+        return ComparisonTable(columns, runs, run_dirs)
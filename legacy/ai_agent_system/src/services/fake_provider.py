@@ -0,0 +1,504 @@
+# ai_agent_system/src/services/fake_provider.py
+"""
+Fake LLM Provider
+Local HTTP stand-in for the Upstage and OpenAI APIs so routing, fallback,
+hedging and rate limiting can be exercised and benchmarked without paid calls.
+
+Endpoints:
+    POST /v1/model/{model}/generate   Upstage shape ({"choices": [{"text": ...}]})
+    POST /v1/chat/completions         OpenAI chat-completions shape
+    POST /v1/files, GET /v1/files/{id}/content, POST /v1/batches, GET /v1/batches/{id}
+                                      OpenAI Batch API for /v1/chat/completions (in memory)
+    GET/HEAD /                        Health check (used by connection warm-up)
+Both generation endpoints stream server-sent events when the body has "stream": true.
+
+Latency is time to first token drawn from a distribution, followed by output
+at a fixed token throughput. 429s and 5xx errors can be injected at random or
+by a server-side requests-per-minute limit.
+
+Run standalone and point the router at it:
+    python -m ai_agent_system.src.services.fake_provider --port 8765 --latency-ms 300
+    FAKE_PROVIDER_URL=http://127.0.0.1:8765 AI_PRIMARY_PROVIDER=fake ...
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+from aiohttp import web
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.utils.token_counter import count_tokens
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+
+# Vocabulary for generated completions; one word is roughly one token
+_WORDS = (
+    "the", "quick", "answer", "is", "that", "we", "should", "consider", "each", "option",
+    "carefully", "and", "then", "choose", "a", "plan", "which", "works", "for", "everyone"
+)
+
+
+@dataclass
+class FakeProviderConfig:
+    """Latency, throughput and failure behaviour of the fake provider"""
+    latency_ms: float = 200.0  # Median time to first token
+    latency_distribution: str = "lognormal"
+    latency_jitter: float = 0.5  # lognormal sigma, or +/- fraction of the median for uniform
+    tokens_per_second: float = 50.0  # 0 returns every token at once
+    output_tokens: int = 64  # Tokens per completion, capped by the request's max_tokens
+    rate_limit_rate: float = 0.0  # Share of requests answered with 429
+    server_error_rate: float = 0.0  # Share of requests answered with 500/502/503
+    requests_per_minute: int = 0  # Server-side limit; 0 disables
+    retry_after: float = 1.0  # Seconds advertised on injected 429s
+    batch_latency_ms: float = 1000.0  # Time a batch spends in_progress before completing
+    seed: Optional[int] = None
+
+    @classmethod
+    def from_settings(cls) -> "FakeProviderConfig":
+        return cls(
+            latency_ms=settings.FAKE_PROVIDER_LATENCY_MS,
+            latency_distribution=settings.FAKE_PROVIDER_LATENCY_DISTRIBUTION,
+            latency_jitter=settings.FAKE_PROVIDER_LATENCY_JITTER,
+            tokens_per_second=settings.FAKE_PROVIDER_TOKENS_PER_SECOND,
+            output_tokens=settings.FAKE_PROVIDER_OUTPUT_TOKENS,
+            rate_limit_rate=settings.FAKE_PROVIDER_RATE_LIMIT_RATE,
+            server_error_rate=settings.FAKE_PROVIDER_SERVER_ERROR_RATE,
+            requests_per_minute=settings.FAKE_PROVIDER_RPM
+        )
+
+
+class FakeProviderServer:
+    """
+    aiohttp server speaking the Upstage and OpenAI wire formats.
+    Use as an async context manager, or start()/stop() explicitly.
+    """
+
+    def __init__(self, config: Optional[FakeProviderConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeProviderConfig.from_settings()
+        if self.config.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{self.config.latency_distribution}'")
+        self.host = host
+        self.port = port
+        self._rng = random.Random(self.config.seed)
+        self._recent_requests = deque()
+        self._runner: Optional[web.AppRunner] = None
+        self._files: Dict[str, Dict[str, Any]] = {}
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._batch_tasks: List[asyncio.Task] = []
+
+        # --- Metrics ---
+        self.requests = 0
+        self.streams = 0
+        self.rate_limited = 0
+        self.server_errors = 0
+        self.completion_tokens = 0
+        self.batches = 0
+
+    @property
+    def url(self) -> str:
+        """Origin to use as FAKE_PROVIDER_URL"""
+        return f"http://{self.host}:{self.port}"
+
+    def _build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/", self._handle_health)
+        app.router.add_post("/v1/model/{model}/generate", self._handle_upstage)
+        app.router.add_post("/v1/chat/completions", self._handle_openai)
+        app.router.add_post("/v1/files", self._handle_file_upload)
+        app.router.add_get("/v1/files/{file_id}/content", self._handle_file_content)
+        app.router.add_post("/v1/batches", self._handle_batch_create)
+        app.router.add_get("/v1/batches/{batch_id}", self._handle_batch_retrieve)
+        return app
+
+    async def start(self) -> str:
+        """Start listening; with port 0 a free port is picked. Returns the server URL."""
+        self._runner = web.AppRunner(self._build_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Fake provider listening on {self.url}")
+        return self.url
+
+    async def stop(self):
+        for task in self._batch_tasks:
+            task.cancel()
+        self._batch_tasks.clear()
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+            logger.info(f"Fake provider stopped: {self.get_stats()}")
+
+    async def __aenter__(self) -> "FakeProviderServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    # --- Behaviour ---
+
+    def sample_latency(self) -> float:
+        """Time to first token in seconds"""
+        median = max(0.0, self.config.latency_ms) / 1000
+        distribution = self.config.latency_distribution
+        if distribution == "fixed" or median == 0:
+            return median
+        if distribution == "uniform":
+            spread = median * self.config.latency_jitter
+            return max(0.0, self._rng.uniform(median - spread, median + spread))
+        if distribution == "exponential":
+            return self._rng.expovariate(1 / median)
+        return median * self._rng.lognormvariate(0, self.config.latency_jitter)
+
+    def _completion(self, prompt: str, max_tokens: int) -> List[str]:
+        """Deterministic per prompt, so cached and uncached answers can be compared"""
+        count = max(1, min(self.config.output_tokens, max_tokens))
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+        return [("" if i == 0 else " ") + rng.choice(_WORDS) for i in range(count)]
+
+    def _token_delay(self) -> float:
+        return 1 / self.config.tokens_per_second if self.config.tokens_per_second > 0 else 0.0
+
+    def _inject_fault(self) -> Optional[web.Response]:
+        """An error response to send instead of a completion, if any"""
+        now = time.monotonic()
+        if self.config.requests_per_minute > 0:
+            while self._recent_requests and self._recent_requests[0] <= now - 60:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.config.requests_per_minute:
+                reset = self._recent_requests[0] + 60 - now
+                return self._rate_limit_response(reset)
+            self._recent_requests.append(now)
+
+        if self._rng.random() < self.config.rate_limit_rate:
+            return self._rate_limit_response(self.config.retry_after)
+        if self._rng.random() < self.config.server_error_rate:
+            self.server_errors += 1
+            status = self._rng.choice((500, 502, 503))
+            return web.json_response(
+                {"error": {"message": "Injected server error", "type": "server_error"}}, status=status
+            )
+        return None
+
+    def _rate_limit_response(self, retry_after: float) -> web.Response:
+        self.rate_limited += 1
+        return web.json_response(
+            {"error": {"message": "Rate limit reached (fake provider)", "type": "rate_limit_error"}},
+            status=429,
+            headers={
+                "retry-after": f"{retry_after:.3f}",
+                "x-ratelimit-remaining-requests": "0",
+                "x-ratelimit-reset-requests": f"{retry_after:.3f}s"
+            }
+        )
+
+    def _rate_limit_headers(self) -> Dict[str, str]:
+        if self.config.requests_per_minute <= 0:
+            return {}
+        remaining = max(0, self.config.requests_per_minute - len(self._recent_requests))
+        return {"x-ratelimit-limit-requests": str(self.config.requests_per_minute),
+                "x-ratelimit-remaining-requests": str(remaining)}
+
+    # --- Handlers ---
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    async def _read_request(self, request: web.Request) -> Optional[Dict[str, Any]]:
+        try:
+            body = await request.json()
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return None
+        return body if isinstance(body, dict) else None
+
+    async def _handle_upstage(self, request: web.Request) -> web.StreamResponse:
+        body = await self._read_request(request)
+        if body is None:
+            return web.json_response({"error": {"message": "Invalid JSON body"}}, status=400)
+        return await self._respond(
+            request,
+            model=request.match_info["model"],
+            prompt=str(body.get("prompt", "")),
+            max_tokens=int(body.get("max_tokens") or 500),
+            stream=bool(body.get("stream")),
+            api_format="upstage"
+        )
+
+    async def _handle_openai(self, request: web.Request) -> web.StreamResponse:
+        body = await self._read_request(request)
+        if body is None:
+            return web.json_response({"error": {"message": "Invalid JSON body"}}, status=400)
+        prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages") or [])
+        return await self._respond(
+            request,
+            model=str(body.get("model", "fake-model")),
+            prompt=prompt,
+            max_tokens=int(body.get("max_tokens") or body.get("max_completion_tokens") or 500),
+            stream=bool(body.get("stream")),
+            api_format="openai"
+        )
+
+    async def _respond(
+        self,
+        request: web.Request,
+        model: str,
+        prompt: str,
+        max_tokens: int,
+        stream: bool,
+        api_format: str
+    ) -> web.StreamResponse:
+        self.requests += 1
+        fault = self._inject_fault()
+        if fault is not None:
+            return fault
+
+        tokens = self._completion(prompt, max_tokens)
+        usage = {
+            "prompt_tokens": count_tokens(prompt, model),
+            "completion_tokens": len(tokens),
+            "total_tokens": count_tokens(prompt, model) + len(tokens)
+        }
+        self.completion_tokens += len(tokens)
+
+        if stream:
+            self.streams += 1
+            return await self._stream(request, model, tokens, usage, api_format)
+
+        await asyncio.sleep(self.sample_latency() + self._token_delay() * len(tokens))
+        text = "".join(tokens)
+        if api_format == "openai":
+            payload = {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": text},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            }
+        else:
+            payload = {"choices": [{"text": text}], "usage": usage}
+        return web.json_response(payload, headers=self._rate_limit_headers())
+
+    async def _stream(
+        self,
+        request: web.Request,
+        model: str,
+        tokens: List[str],
+        usage: Dict[str, int],
+        api_format: str
+    ) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", **self._rate_limit_headers()})
+        await response.prepare(request)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+
+        def _openai_chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None, **extra) -> Dict[str, Any]:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}] if delta is not None else [],
+                **extra
+            }
+
+        async def _send(chunk: Any):
+            data = chunk if isinstance(chunk, str) else json.dumps(chunk)
+            await response.write(f"data: {data}\n\n".encode("utf-8"))
+
+        await asyncio.sleep(self.sample_latency())
+        delay = self._token_delay()
+        for index, token in enumerate(tokens):
+            if index and delay:
+                await asyncio.sleep(delay)
+            if api_format == "openai":
+                await _send(_openai_chunk({"role": "assistant", "content": token} if index == 0 else {"content": token}))
+            else:
+                await _send({"choices": [{"text": token}]})
+
+        if api_format == "openai":
+            await _send(_openai_chunk({}, finish_reason="stop"))
+            await _send(_openai_chunk(None, usage=usage))
+        else:
+            await _send({"usage": usage})
+        await _send("[DONE]")
+        await response.write_eof()
+        return response
+
+    # --- Batch API ---
+
+    def _store_file(self, content: bytes, filename: str, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-{uuid.uuid4().hex}"
+        self._files[file_id] = {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(content),
+            "created_at": int(time.time()),
+            "filename": filename,
+            "purpose": purpose,
+            "status": "processed",
+            "content": content
+        }
+        return self._files[file_id]
+
+    @staticmethod
+    def _file_object(file: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: value for key, value in file.items() if key != "content"}
+
+    async def _handle_file_upload(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload = form.get("file")
+        if upload is None or not hasattr(upload, "file"):
+            return web.json_response({"error": {"message": "Missing file"}}, status=400)
+        file = self._store_file(upload.file.read(), upload.filename or "upload.jsonl", str(form.get("purpose", "batch")))
+        return web.json_response(self._file_object(file))
+
+    async def _handle_file_content(self, request: web.Request) -> web.Response:
+        file = self._files.get(request.match_info["file_id"])
+        if file is None:
+            return web.json_response({"error": {"message": "No such file"}}, status=404)
+        return web.Response(body=file["content"], content_type="application/octet-stream")
+
+    async def _handle_batch_create(self, request: web.Request) -> web.Response:
+        body = await self._read_request(request)
+        if body is None or body.get("input_file_id") not in self._files:
+            return web.json_response({"error": {"message": "Unknown input_file_id"}}, status=400)
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self._batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body.get("endpoint", "/v1/chat/completions"),
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "validating",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "metadata": body.get("metadata"),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0}
+        }
+        self.batches += 1
+        self._batch_tasks.append(asyncio.create_task(self._run_batch(batch_id)))
+        return web.json_response(self._batches[batch_id])
+
+    async def _handle_batch_retrieve(self, request: web.Request) -> web.Response:
+        batch = self._batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"error": {"message": "No such batch"}}, status=404)
+        return web.json_response(batch)
+
+    async def _run_batch(self, batch_id: str):
+        """Answer every line of the input file, then publish output and error files"""
+        batch = self._batches[batch_id]
+        batch["status"] = "in_progress"
+        await asyncio.sleep(max(0.0, self.config.batch_latency_ms) / 1000)
+
+        outputs, errors = [], []
+        for line in self._files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            body = item.get("body") or {}
+            model = str(body.get("model", "fake-model"))
+            result = {"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": item.get("custom_id"), "error": None}
+            if self._rng.random() < self.config.server_error_rate:
+                self.server_errors += 1
+                result["response"] = {"status_code": 500, "body": {"error": {"message": "Injected server error"}}}
+                errors.append(result)
+                continue
+            prompt = "\n".join(str(message.get("content", "")) for message in body.get("messages") or [])
+            tokens = self._completion(prompt, int(body.get("max_tokens") or 500))
+            self.completion_tokens += len(tokens)
+            result["response"] = {"status_code": 200, "body": {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {
+                    "prompt_tokens": count_tokens(prompt, model),
+                    "completion_tokens": len(tokens),
+                    "total_tokens": count_tokens(prompt, model) + len(tokens)
+                }
+            }}
+            outputs.append(result)
+
+        def _jsonl(items: List[Dict[str, Any]]) -> bytes:
+            return "".join(json.dumps(item) + "\n" for item in items).encode("utf-8")
+
+        if outputs:
+            batch["output_file_id"] = self._store_file(_jsonl(outputs), f"{batch_id}_output.jsonl", "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = self._store_file(_jsonl(errors), f"{batch_id}_error.jsonl", "batch_output")["id"]
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "streams": self.streams,
+            "rate_limited": self.rate_limited,
+            "server_errors": self.server_errors,
+            "completion_tokens": self.completion_tokens,
+            "batches": self.batches
+        }
+
+
+async def main():
+    """Run the fake provider until interrupted"""
+    defaults = FakeProviderConfig.from_settings()
+    parser = argparse.ArgumentParser(description="Local fake Upstage/OpenAI provider")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--distribution", choices=LATENCY_DISTRIBUTIONS, default=defaults.latency_distribution)
+    parser.add_argument("--jitter", type=float, default=defaults.latency_jitter)
+    parser.add_argument("--tokens-per-second", type=float, default=defaults.tokens_per_second)
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--server-error-rate", type=float, default=defaults.server_error_rate)
+    parser.add_argument("--rpm", type=int, default=defaults.requests_per_minute)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    config = FakeProviderConfig(
+        latency_ms=args.latency_ms,
+        latency_distribution=args.distribution,
+        latency_jitter=args.jitter,
+        tokens_per_second=args.tokens_per_second,
+        output_tokens=args.output_tokens,
+        rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate,
+        requests_per_minute=args.rpm,
+        seed=args.seed
+    )
+    async with FakeProviderServer(config, host=args.host, port=args.port) as server:
+        print(f"Fake provider listening on {server.url} (Ctrl+C to stop)")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
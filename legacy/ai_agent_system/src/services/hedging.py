@@ -0,0 +1,123 @@
+# ai_agent_system/src/services/hedging.py
+"""
+Request Hedging
+Decides when a slow primary call should be duplicated on the secondary provider.
+
+The hedge fires after a fixed delay (AI_HEDGE_DELAY_MS) or, when unset, after the
+primary's live p95 latency. Calls cut off before finishing (hedged-and-cancelled,
+timed out) count at their elapsed time, a lower bound on their latency, so the
+p95 doesn't drift down to the calls fast enough to finish. A token budget caps hedges to a fraction of requests
+so a slow provider can't double our spend.
+"""
+import logging
+from collections import deque
+from typing import Optional, Dict, Any, Tuple
+
+from ai_agent_system.src.config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Hedge credits bank at most this many hedges, so an idle period can't fund a burst
+_MAX_HEDGE_CREDITS = 10.0
+
+
+class LatencyWindow:
+    """Rolling window of recent latencies with percentile lookup"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+
+    def record(self, latency_ms: float):
+        self._samples.append(latency_ms)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(q * len(ordered)))
+        return ordered[index]
+
+
+class HedgePolicy:
+    """Hedge delay per (provider, model) and the global hedge budget"""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        delay_ms: Optional[float] = None,
+        percentile: Optional[float] = None,
+        budget_ratio: Optional[float] = None,
+        min_samples: Optional[int] = None
+    ):
+        self.enabled = settings.AI_HEDGE_ENABLED if enabled is None else enabled
+        self.delay_ms = settings.AI_HEDGE_DELAY_MS if delay_ms is None else delay_ms
+        self.percentile = percentile or settings.AI_HEDGE_PERCENTILE
+        self.budget_ratio = settings.AI_HEDGE_BUDGET_RATIO if budget_ratio is None else budget_ratio
+        self.min_samples = settings.AI_HEDGE_MIN_SAMPLES if min_samples is None else min_samples
+
+        self._latencies: Dict[Tuple[str, str], LatencyWindow] = {}
+        self._credits = 0.0
+
+        # --- Metrics ---
+        self.requests = 0
+        self.hedges_fired = 0
+        self.hedges_won = 0
+        self.budget_exhausted = 0
+        self.censored_samples = 0
+
+    def record_latency(self, provider: str, model: str, latency_ms: float):
+        """Record a successful call's latency"""
+        window = self._latencies.get((provider, model))
+        if window is None:
+            window = self._latencies[(provider, model)] = LatencyWindow()
+        window.record(latency_ms)
+
+    def record_censored(self, provider: str, model: str, elapsed_ms: float):
+        """Record a call cut off after elapsed_ms (cancelled or timed out): its latency was at least that"""
+        self.censored_samples += 1
+        self.record_latency(provider, model, elapsed_ms)
+
+    def hedge_delay(self, provider: str, model: str) -> Optional[float]:
+        """
+        Seconds to wait on the primary before hedging, or None to not hedge.
+        Each call counts as one hedgeable request and earns budget.
+        """
+        if not self.enabled:
+            return None
+        self.requests += 1
+        self._credits = min(_MAX_HEDGE_CREDITS, self._credits + self.budget_ratio)
+
+        if self.delay_ms > 0:
+            return self.delay_ms / 1000
+        window = self._latencies.get((provider, model))
+        if window is None or len(window) < self.min_samples:
+            return None
+        return window.percentile(self.percentile) / 1000
+
+    def try_spend(self) -> bool:
+        """Take one hedge from the budget"""
+        if self._credits < 1.0:
+            self.budget_exhausted += 1
+            return False
+        self._credits -= 1.0
+        self.hedges_fired += 1
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "requests": self.requests,
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "budget_exhausted": self.budget_exhausted,
+            "censored_samples": self.censored_samples,
+            "hedge_rate": round(self.hedges_fired / self.requests, 4) if self.requests else 0.0,
+            "p95_ms": {
+                f"{provider}/{model}": window.percentile(0.95)
+                for (provider, model), window in self._latencies.items()
+            }
+        }
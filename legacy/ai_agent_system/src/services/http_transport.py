@@ -0,0 +1,246 @@
+# ai_agent_system/src/services/http_transport.py
+"""
+Shared HTTP Transport
+Process-wide pooled httpx client (HTTP/2, keep-alive) reused by every provider client,
+so bulk runs pay the TCP+TLS handshake once per connection instead of once per request.
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, List, Dict, Any, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+from ai_agent_system.src.config.settings import settings
+
+# HTTP/2 needs the optional 'h2' package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body wrapper that frees the pool slot once the body is closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, on_close: Callable[[], None]):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+
+class _MeteredTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the real connection pool and meters every request going through it.
+    Requests beyond max_connections queue here, which is where wait time is measured.
+    """
+
+    def __init__(self, inner: httpx.AsyncBaseTransport, pool: "HTTPTransport"):
+        self._inner = inner
+        self._pool = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self._pool._acquire_slot()
+        try:
+            response = await self._inner.handle_async_request(request)
+        except BaseException:
+            self._pool._release_slot()
+            raise
+
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            stream=_ReleasingStream(response.stream, self._pool._release_slot),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self):
+        await self._inner.aclose()
+
+
+class HTTPTransport:
+    """
+    Owns the shared httpx.AsyncClient and its pool metrics.
+    Use get_http_transport() instead of constructing this directly.
+    """
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        timeout: Optional[float] = None,
+        max_streams_per_connection: Optional[int] = None
+    ):
+        self.max_connections = max_connections or settings.HTTP_MAX_CONNECTIONS
+        self.max_keepalive_connections = max_keepalive_connections or settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        self.keepalive_expiry = keepalive_expiry if keepalive_expiry is not None else settings.HTTP_KEEPALIVE_EXPIRY
+        requested_http2 = settings.HTTP2_ENABLED if http2 is None else http2
+        if requested_http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but 'h2' is not installed; falling back to HTTP/1.1")
+        self.http2 = requested_http2 and HTTP2_AVAILABLE
+
+        limits = httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry
+        )
+        inner = httpx.AsyncHTTPTransport(http2=self.http2, limits=limits)
+        self.client = httpx.AsyncClient(
+            transport=_MeteredTransport(inner, self),
+            timeout=timeout if timeout is not None else settings.HTTP_TIMEOUT
+        )
+
+        # Slot accounting mirrors the pool's real capacity so saturation is observable: one request
+        # per connection on HTTP/1.1, many multiplexed streams per connection on HTTP/2
+        streams = max_streams_per_connection or settings.HTTP2_MAX_STREAMS_PER_CONNECTION
+        self.max_in_flight = self.max_connections * (streams if self.http2 else 1)
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # --- Pool Metrics ---
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.waiting = 0
+        self.total_requests = 0
+        self.waited_requests = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        # --- End Pool Metrics ---
+
+    @property
+    def is_closed(self) -> bool:
+        return self.client.is_closed
+
+    def _bind_loop(self) -> bool:
+        """Returns False when the transport was created under a different event loop"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return True
+        if self._loop is None:
+            self._loop = loop
+        return self._loop is loop
+
+    async def _acquire_slot(self):
+        self._bind_loop()
+        self.total_requests += 1
+        if self._slots.locked():
+            self.waited_requests += 1
+
+        self.waiting += 1
+        start_time = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        wait_ms = (time.perf_counter() - start_time) * 1000
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release_slot(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    async def warmup(self, urls: List[str], connections_per_origin: int = 1) -> Dict[str, bool]:
+        """
+        Pre-resolve DNS and open pooled TLS connections to each origin.
+        Any HTTP status counts as success; only connection failures are reported.
+
+        Args:
+            urls: URLs whose origins should be warmed up
+            connections_per_origin: Number of concurrent connections to open per origin
+
+        Returns:
+            Dict mapping origin to whether a connection could be established
+        """
+        origins = []
+        for url in urls:
+            parts = urlsplit(url)
+            origin = f"{parts.scheme}://{parts.netloc}"
+            if parts.netloc and origin not in origins:
+                origins.append(origin)
+
+        async def _open(origin: str) -> bool:
+            try:
+                await self.client.head(origin, timeout=10.0)
+                return True
+            except httpx.HTTPError as e:
+                logger.warning(f"Warm-up of {origin} failed: {e}")
+                return False
+
+        results = {}
+        for origin in origins:
+            attempts = await asyncio.gather(*[_open(origin) for _ in range(max(1, connections_per_origin))])
+            results[origin] = any(attempts)
+
+        logger.info(f"HTTP transport warm-up: {results}")
+        return results
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get pool saturation and wait-time metrics"""
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "waiting": self.waiting,
+            "saturation": round(self.in_flight / self.max_in_flight, 3),
+            "peak_saturation": round(self.peak_in_flight / self.max_in_flight, 3),
+            "total_requests": self.total_requests,
+            "waited_requests": self.waited_requests,
+            "avg_wait_ms": round(self.total_wait_ms / self.total_requests, 3) if self.total_requests else 0.0,
+            "max_wait_ms": round(self.max_wait_ms, 3)
+        }
+
+    async def aclose(self):
+        """Close all pooled connections"""
+        await self.client.aclose()
+        logger.info(f"HTTP transport closed: {self.get_metrics()}")
+
+
+# Singleton instance
+_transport_instance: Optional[HTTPTransport] = None
+
+
+def get_http_transport() -> HTTPTransport:
+    """Get or create the process-wide HTTP transport"""
+    global _transport_instance
+    if (
+        _transport_instance is None
+        or _transport_instance.is_closed
+        or not _transport_instance._bind_loop()
+    ):
+        _transport_instance = HTTPTransport()
+    return _transport_instance
+
+
+async def close_http_transport():
+    """Close the process-wide HTTP transport if it was created"""
+    global _transport_instance
+    if _transport_instance is not None and not _transport_instance.is_closed:
+        await _transport_instance.aclose()
+    _transport_instance = None
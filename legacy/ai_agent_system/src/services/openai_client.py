@@ -1,8 +1,17 @@
 # ai_agent_system/src/services/openai_client.py
 import os
-from typing import Optional, List, Dict, Any
-from openai import AsyncOpenAI
+import time
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
+from openai import AsyncOpenAI, APIStatusError, NOT_GIVEN
 from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.utils.token_counter import count_tokens, count_message_tokens
+from ai_agent_system.src.utils.concurrency import bounded_map
+from ai_agent_system.src.services.provider_errors import ProviderError, provider_error_from_response, parse_retry_after
+from ai_agent_system.src.services.api_key_pool import (
+    APIKeyPool, PooledKey, parse_api_keys, outcome_for_status, KEY_SUCCESS, KEY_ERROR, KEY_CANCELLED
+)
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+from ai_agent_system.src.services.http_transport import HTTPTransport, get_http_transport, close_http_transport
 import asyncio
 import logging
 
@@ -13,20 +22,81 @@ logger = logging.getLogger(__name__)
 class OpenAIClient:
     """OpenAI API client with interface compatible with UpstageClient (US5)"""
 
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key if api_key else settings.OPENAI_API_KEY
-        if not self.api_key:
+    def __init__(
+        self,
+        api_key: str = None,
+        api_keys: Optional[List[Any]] = None,
+        base_url: Optional[str] = None,
+        provider_name: str = "openai",
+        pricing: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        # One explicit key, an explicit pool, or OPENAI_API_KEYS / OPENAI_API_KEY from settings
+        if api_key:
+            keys = [api_key]
+        elif api_keys:
+            keys = api_keys
+        else:
+            keys = parse_api_keys(settings.OPENAI_API_KEYS) or [settings.OPENAI_API_KEY]
+        if not any(keys):
             raise ValueError("OpenAI API key not provided or not found in settings.")
+        self.key_pool = APIKeyPool(keys)
+        self.api_key = self.key_pool.primary.key
 
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        self.provider_name = provider_name
+        self._base_url = base_url or settings.OPENAI_BASE_URL or None
+        self._clients: Dict[str, AsyncOpenAI] = {}
+        self._clients_transport: Optional[HTTPTransport] = None
+        self.base_url = str(self.client.base_url)
+        self.rate_limiter = get_rate_limiter()
 
         # Cost Management and Usage Monitoring
         self.api_call_count = 0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        # GPT-4o pricing (as of 2024)
-        self.pricing_per_thousand_input_tokens = 0.005
-        self.pricing_per_thousand_output_tokens = 0.015
+        self.usage_by_model: Dict[str, Dict[str, int]] = {}
+        # model -> ($/1K input, $/1K output), from the provider registry (see ProviderSpec.build_client)
+        self.pricing: Dict[str, Tuple[float, float]] = dict(pricing or {})
+        # Streaming: time-to-first-token accounting
+        self.stream_count = 0
+        self.total_time_to_first_token_ms = 0.0
+
+    def _count_usage(self, model_name: str, input_tokens: int = 0, output_tokens: int = 0):
+        self.total_input_tokens += input_tokens
+        self.total_output_tokens += output_tokens
+        usage = self.usage_by_model.setdefault(model_name, {"input_tokens": 0, "output_tokens": 0})
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+
+    def _estimated_costs(self) -> Tuple[float, float]:
+        """$ (input, output) so far at the per-model pricing; models without pricing count as 0"""
+        input_cost = output_cost = 0.0
+        for model, usage in self.usage_by_model.items():
+            price = self.pricing.get(model)
+            if price:
+                input_cost += usage["input_tokens"] / 1000 * price[0]
+                output_cost += usage["output_tokens"] / 1000 * price[1]
+        return input_cost, output_cost
+
+    @property
+    def transport(self) -> HTTPTransport:
+        return get_http_transport()
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        """SDK client for the primary key"""
+        return self._client_for(self.key_pool.primary)
+
+    def _client_for(self, pooled_key: PooledKey) -> AsyncOpenAI:
+        # Reuse the shared pooled transport instead of the SDK's private connection pool; one
+        # lightweight SDK client per key, rebuilt when the shared transport has been replaced
+        transport = self.transport
+        if transport is not self._clients_transport:
+            self._clients = {
+                key.key: AsyncOpenAI(api_key=key.key, base_url=self._base_url, http_client=transport.client)
+                for key in self.key_pool.keys
+            }
+            self._clients_transport = transport
+        return self._clients[pooled_key.key]
 
     async def text_generation(
         self,
@@ -35,19 +105,31 @@ class OpenAIClient:
         temperature: float = 0.7,
         max_tokens: int = 500,
         top_p: float = 1.0,
-        stop_sequences: Optional[List[str]] = None
+        stop_sequences: Optional[List[str]] = None,
+        raise_on_error: bool = False,
+        timeout: Optional[float] = None
     ) -> Optional[str]:
         """
         Generate text using OpenAI API.
         Interface compatible with UpstageClient.text_generation()
         """
         self.api_call_count += 1
-        input_token_estimate = len(prompt.split())
-        self.total_input_tokens += input_token_estimate
+        input_token_estimate = count_tokens(prompt, model_name)
+        self._count_usage(model_name, input_tokens=input_token_estimate)
         logger.info(f"OpenAI API Call {self.api_call_count}: Model='{model_name}', Input Tokens (est)={input_token_estimate}")
 
+        # Client-side pacing per key: reserve the worst case, return the unused part afterwards
+        pooled_key = self.key_pool.acquire()
+        key_outcome, retry_after = KEY_ERROR, None
+        rate_limit = self.rate_limiter.get(self.provider_name, model_name, pooled_key.key)
+        reserved_tokens = input_token_estimate + max_tokens
+
+        output_token_estimate = 0
+        acquired = False
         try:
-            response = await self.client.chat.completions.create(
+            await rate_limit.acquire(reserved_tokens)
+            acquired = True
+            raw_response = await self._client_for(pooled_key).chat.completions.with_raw_response.create(
                 model=model_name,
                 messages=[
                     {"role": "user", "content": prompt}
@@ -55,32 +137,165 @@ class OpenAIClient:
                 temperature=temperature,
                 max_tokens=max_tokens,
                 top_p=top_p,
-                stop=stop_sequences if stop_sequences else None
+                stop=stop_sequences if stop_sequences else None,
+                timeout=timeout if timeout is not None else NOT_GIVEN
             )
+            rate_limit.update_from_headers(raw_response.headers)
+            response = raw_response.parse()
 
             generated_text = None
-            output_token_estimate = 0
 
             if response.choices and len(response.choices) > 0:
                 generated_text = response.choices[0].message.content
 
                 # Use actual token count from response
                 if response.usage:
-                    self.total_input_tokens -= input_token_estimate  # Remove estimate
-                    self.total_input_tokens += response.usage.prompt_tokens
+                    self._count_usage(model_name, input_tokens=response.usage.prompt_tokens - input_token_estimate)  # Replace the estimate
                     output_token_estimate = response.usage.completion_tokens
                 else:
-                    output_token_estimate = len(generated_text.split()) if generated_text else 0
+                    output_token_estimate = count_tokens(generated_text, model_name)
 
             if generated_text:
-                self.total_output_tokens += output_token_estimate
+                self._count_usage(model_name, output_tokens=output_token_estimate)
                 logger.info(f"OpenAI API Success: Output Tokens={output_token_estimate}")
+            key_outcome = KEY_SUCCESS
 
             return generated_text
 
+        except asyncio.CancelledError:
+            key_outcome = KEY_CANCELLED
+            raise
+        except APIStatusError as e:
+            logger.error(f"Error generating text with OpenAI API: {e}")
+            key_outcome, retry_after = outcome_for_status(e.status_code), parse_retry_after(e.response.headers)
+            if e.status_code == 429:
+                rate_limit.on_rate_limited(e.response.headers)
+            if raise_on_error:
+                raise provider_error_from_response(self.provider_name, e.response) from e
+            return None
         except Exception as e:
             logger.error(f"Error generating text with OpenAI API: {e}")
+            if raise_on_error:
+                raise ProviderError(str(e), self.provider_name) from e
             return None
+        finally:
+            self.key_pool.release(pooled_key, key_outcome, retry_after)
+            if acquired:  # Failures and cancellations give back the unused reservation too
+                rate_limit.reconcile(reserved_tokens, input_token_estimate + output_token_estimate)
+
+    async def text_generation_many(
+        self,
+        prompts: List[str],
+        concurrency: int = 8,
+        ordered: bool = False,
+        **generation_kwargs
+    ) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Generate text for many prompts with a bounded in-flight window.
+        Interface compatible with UpstageClient.text_generation_many()
+
+        Yields:
+            (prompt index, generated text or None) tuples
+        """
+        async def _generate(prompt: str) -> Optional[str]:
+            return await self.text_generation(prompt=prompt, raise_on_error=True, **generation_kwargs)
+
+        async for index, text in bounded_map(prompts, _generate, concurrency=concurrency, ordered=ordered):
+            yield index, text
+
+    async def text_generation_stream(
+        self,
+        prompt: str,
+        model_name: str = "gpt-4o-mini",
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        top_p: float = 1.0,
+        stop_sequences: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text, yielding deltas as they arrive.
+        Interface compatible with UpstageClient.text_generation_stream();
+        errors are raised to the consumer.
+        """
+        self.api_call_count += 1
+        input_token_estimate = count_tokens(prompt, model_name)
+        self._count_usage(model_name, input_tokens=input_token_estimate)
+        logger.info(f"OpenAI API Stream {self.api_call_count}: Model='{model_name}', Input Tokens (est)={input_token_estimate}")
+
+        pooled_key = self.key_pool.acquire()
+        key_outcome, retry_after = KEY_ERROR, None
+        rate_limit = self.rate_limiter.get(self.provider_name, model_name, pooled_key.key)
+        reserved_tokens = input_token_estimate + max_tokens
+
+        start_time = time.perf_counter()
+        first_token_received = False
+        generated_parts: List[str] = []
+        usage = None
+
+        acquired = False
+        stream = None
+        try:
+            await rate_limit.acquire(reserved_tokens)
+            acquired = True
+            raw_response = await self._client_for(pooled_key).chat.completions.with_raw_response.create(
+                model=model_name,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                top_p=top_p,
+                stop=stop_sequences if stop_sequences else None,
+                stream=True,
+                stream_options={"include_usage": True}
+            )
+            rate_limit.update_from_headers(raw_response.headers)
+            key_outcome = KEY_SUCCESS
+            stream = raw_response.parse()
+
+            async for chunk in stream:
+                # The final chunk carries usage and no choices
+                if chunk.usage:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not first_token_received:
+                        first_token_received = True
+                        self.stream_count += 1
+                        self.total_time_to_first_token_ms += (time.perf_counter() - start_time) * 1000
+                    generated_parts.append(delta)
+                    yield delta
+
+        except asyncio.CancelledError:
+            key_outcome = KEY_CANCELLED
+            raise
+        except APIStatusError as e:
+            logger.error(f"Error streaming text with OpenAI API: {e}")
+            key_outcome, retry_after = outcome_for_status(e.status_code), parse_retry_after(e.response.headers)
+            if e.status_code == 429:
+                rate_limit.on_rate_limited(e.response.headers)
+            raise provider_error_from_response(self.provider_name, e.response) from e
+        except Exception as e:
+            logger.error(f"Error streaming text with OpenAI API: {e}")
+            raise
+        finally:
+            if stream is not None:
+                # Early exits (consumer aclose(), cancellation, deadlines) must still free the pooled slot
+                await stream.close()
+            self.key_pool.release(pooled_key, key_outcome, retry_after)
+            if usage:
+                self._count_usage(model_name, input_tokens=usage.prompt_tokens - input_token_estimate)  # Replace the estimate
+                output_tokens = usage.completion_tokens
+            else:
+                output_tokens = count_tokens("".join(generated_parts), model_name)
+            self._count_usage(model_name, output_tokens=output_tokens)
+            if acquired:  # Nothing to give back if the call never got through the rate limiter
+                rate_limit.reconcile(reserved_tokens, input_token_estimate + output_tokens)
+            if generated_parts:
+                logger.info(f"OpenAI API Stream Finished: Output Tokens={output_tokens}")
 
     async def chat_completion(
         self,
@@ -96,12 +311,21 @@ class OpenAIClient:
         Extended functionality beyond UpstageClient.
         """
         self.api_call_count += 1
-        input_token_estimate = sum(len(m.get("content", "").split()) for m in messages)
-        self.total_input_tokens += input_token_estimate
+        input_token_estimate = count_message_tokens(messages, model_name)
+        self._count_usage(model_name, input_tokens=input_token_estimate)
         logger.info(f"OpenAI Chat API Call {self.api_call_count}: Model='{model_name}', Messages={len(messages)}")
 
+        pooled_key = self.key_pool.acquire()
+        key_outcome, retry_after = KEY_ERROR, None
+        rate_limit = self.rate_limiter.get(self.provider_name, model_name, pooled_key.key)
+        reserved_tokens = input_token_estimate + max_tokens
+
+        output_tokens = 0
+        acquired = False
         try:
-            response = await self.client.chat.completions.create(
+            await rate_limit.acquire(reserved_tokens)
+            acquired = True
+            raw_response = await self._client_for(pooled_key).chat.completions.with_raw_response.create(
                 model=model_name,
                 messages=messages,
                 temperature=temperature,
@@ -109,33 +333,56 @@ class OpenAIClient:
                 top_p=top_p,
                 stop=stop_sequences if stop_sequences else None
             )
+            rate_limit.update_from_headers(raw_response.headers)
+            response = raw_response.parse()
 
             generated_text = None
             if response.choices and len(response.choices) > 0:
                 generated_text = response.choices[0].message.content
 
                 if response.usage:
-                    self.total_input_tokens -= input_token_estimate
-                    self.total_input_tokens += response.usage.prompt_tokens
-                    self.total_output_tokens += response.usage.completion_tokens
+                    self._count_usage(model_name, input_tokens=response.usage.prompt_tokens - input_token_estimate)  # Replace the estimate
+                    output_tokens = response.usage.completion_tokens
+                else:
+                    output_tokens = count_tokens(generated_text or "", model_name)
+                self._count_usage(model_name, output_tokens=output_tokens)
+            key_outcome = KEY_SUCCESS
 
             return generated_text
 
+        except asyncio.CancelledError:
+            key_outcome = KEY_CANCELLED
+            raise
+        except APIStatusError as e:
+            logger.error(f"Error in chat completion with OpenAI API: {e}")
+            key_outcome, retry_after = outcome_for_status(e.status_code), parse_retry_after(e.response.headers)
+            if e.status_code == 429:
+                rate_limit.on_rate_limited(e.response.headers)
+            return None
         except Exception as e:
             logger.error(f"Error in chat completion with OpenAI API: {e}")
             return None
+        finally:
+            self.key_pool.release(pooled_key, key_outcome, retry_after)
+            if acquired:
+                rate_limit.reconcile(reserved_tokens, input_token_estimate + output_tokens)
 
     def get_usage_stats(self) -> Dict[str, Any]:
         """Get current usage statistics"""
-        input_cost = self.total_input_tokens / 1000 * self.pricing_per_thousand_input_tokens
-        output_cost = self.total_output_tokens / 1000 * self.pricing_per_thousand_output_tokens
+        input_cost, output_cost = self._estimated_costs()
         return {
             "api_call_count": self.api_call_count,
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
+            "usage_by_model": {model: dict(usage) for model, usage in self.usage_by_model.items()},
             "estimated_input_cost": input_cost,
             "estimated_output_cost": output_cost,
-            "estimated_total_cost": input_cost + output_cost
+            "estimated_total_cost": input_cost + output_cost,
+            "unpriced_models": sorted(model for model in self.usage_by_model if model not in self.pricing),
+            "avg_time_to_first_token_ms": (
+                self.total_time_to_first_token_ms / self.stream_count if self.stream_count else None
+            ),
+            "api_keys": self.key_pool.get_stats()
         }
 
     async def close(self):
@@ -148,6 +395,7 @@ class OpenAIClient:
         logger.info(f"Estimated Input Cost: ${stats['estimated_input_cost']:.4f}")
         logger.info(f"Estimated Output Cost: ${stats['estimated_output_cost']:.4f}")
         logger.info(f"Total Estimated Cost: ${stats['estimated_total_cost']:.4f}")
+        logger.info(f"HTTP Pool: {self.transport.get_metrics()}")
 
 
 # Example usage
@@ -170,6 +418,7 @@ async def main():
         logger.error("Text generation failed.")
 
     await openai_client.close()
+    await close_http_transport()
 
 
 if __name__ == "__main__":
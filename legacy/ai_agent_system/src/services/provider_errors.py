@@ -0,0 +1,61 @@
+# ai_agent_system/src/services/provider_errors.py
+"""
+Provider Errors
+Typed errors raised by provider clients when called with raise_on_error=True,
+so callers can react to rate limiting instead of seeing a bare None.
+"""
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional, Mapping
+
+import httpx
+
+
+class ProviderError(Exception):
+    """A provider call failed"""
+
+    def __init__(self, message: str, provider: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.provider = provider
+        self.status_code = status_code
+
+
+class RateLimitError(ProviderError):
+    """The provider rejected the call with HTTP 429"""
+
+    def __init__(self, message: str, provider: str, retry_after: Optional[float] = None):
+        super().__init__(message, provider, status_code=429)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers: Mapping[str, str]) -> Optional[float]:
+    """
+    Parse Retry-After style headers into seconds.
+    Supports 'retry-after-ms', 'retry-after' as seconds, and 'retry-after' as an HTTP date.
+    """
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def provider_error_from_response(provider: str, response: httpx.Response) -> ProviderError:
+    """Build the matching ProviderError for an error HTTP response"""
+    message = f"{provider} returned HTTP {response.status_code}"
+    if response.status_code == 429:
+        return RateLimitError(message, provider, retry_after=parse_retry_after(response.headers))
+    return ProviderError(message, provider, status_code=response.status_code)
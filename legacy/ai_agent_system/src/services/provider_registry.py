@@ -0,0 +1,265 @@
+# ai_agent_system/src/services/provider_registry.py
+"""
+Provider Registry
+Declares every AI provider the router can use: how its client is built, its
+models and pricing, its rate limits and where it sits in the fallback chain.
+Built-ins are Upstage, OpenAI and the local fake server; further OpenAI- or
+Upstage-compatible endpoints (self-hosted, another region) come from
+AI_EXTRA_PROVIDERS or register_provider().
+"""
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, List, Tuple, Callable, Iterator
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.upstage_client import UpstageClient
+from ai_agent_system.src.services.openai_client import OpenAIClient
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+API_FORMATS = ("openai", "upstage")
+
+
+class AIProvider(str):
+    """
+    Provider name. The built-ins are constants on the class; any name in the
+    registry is a valid provider. Compares equal to the plain string. Construction
+    doesn't check the name: use ProviderRegistry.resolve() for names from callers or config.
+    """
+    __slots__ = ()
+
+    @property
+    def value(self) -> str:
+        return str(self)
+
+    def __repr__(self) -> str:
+        return f"AIProvider({str(self)!r})"
+
+
+AIProvider.UPSTAGE = AIProvider("upstage")
+AIProvider.OPENAI = AIProvider("openai")
+AIProvider.FAKE = AIProvider("fake")  # Local stand-in server (FAKE_PROVIDER_URL) for offline tests and benchmarks
+
+
+@dataclass
+class ProviderSpec:
+    """Everything the router needs to know about one provider"""
+    name: str
+    client_factory: Callable[[], Any]  # Returns a client, or None when the provider isn't configured
+    default_model: str
+    models: List[str] = field(default_factory=list)
+    pricing: Dict[str, Tuple[float, float]] = field(default_factory=dict)  # model -> ($/1K input, $/1K output)
+    requests_per_minute: Optional[int] = None  # None keeps the rate limiter's configured/default limits
+    tokens_per_minute: Optional[int] = None
+    fallback: bool = True  # Part of the default fallback chain
+
+    def build_client(self) -> Any:
+        """Client from client_factory, priced with this spec's pricing (None if not configured)"""
+        client = self.client_factory()
+        if client is not None and hasattr(client, "pricing"):
+            client.pricing = dict(self.pricing)
+        return client
+
+    def estimate_cost(self, model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+        """Estimated $ for one call, None when the model has no pricing"""
+        price = self.pricing.get(model)
+        if price is None:
+            return None
+        return input_tokens / 1000 * price[0] + output_tokens / 1000 * price[1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        rpm, tpm = get_rate_limiter().limits.get(
+            self.name, (settings.DEFAULT_RPM, settings.DEFAULT_TPM)
+        )
+        return {
+            "default_model": self.default_model,
+            "models": list(self.models),
+            "pricing": {model: list(price) for model, price in self.pricing.items()},
+            "rate_limits": {"requests_per_minute": rpm, "tokens_per_minute": tpm},
+            "fallback": self.fallback
+        }
+
+
+class ProviderRegistry:
+    """Ordered set of ProviderSpecs; registration order is the default fallback order"""
+
+    def __init__(self, specs: Optional[List[ProviderSpec]] = None):
+        self._specs: Dict[str, ProviderSpec] = {}
+        for spec in specs or []:
+            self.register(spec)
+
+    def register(self, spec: ProviderSpec, replace: bool = False) -> AIProvider:
+        if spec.name in self._specs and not replace:
+            raise ValueError(f"Provider already registered: {spec.name}")
+        self._specs[spec.name] = spec
+        if spec.requests_per_minute is not None and spec.tokens_per_minute is not None:
+            get_rate_limiter().set_limits(spec.name, spec.requests_per_minute, spec.tokens_per_minute)
+        return AIProvider(spec.name)
+
+    def unregister(self, name: str):
+        self._specs.pop(name, None)
+
+    def get(self, name: str) -> Optional[ProviderSpec]:
+        return self._specs.get(name)
+
+    def resolve(self, name: str) -> AIProvider:
+        """The registered provider called name (case-insensitive); ValueError if there is none"""
+        provider = AIProvider(str(name).strip().lower())
+        if provider not in self._specs:
+            raise ValueError(f"Unknown AI provider '{name}' (registered: {', '.join(self._specs)})")
+        return provider
+
+    def names(self) -> List[AIProvider]:
+        return [AIProvider(name) for name in self._specs]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
+
+    def __iter__(self) -> Iterator[ProviderSpec]:
+        return iter(list(self._specs.values()))
+
+    def fallback_chain(self, primary: Optional[str] = None) -> List[AIProvider]:
+        """
+        Providers to fall back to, in order, after primary: AI_FALLBACK_CHAIN if set,
+        otherwise every provider declared with fallback=True in registration order.
+        """
+        if settings.AI_FALLBACK_CHAIN:
+            order = [name.strip().lower() for name in settings.AI_FALLBACK_CHAIN.split(",") if name.strip()]
+        else:
+            order = [spec.name for spec in self._specs.values() if spec.fallback]
+        return [AIProvider(name) for name in order if name != primary and name in self._specs]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {name: spec.get_stats() for name, spec in self._specs.items()}
+
+
+# --- Built-in providers ---
+
+def _upstage_client():
+    if not (settings.UPSTAGE_API_KEY or settings.UPSTAGE_API_KEYS):
+        return None
+    return UpstageClient()
+
+
+def _openai_client():
+    if not (settings.OPENAI_API_KEY or settings.OPENAI_API_KEYS):
+        return None
+    return OpenAIClient()
+
+
+def _fake_client():
+    if not settings.FAKE_PROVIDER_URL:
+        return None
+    base_url = settings.FAKE_PROVIDER_URL.rstrip("/")
+    if settings.FAKE_PROVIDER_API_FORMAT == "openai":
+        return OpenAIClient(api_key="fake-key", base_url=f"{base_url}/v1", provider_name="fake")
+    return UpstageClient(api_key="fake-key", base_url=f"{base_url}/v1/model", provider_name="fake")
+
+
+def builtin_providers() -> List[ProviderSpec]:
+    return [
+        ProviderSpec(
+            name=AIProvider.UPSTAGE,
+            client_factory=_upstage_client,
+            default_model="solar-pro",
+            models=["solar-pro", "solar-mini"],
+            pricing={"solar-pro": (0.00025, 0.00025), "solar-mini": (0.00015, 0.00015)}
+        ),
+        ProviderSpec(
+            name=AIProvider.OPENAI,
+            client_factory=_openai_client,
+            default_model="gpt-4o-mini",
+            models=["gpt-4o-mini", "gpt-4o"],
+            pricing={"gpt-4o-mini": (0.00015, 0.0006), "gpt-4o": (0.0025, 0.01)}
+        ),
+        # Not a fallback target by default; point UPSTAGE_BASE_URL at a second fake server
+        # to exercise fallback offline
+        ProviderSpec(
+            name=AIProvider.FAKE,
+            client_factory=_fake_client,
+            default_model=settings.FAKE_PROVIDER_MODEL,
+            models=[settings.FAKE_PROVIDER_MODEL],
+            fallback=False
+        ),
+    ]
+
+
+def spec_from_config(config: Dict[str, Any]) -> ProviderSpec:
+    """
+    Build a ProviderSpec for an OpenAI- or Upstage-compatible endpoint, e.g.
+    {"name": "vllm", "api_format": "openai", "base_url": "http://gpu-1:8000/v1",
+     "api_key_env": "VLLM_API_KEY", "default_model": "llama-3-8b", "rpm": 600, "tpm": 1000000,
+     "pricing": {"llama-3-8b": [0.0, 0.0]}}
+    """
+    name = config["name"].lower()
+    api_format = config.get("api_format", "openai").lower()
+    if api_format not in API_FORMATS:
+        raise ValueError(f"Unknown api_format for provider {name}: {api_format}")
+    base_url = config["base_url"]
+
+    def _client():
+        api_key = config.get("api_key")
+        if config.get("api_key_env"):
+            api_key = os.getenv(config["api_key_env"])
+            if not api_key:
+                return None
+        api_key = api_key or "no-key"  # Self-hosted servers often ignore the key
+        if api_format == "openai":
+            return OpenAIClient(api_key=api_key, base_url=base_url, provider_name=name)
+        return UpstageClient(api_key=api_key, base_url=base_url, provider_name=name)
+
+    return ProviderSpec(
+        name=name,
+        client_factory=_client,
+        default_model=config["default_model"],
+        models=config.get("models") or [config["default_model"]],
+        pricing={model: tuple(price) for model, price in (config.get("pricing") or {}).items()},
+        requests_per_minute=config.get("rpm"),
+        tokens_per_minute=config.get("tpm"),
+        fallback=config.get("fallback", True)
+    )
+
+
+def load_extra_providers(value: Optional[str]) -> List[ProviderSpec]:
+    """Parse AI_EXTRA_PROVIDERS (a JSON list of spec_from_config dicts); bad entries are skipped"""
+    if not value:
+        return []
+    try:
+        configs = json.loads(value)
+    except json.JSONDecodeError as e:
+        logger.error(f"AI_EXTRA_PROVIDERS is not valid JSON: {e}")
+        return []
+    specs = []
+    for config in configs:
+        try:
+            specs.append(spec_from_config(config))
+        except (KeyError, ValueError, TypeError) as e:
+            logger.error(f"Skipping invalid provider config {config!r}: {e}")
+    return specs
+
+
+# Singleton instance
+_provider_registry_instance: Optional[ProviderRegistry] = None
+
+
+def get_provider_registry() -> ProviderRegistry:
+    """Get or create the process-wide registry (built-ins plus AI_EXTRA_PROVIDERS)"""
+    global _provider_registry_instance
+    if _provider_registry_instance is None:
+        registry = ProviderRegistry(builtin_providers())
+        for spec in load_extra_providers(settings.AI_EXTRA_PROVIDERS):
+            try:
+                registry.register(spec)
+            except ValueError as e:
+                logger.error(str(e))
+        _provider_registry_instance = registry
+    return _provider_registry_instance
+
+
+def register_provider(spec: ProviderSpec, replace: bool = False) -> AIProvider:
+    """Add a provider to the process-wide registry; routers pick it up on their next request"""
+    return get_provider_registry().register(spec, replace=replace)
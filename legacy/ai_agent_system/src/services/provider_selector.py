@@ -0,0 +1,152 @@
+# ai_agent_system/src/services/provider_selector.py
+"""
+Adaptive Provider Selection
+Keeps EWMA latency, error rate and throughput per (provider, model) and picks
+the primary provider per request.
+
+Policies:
+    static   - always the configured AI_PRIMARY_PROVIDER
+    latency  - lowest expected latency (EWMA latency inflated by error rate)
+    weighted - random choice weighted by 1 / expected latency
+Both adaptive policies explore a random candidate with a small probability so
+a recovered provider gets noticed.
+"""
+import logging
+import random
+import time
+from collections import deque
+from typing import Optional, Dict, Any, Tuple, List, Sequence, TypeVar
+
+from ai_agent_system.src.config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+ROUTING_POLICIES = ("static", "latency", "weighted")
+
+# Completions counted for throughput
+_THROUGHPUT_WINDOW_SECONDS = 60.0
+# Error rates are capped so a failing provider's expected latency stays finite
+_MAX_ERROR_RATE = 0.95
+
+P = TypeVar("P")
+
+
+class ProviderStats:
+    """EWMA latency/error rate and recent throughput for one (provider, model)"""
+
+    def __init__(self, alpha: float):
+        self.alpha = alpha
+        self.ewma_latency_ms: Optional[float] = None
+        self.ewma_error_rate = 0.0
+        self.requests = 0
+        self._completions = deque()
+
+    def record(self, latency_ms: float, success: bool):
+        self.requests += 1
+        self.ewma_error_rate += self.alpha * ((0.0 if success else 1.0) - self.ewma_error_rate)
+        if success:
+            if self.ewma_latency_ms is None:
+                self.ewma_latency_ms = latency_ms
+            else:
+                self.ewma_latency_ms += self.alpha * (latency_ms - self.ewma_latency_ms)
+            self._completions.append(time.monotonic())
+
+    def throughput(self) -> float:
+        """Successful completions per second over the last minute"""
+        cutoff = time.monotonic() - _THROUGHPUT_WINDOW_SECONDS
+        while self._completions and self._completions[0] < cutoff:
+            self._completions.popleft()
+        return len(self._completions) / _THROUGHPUT_WINDOW_SECONDS
+
+    def expected_latency_ms(self) -> Optional[float]:
+        """
+        Latency per successful answer, counting retries implied by the error rate.
+        A provider that has only failed is costed at the HTTP timeout, so it loses to
+        any provider that has answered. None until the first request.
+        """
+        if not self.requests:
+            return None
+        latency = self.ewma_latency_ms if self.ewma_latency_ms is not None else settings.HTTP_TIMEOUT * 1000
+        return latency / (1.0 - min(self.ewma_error_rate, _MAX_ERROR_RATE))
+
+    def get_stats(self) -> Dict[str, Any]:
+        expected = self.expected_latency_ms()
+        return {
+            "requests": self.requests,
+            "ewma_latency_ms": round(self.ewma_latency_ms, 2) if self.ewma_latency_ms is not None else None,
+            "ewma_error_rate": round(self.ewma_error_rate, 3),
+            "throughput_rps": round(self.throughput(), 3),
+            "expected_latency_ms": round(expected, 2) if expected is not None else None
+        }
+
+
+class ProviderSelector:
+    """Chooses the primary provider per request from observed performance"""
+
+    def __init__(
+        self,
+        policy: Optional[str] = None,
+        alpha: Optional[float] = None,
+        exploration: Optional[float] = None,
+        rng: Optional[random.Random] = None
+    ):
+        policy = (policy or settings.AI_ROUTING_POLICY).lower()
+        if policy not in ROUTING_POLICIES:
+            logger.warning(f"Unknown routing policy '{policy}', using 'static'")
+            policy = "static"
+        self.policy = policy
+        self.alpha = alpha or settings.AI_ROUTING_EWMA_ALPHA
+        self.exploration = settings.AI_ROUTING_EXPLORATION if exploration is None else exploration
+        self._rng = rng or random.Random()
+        self._stats: Dict[Tuple[str, str], ProviderStats] = {}
+
+    def record(self, provider: str, model: str, latency_ms: float, success: bool):
+        stats = self._stats.get((provider, model))
+        if stats is None:
+            stats = self._stats[(provider, model)] = ProviderStats(self.alpha)
+        stats.record(latency_ms, success)
+
+    def choose(self, candidates: Sequence[Tuple[P, str, str]], default: P) -> P:
+        """
+        Pick a provider.
+
+        Args:
+            candidates: (provider, provider name, model) for every usable provider
+            default: Static choice, used for the 'static' policy and when nothing is usable
+
+        Returns:
+            The chosen provider
+        """
+        if self.policy == "static" or not candidates:
+            return default
+        if len(candidates) == 1:
+            return candidates[0][0]
+
+        # Providers never tried are tried first so every candidate gets measured
+        for provider, name, model in candidates:
+            stats = self._stats.get((name, model))
+            if stats is None or not stats.requests:
+                return provider
+
+        if self._rng.random() < self.exploration:
+            return self._rng.choice(candidates)[0]
+
+        expected = [
+            (provider, self._stats[(name, model)].expected_latency_ms())
+            for provider, name, model in candidates
+        ]
+        if self.policy == "latency":
+            return min(expected, key=lambda item: item[1])[0]
+
+        weights = [1.0 / max(latency, 1.0) for _, latency in expected]
+        return self._rng.choices([provider for provider, _ in expected], weights=weights)[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "providers": {
+                f"{provider}/{model}": stats.get_stats()
+                for (provider, model), stats in self._stats.items()
+            }
+        }
@@ -0,0 +1,245 @@
+# ai_agent_system/src/services/rate_limiter.py
+"""
+Client-side Rate Limiter
+Async token buckets for requests/min and tokens/min per (provider, model, API key).
+Queuing locally is much cheaper than a 429 round-trip followed by a fallback call.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from typing import Optional, Dict, Any, Tuple, Mapping
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.provider_errors import parse_retry_after
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# '1s', '6m0s', '250ms', '1h2m3.5s' as used by x-ratelimit-reset-* headers
+_DURATION_PATTERN = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse an x-ratelimit-reset-* value into seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PATTERN.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def key_fingerprint(api_key: Optional[str]) -> str:
+    """Short stable identifier for an API key (never log or key metrics by the raw key)"""
+    if not api_key:
+        return "default"
+    return hashlib.sha256(api_key.encode()).hexdigest()[:8]
+
+
+class TokenBucket:
+    """
+    Continuously refilling bucket holding capacity units per period seconds.
+    wait_time() reports how long until a given amount can be taken.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = float(capacity)
+        self.refill_rate = self.capacity / period
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_rate)
+        self.updated_at = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount units can be taken (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)  # oversize requests wait for a full bucket
+        blocked = max(0.0, self.blocked_until - time.monotonic())
+        if self.tokens >= amount:
+            return blocked
+        return max(blocked, (amount - self.tokens) / self.refill_rate)
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def sync(self, remaining: Optional[float] = None, reset_after: Optional[float] = None):
+        """Resync from server-reported remaining units and time until reset"""
+        self._refill()
+        if remaining is None:
+            return
+        self.tokens = min(self.tokens, float(remaining))
+        # Server says we are empty until reset; don't refill faster than it does
+        if remaining <= 0 and reset_after:
+            self.block_for(reset_after)
+
+    def block_for(self, seconds: float):
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0.0)
+        self.updated_at = time.monotonic()
+
+
+class ProviderRateLimit:
+    """Requests/min and tokens/min buckets for one (provider, model, key)"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int, enabled: bool = True):
+        self.enabled = enabled
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self._lock = asyncio.Lock()
+
+        # --- Metrics ---
+        self.acquired = 0
+        self.throttled = 0
+        self.total_wait_ms = 0.0
+        self.rate_limited_responses = 0
+
+    def _wait_time(self, tokens: int) -> float:
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def has_capacity(self, tokens: int = 0) -> bool:
+        """Check, without taking anything, whether a request would go out immediately"""
+        if not self.enabled:
+            return True
+        return not self._lock.locked() and self._wait_time(tokens) <= 0
+
+    def try_acquire(self, tokens: int = 0) -> bool:
+        """Take capacity only if it is available right now"""
+        if not self.enabled:
+            return True
+        if self._lock.locked() or self._wait_time(tokens) > 0:
+            return False
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.acquired += 1
+        return True
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        Wait until one request carrying `tokens` tokens fits both buckets.
+        Waiters are served in FIFO order.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if not self.enabled:
+            return 0.0
+        start_time = time.monotonic()
+        async with self._lock:
+            while True:
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+
+        waited = time.monotonic() - start_time
+        self.acquired += 1
+        if waited > 0.001:
+            self.throttled += 1
+            self.total_wait_ms += waited * 1000
+        return waited
+
+    def reconcile(self, reserved_tokens: int, actual_tokens: int):
+        """Return over-reserved tokens (e.g. max_tokens reserved, fewer generated)"""
+        if actual_tokens < reserved_tokens:
+            self.tokens.give_back(reserved_tokens - actual_tokens)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Resync the buckets from x-ratelimit-* response headers"""
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        try:
+            if remaining_requests is not None:
+                self.requests.sync(
+                    float(remaining_requests),
+                    parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+                )
+            if remaining_tokens is not None:
+                self.tokens.sync(
+                    float(remaining_tokens),
+                    parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+                )
+        except ValueError:
+            logger.debug(f"Ignoring malformed rate limit headers: {dict(headers)}")
+
+    def on_rate_limited(self, headers: Optional[Mapping[str, str]] = None, retry_after: Optional[float] = None):
+        """Pause both buckets after a 429, honouring Retry-After"""
+        self.rate_limited_responses += 1
+        if headers is not None:
+            self.update_from_headers(headers)
+            retry_after = retry_after if retry_after is not None else parse_retry_after(headers)
+        pause = retry_after if retry_after is not None else 1.0
+        self.requests.block_for(pause)
+        logger.warning(f"Rate limited; pausing requests for {pause:.2f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "acquired": self.acquired,
+            "throttled": self.throttled,
+            "total_wait_ms": round(self.total_wait_ms, 2),
+            "rate_limited_responses": self.rate_limited_responses,
+            "available_requests": round(self.requests.tokens, 2),
+            "available_tokens": round(self.tokens.tokens, 2)
+        }
+
+
+class RateLimiter:
+    """Registry of ProviderRateLimit buckets keyed by (provider, model, key fingerprint)"""
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[int, int]]] = None, enabled: Optional[bool] = None):
+        self.enabled = settings.RATE_LIMIT_ENABLED if enabled is None else enabled
+        # provider -> (requests/min, tokens/min)
+        self.limits = limits or {
+            "upstage": (settings.UPSTAGE_RPM, settings.UPSTAGE_TPM),
+            "openai": (settings.OPENAI_RPM, settings.OPENAI_TPM),
+            "fake": (settings.FAKE_RPM, settings.FAKE_TPM),
+        }
+        self._buckets: Dict[Tuple[str, str, str], ProviderRateLimit] = {}
+
+    def set_limits(self, provider: str, requests_per_minute: int, tokens_per_minute: int):
+        """Configure limits for a provider; applies to buckets created afterwards"""
+        self.limits[provider] = (requests_per_minute, tokens_per_minute)
+
+    def get(self, provider: str, model: str, api_key: Optional[str] = None) -> ProviderRateLimit:
+        key = (provider, model, key_fingerprint(api_key))
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rpm, tpm = self.limits.get(provider, (settings.DEFAULT_RPM, settings.DEFAULT_TPM))
+            bucket = ProviderRateLimit(rpm, tpm, enabled=self.enabled)
+            self._buckets[key] = bucket
+        return bucket
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            f"{provider}/{model}/{fingerprint}": bucket.get_stats()
+            for (provider, model, fingerprint), bucket in self._buckets.items()
+        }
+
+
+# Singleton instance
+_rate_limiter_instance: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Get or create the process-wide rate limiter"""
+    global _rate_limiter_instance
+    if _rate_limiter_instance is None:
+        _rate_limiter_instance = RateLimiter()
+    return _rate_limiter_instance
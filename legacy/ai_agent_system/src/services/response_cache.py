@@ -0,0 +1,231 @@
+# ai_agent_system/src/services/response_cache.py
+"""
+Response Cache
+Content-addressed cache for LLM responses: a bounded in-memory LRU in front of a
+persistent SQLite tier, with TTL and size-based eviction and hit/miss metrics.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+from ai_agent_system.src.config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Size eviction on disk is checked every N writes to keep sets cheap
+_DISK_EVICTION_INTERVAL = 100
+
+
+def make_cache_key(provider: str, model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """
+    Build a content-addressed key from provider, model, prompt hash and sampling params.
+    """
+    material = {
+        "provider": provider,
+        "model": model,
+        "prompt_sha256": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "params": params,
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-tier cache of JSON-serialisable response dicts.
+    Memory tier: OrderedDict LRU. Disk tier: SQLite file (optional).
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        db_path: Optional[str] = None,
+        max_disk_entries: Optional[int] = None
+    ):
+        self.max_entries = max_entries or settings.AI_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.AI_CACHE_TTL_SECONDS
+        self.db_path = db_path if db_path is not None else settings.AI_CACHE_PATH
+        self.max_disk_entries = max_disk_entries or settings.AI_CACHE_MAX_DISK_ENTRIES
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_opened = False
+        self._db_lock = threading.Lock()
+        self._writes_since_eviction = 0
+
+        # --- Metrics ---
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _open_db(self):
+        # Opened on first use so constructing a cache never touches the filesystem
+        self._db_opened = True
+        if not self.db_path:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_expires ON response_cache (expires_at)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache disk tier disabled ({self.db_path}): {e}")
+            self._db = None
+
+    # --- Memory tier ---
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.time():
+            del self._memory[key]
+            self.expirations += 1
+            return None
+        self._memory.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: Dict[str, Any], expires_at: float):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    # --- Disk tier (runs in a worker thread) ---
+
+    def _disk_get(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < time.time():
+                self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                self._db.commit()
+                self.expirations += 1
+                return None
+        return row[1], json.loads(row[0])
+
+    def _disk_set(self, key: str, value: Dict[str, Any], expires_at: float):
+        now = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), expires_at, now)
+            )
+            self._writes_since_eviction += 1
+            if self._writes_since_eviction >= _DISK_EVICTION_INTERVAL:
+                self._writes_since_eviction = 0
+                self._evict_disk(now)
+            self._db.commit()
+
+    def _evict_disk(self, now: float):
+        cursor = self._db.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        self.expirations += cursor.rowcount
+        count = self._db.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM response_cache WHERE key IN "
+                "(SELECT key FROM response_cache ORDER BY created_at ASC LIMIT ?)",
+                (overflow,)
+            )
+            self.evictions += overflow
+
+    # --- Public API ---
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a key in memory, then on disk (promoting disk hits to memory)"""
+        value = self._memory_get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        if not self._db_opened:
+            self._open_db()
+        if self._db is not None:
+            entry = await asyncio.to_thread(self._disk_get, key)
+            if entry is not None:
+                expires_at, value = entry
+                self._memory_set(key, value, expires_at)
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Dict[str, Any], ttl_seconds: Optional[float] = None):
+        """Store a value in both tiers"""
+        expires_at = time.time() + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+        self._memory_set(key, value, expires_at)
+        self.sets += 1
+        if not self._db_opened:
+            self._open_db()
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._disk_set, key, value, expires_at)
+            except sqlite3.Error as e:
+                logger.warning(f"Failed to persist cache entry: {e}")
+
+    def clear(self):
+        """Drop every entry from both tiers"""
+        self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM response_cache")
+                self._db.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss metrics"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else 0.0,
+            "sets": self.sets,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "disk_enabled": bool(self.db_path)
+        }
+
+    def close(self):
+        """Close the disk tier (checkpointing its WAL); it is reopened if the cache is used again"""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
+        self._db_opened = False
+
+
+# Singleton instance
+_response_cache_instance: Optional[ResponseCache] = None
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the process-wide response cache"""
+    global _response_cache_instance
+    if _response_cache_instance is None:
+        _response_cache_instance = ResponseCache()
+    return _response_cache_instance
@@ -0,0 +1,259 @@
+# ai_agent_system/src/services/scheduler.py
+"""
+Request Scheduler
+Admission control in front of AIRouter so bulk jobs (Excel runs, batch
+comparisons) can't starve interactive generation of provider capacity.
+
+- Priority lanes: INTERACTIVE is always dispatched before BULK, and BULK may
+  never fill the last AI_INTERACTIVE_RESERVED_SLOTS in-flight slots.
+- SHADOW (mirrored comparison traffic) never queues: it only runs while the
+  other lanes are idle and load is under AI_SHADOW_MAX_LOAD, and is dropped
+  otherwise.
+- Within a lane, tenants/jobs share capacity by weighted fair queuing.
+- A global in-flight cap, bounded per-lane queues (wait for space or reject
+  fast), and queue-wait metrics.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Optional, Dict, Any, List, Tuple, AsyncIterator
+
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.hedging import LatencyWindow
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower value is served first"""
+    INTERACTIVE = 0
+    BULK = 1
+    SHADOW = 2
+
+
+class SchedulerFullError(Exception):
+    """The lane's queue is full and the scheduler rejects instead of waiting"""
+
+
+class _Waiter:
+    __slots__ = ("future", "tenant", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, tenant: str):
+        self.future = future
+        self.tenant = tenant
+        self.enqueued_at = time.monotonic()
+
+
+class _Lane:
+    """One priority class: a WFQ heap of waiters ordered by virtual finish time"""
+
+    def __init__(self):
+        self.heap: List[Tuple[float, int, _Waiter]] = []
+        self.queued = 0
+        self.in_flight = 0
+        self.virtual_time = 0.0
+        self.tenant_finish: Dict[str, float] = {}
+        self.space_waiters: List[asyncio.Future] = []
+
+        # --- Metrics ---
+        self.dispatched = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.waits = LatencyWindow(size=500)
+
+    def record_wait(self, wait_ms: float):
+        self.dispatched += 1
+        self.total_wait_ms += wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.waits.record(wait_ms)
+
+    def remove(self, entry: Tuple[float, int, "_Waiter"]):
+        """Drop a cancelled waiter right away so dead entries never hold the lane's head"""
+        self.heap.remove(entry)
+        heapq.heapify(self.heap)
+        self.queued -= 1
+        finish, _, waiter = entry
+        if self.tenant_finish.get(waiter.tenant) == finish:
+            # It was the tenant's latest request: give back the virtual time it reserved. With
+            # nothing left queued the lane's virtual time (never behind the tenant's) takes over
+            remaining = [f for f, _, w in self.heap if w.tenant == waiter.tenant]
+            if remaining:
+                self.tenant_finish[waiter.tenant] = max(remaining)
+            else:
+                del self.tenant_finish[waiter.tenant]
+        self.notify_space()
+
+    def notify_space(self):
+        while self.space_waiters:
+            future = self.space_waiters.pop(0)
+            if not future.done():
+                future.set_result(None)
+                return
+
+
+class RequestScheduler:
+    """Priority + weighted-fair admission with a global in-flight cap"""
+
+    def __init__(
+        self,
+        max_in_flight: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+        reject_when_full: Optional[bool] = None,
+        interactive_reserved: Optional[int] = None,
+        shadow_max_load: Optional[float] = None
+    ):
+        self.max_in_flight = max_in_flight or settings.AI_MAX_IN_FLIGHT
+        self.max_queue_size = max_queue_size or settings.AI_SCHEDULER_QUEUE_SIZE
+        self.reject_when_full = settings.AI_SCHEDULER_REJECT_WHEN_FULL if reject_when_full is None else reject_when_full
+        reserved = settings.AI_INTERACTIVE_RESERVED_SLOTS if interactive_reserved is None else interactive_reserved
+        self.interactive_reserved = min(reserved, self.max_in_flight - 1)
+        shadow_max_load = settings.AI_SHADOW_MAX_LOAD if shadow_max_load is None else shadow_max_load
+        self.shadow_max_in_flight = min(
+            int(self.max_in_flight * shadow_max_load), self.max_in_flight - self.interactive_reserved
+        )
+
+        self._lanes: Dict[Priority, _Lane] = {priority: _Lane() for priority in Priority}
+        self._in_flight = 0
+        self._sequence = itertools.count()
+
+    def _can_dispatch(self, priority: Priority) -> bool:
+        if self._in_flight >= self.max_in_flight:
+            return False
+        if priority == Priority.INTERACTIVE:
+            return True
+        if priority == Priority.SHADOW:
+            return self._in_flight < self.shadow_max_in_flight and not any(
+                lane.heap for lane in self._lanes.values()
+            )
+        return self._in_flight < self.max_in_flight - self.interactive_reserved
+
+    def _grant(self, priority: Priority, wait_ms: float):
+        lane = self._lanes[priority]
+        self._in_flight += 1
+        lane.in_flight += 1
+        lane.record_wait(wait_ms)
+
+    def _dispatch(self):
+        """Hand free slots to queued waiters, highest priority first"""
+        while True:
+            for priority in Priority:
+                lane = self._lanes[priority]
+                if not lane.heap:
+                    continue
+                if not self._can_dispatch(priority):
+                    return
+                finish, _, waiter = heapq.heappop(lane.heap)
+                lane.queued -= 1
+                lane.virtual_time = finish
+                lane.notify_space()
+                self._grant(priority, (time.monotonic() - waiter.enqueued_at) * 1000)
+                waiter.future.set_result(None)
+                break
+            else:
+                return
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE, tenant: str = "default", weight: float = 1.0):
+        """
+        Wait for an in-flight slot. Must be paired with release(priority).
+
+        Raises:
+            SchedulerFullError: The lane's queue is full and reject_when_full is set,
+                or a SHADOW request can't run right away (it is dropped, never queued)
+        """
+        lane = self._lanes[priority]
+        if not lane.heap and self._can_dispatch(priority):
+            self._grant(priority, 0.0)
+            return
+        if priority == Priority.SHADOW:
+            lane.rejected += 1
+            raise SchedulerFullError("shadow request dropped under load")
+
+        # Bounded queue: backpressure (wait for space) or reject fast
+        while lane.queued >= self.max_queue_size:
+            if self.reject_when_full:
+                lane.rejected += 1
+                raise SchedulerFullError(f"{priority.name.lower()} queue is full ({self.max_queue_size} waiting)")
+            space = asyncio.get_running_loop().create_future()
+            lane.space_waiters.append(space)
+            try:
+                await space
+            except asyncio.CancelledError:
+                if space in lane.space_waiters:
+                    lane.space_waiters.remove(space)
+                elif space.done() and not space.cancelled():
+                    lane.notify_space()
+                raise
+
+        # Weighted fair queuing: a tenant's next request finishes 1/weight after its last one
+        finish = max(lane.virtual_time, lane.tenant_finish.get(tenant, 0.0)) + 1.0 / max(weight, 0.01)
+        lane.tenant_finish[tenant] = finish
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tenant)
+        entry = (finish, next(self._sequence), waiter)
+        heapq.heappush(lane.heap, entry)
+        lane.queued += 1
+        self._dispatch()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as we were cancelled; hand the slot on
+                self.release(priority)
+            else:
+                lane.remove(entry)
+                # Lower-priority lanes (and shadow) may have been held back by this entry
+                self._dispatch()
+            raise
+
+    def release(self, priority: Priority = Priority.INTERACTIVE):
+        """Return a slot and dispatch the next waiter"""
+        lane = self._lanes[priority]
+        self._in_flight -= 1
+        lane.in_flight -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority = Priority.INTERACTIVE,
+        tenant: str = "default",
+        weight: float = 1.0
+    ) -> AsyncIterator[None]:
+        """Hold one in-flight slot for the duration of the block"""
+        await self.acquire(priority, tenant, weight)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"in_flight": self._in_flight, "max_in_flight": self.max_in_flight}
+        for priority, lane in self._lanes.items():
+            stats[priority.name.lower()] = {
+                "queued": lane.queued,
+                "in_flight": lane.in_flight,
+                "dispatched": lane.dispatched,
+                "rejected": lane.rejected,
+                "avg_wait_ms": round(lane.total_wait_ms / lane.dispatched, 2) if lane.dispatched else 0.0,
+                "p95_wait_ms": lane.waits.percentile(0.95),
+                "max_wait_ms": round(lane.max_wait_ms, 2)
+            }
+        return stats
+
+
+# Singleton instance
+_scheduler_instance: Optional[RequestScheduler] = None
+
+
+def get_request_scheduler() -> RequestScheduler:
+    """Get or create the process-wide request scheduler"""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = RequestScheduler()
+    return _scheduler_instance
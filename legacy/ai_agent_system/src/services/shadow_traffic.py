@@ -0,0 +1,112 @@
+# ai_agent_system/src/services/shadow_traffic.py
+"""
+Shadow Traffic Comparisons
+Turns the router's mirrored (shadow) requests into comparison results: each
+production response and its shadow twin from the other provider are compared
+by AIComparator, similarity-scored in batches, counted in a ComparisonReport
+and appended to the columnar comparison store off the event loop. Sampling
+and the low-priority scheduler lane live in AIRouter (AI_SHADOW_SAMPLE_RATE,
+AI_SHADOW_MAX_LOAD).
+"""
+import asyncio
+import logging
+from typing import Optional, Any, List
+
+from ai_agent_system.src.services.ai_router import AIRouter, AIResponse
+from ai_agent_system.src.services.ai_comparator import AIComparator, ComparisonResult, ComparisonReport
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class ShadowComparisonSink:
+    """Router shadow_sink that compares each production/shadow pair and persists the result"""
+
+    def __init__(
+        self,
+        comparator: AIComparator,
+        run_writer: Optional[Any] = None,
+        report: Optional[ComparisonReport] = None,
+        score_batch_size: int = 1
+    ):
+        self.comparator = comparator
+        self.run_writer = run_writer
+        self.report = report or ComparisonReport()
+        self.score_batch_size = max(1, score_batch_size)
+        self.skipped = 0  # Pairs the comparator can't compare (not one Upstage and one OpenAI response)
+        self._pending: List[ComparisonResult] = []
+        self._next_index = 0
+        self._write_lock = asyncio.Lock()  # The run writer isn't thread-safe: one write at a time
+
+    async def __call__(self, prompt: str, response: AIResponse, shadow_response: AIResponse):
+        responses = {r.provider.value: r for r in (response, shadow_response)}
+        if set(responses) != {"upstage", "openai"}:
+            self.skipped += 1
+            if self.skipped == 1:
+                logger.warning(
+                    f"Shadow pair {response.provider.value}/{shadow_response.provider.value} can't be compared "
+                    f"(only Upstage vs OpenAI is); such pairs are skipped and counted in sink.skipped"
+                )
+            return
+        self._pending.append(self.comparator.build_result(prompt, responses))
+        if len(self._pending) >= self.score_batch_size:
+            await self.flush()
+
+    def _score(self) -> List[ComparisonResult]:
+        batch, self._pending = self._pending, []
+        if batch:
+            self.comparator.score_results(batch)
+            for result in batch:
+                self.report.add(result)
+        return batch
+
+    def _write(self, batch: List[ComparisonResult]):
+        for result in batch:
+            self.run_writer.append(self._next_index, result)
+            self._next_index += 1
+
+    async def flush(self):
+        """Score buffered pairs in one vectorized pass, then record them and persist them in a worker thread"""
+        batch = self._score()
+        if batch and self.run_writer is not None:
+            async with self._write_lock:
+                # Appends flush chunks to disk (np.savez + fsync): keep that off the serving loop
+                await asyncio.to_thread(self._write, batch)
+
+    def close(self):
+        """Persist buffered pairs and close the run; call on shutdown, once shadow calls have drained"""
+        batch = self._score()
+        if self.run_writer is not None:
+            self._write(batch)
+            self.run_writer.close()
+
+
+def attach_shadow_comparisons(
+    router: AIRouter,
+    store: Optional[Any] = None,
+    run_id: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+    score_batch_size: int = 1
+) -> ShadowComparisonSink:
+    """
+    Start shadow-comparing a sample of router.generate() traffic.
+
+    Args:
+        router: Router whose requests are mirrored
+        store: ComparisonStore to persist results to (None keeps them in the sink's report only)
+        run_id: Store run for the results (default: a new timestamped run)
+        sample_rate: Share of requests to mirror (default: AI_SHADOW_SAMPLE_RATE)
+        score_batch_size: Pairs similarity-scored per vectorized pass
+
+    Returns:
+        The attached sink; close() it on shutdown to persist buffered pairs
+    """
+    run_writer = store.writer(run_id) if store is not None else None
+    sink = ShadowComparisonSink(
+        AIComparator(router), run_writer=run_writer, score_batch_size=score_batch_size
+    )
+    if sample_rate is not None:
+        router.shadow_sample_rate = sample_rate
+    router.shadow_sink = sink
+    logger.info(f"Shadow comparisons attached (sample rate {router.shadow_sample_rate})")
+    return sink
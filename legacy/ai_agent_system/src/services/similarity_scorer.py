@@ -0,0 +1,139 @@
+# ai_agent_system/src/services/similarity_scorer.py
+"""
+Similarity Scorer
+Batch text similarity between provider outputs (and against a reference
+answer where one exists) using character n-gram TF cosine. Character
+n-grams work for Korean without a morphological analyzer. N-grams are hashed
+into a fixed feature space with no corpus-dependent IDF, so a pair scores the
+same however it is batched. A whole batch is vectorized into one sparse
+matrix and scored with row-wise products instead of a Python loop over pairs.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from typing import Optional, Dict, List, Sequence, Tuple
+
+# Try to import scikit-learn, fall back to a pure-Python scorer if not available
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import HashingVectorizer
+    SKLEARN_AVAILABLE = True
+except ImportError:
+    SKLEARN_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(text: Optional[str]) -> Optional[str]:
+    if not text:
+        return None
+    text = _WHITESPACE.sub(" ", text).strip().lower()
+    return text or None
+
+
+class SimilarityScorer:
+    """Character n-gram TF cosine similarity for batches of text pairs"""
+
+    def __init__(self, ngram_range: Tuple[int, int] = (2, 4), n_features: int = 2 ** 20):
+        self.ngram_range = ngram_range
+        self.n_features = n_features
+        self._vectorizer = None
+
+    def score_batch(
+        self,
+        upstage_texts: Sequence[Optional[str]],
+        openai_texts: Sequence[Optional[str]],
+        references: Optional[Sequence[Optional[str]]] = None
+    ) -> List[Dict[str, Optional[float]]]:
+        """
+        Score each row of the batch. Similarities are in [0, 1]; None where a text is missing.
+
+        Returns:
+            Per row: pairwise_similarity (upstage vs openai) and, when a reference is given,
+            upstage_reference_similarity and openai_reference_similarity
+        """
+        rows = len(upstage_texts)
+        references = references if references is not None else [None] * rows
+        columns = [
+            [_normalize(text) for text in upstage_texts],
+            [_normalize(text) for text in openai_texts],
+            [_normalize(text) for text in references]
+        ]
+        pairs = {
+            "pairwise_similarity": (0, 1),
+            "upstage_reference_similarity": (0, 2),
+            "openai_reference_similarity": (1, 2)
+        }
+        if SKLEARN_AVAILABLE:
+            scores = self._score_vectorized(columns, pairs, rows)
+        else:
+            scores = self._score_python(columns, pairs, rows)
+
+        has_reference = [text is not None for text in columns[2]]
+        results = []
+        for row in range(rows):
+            result = {name: scores[name][row] for name in pairs}
+            if not has_reference[row]:
+                del result["upstage_reference_similarity"], result["openai_reference_similarity"]
+            results.append(result)
+        return results
+
+    def _score_vectorized(self, columns, pairs, rows) -> Dict[str, List[Optional[float]]]:
+        texts = [text for column in columns for text in column if text is not None]
+        scores = {name: [None] * rows for name in pairs}
+        if not texts:
+            return scores
+        if self._vectorizer is None:
+            # Stateless: nothing is fitted, so the same vectorizer serves every batch
+            self._vectorizer = HashingVectorizer(
+                analyzer="char_wb", ngram_range=self.ngram_range, lowercase=False,
+                n_features=self.n_features, alternate_sign=False
+            )
+        matrix = self._vectorizer.transform(texts)  # L2-normalized rows, so a dot product is the cosine
+
+        # Row of each text in the matrix, per column (-1 when missing)
+        positions = []
+        next_row = 0
+        for column in columns:
+            column_rows = np.full(rows, -1)
+            for i, text in enumerate(column):
+                if text is not None:
+                    column_rows[i] = next_row
+                    next_row += 1
+            positions.append(column_rows)
+
+        for name, (left, right) in pairs.items():
+            valid = np.flatnonzero((positions[left] >= 0) & (positions[right] >= 0))
+            if not valid.size:
+                continue
+            products = matrix[positions[left][valid]].multiply(matrix[positions[right][valid]])
+            cosines = np.clip(np.asarray(products.sum(axis=1)).ravel(), 0.0, 1.0)
+            for row, cosine in zip(valid, cosines):
+                scores[name][row] = round(float(cosine), 4)
+        return scores
+
+    def _ngrams(self, text: str) -> Counter:
+        grams = Counter()
+        for word in text.split(" "):
+            padded = f" {word} "
+            for n in range(self.ngram_range[0], self.ngram_range[1] + 1):
+                for i in range(max(1, len(padded) - n + 1)):
+                    grams[padded[i:i + n]] += 1
+        return grams
+
+    def _score_python(self, columns, pairs, rows) -> Dict[str, List[Optional[float]]]:
+        """Plain TF cosine per pair when scikit-learn isn't installed"""
+        grams = [[self._ngrams(text) if text is not None else None for text in column] for column in columns]
+        scores = {name: [None] * rows for name in pairs}
+        for name, (left, right) in pairs.items():
+            for row in range(rows):
+                a, b = grams[left][row], grams[right][row]
+                if a is None or b is None:
+                    continue
+                dot = sum(count * b[gram] for gram, count in a.items())
+                norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+                scores[name][row] = round(dot / norm, 4) if norm else 0.0
+        return scores
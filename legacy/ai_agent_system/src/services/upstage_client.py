@@ -1,8 +1,18 @@
 # ai_agent_system/src/services/upstage_client.py
 import os
 import httpx
-from typing import Optional, List, Dict, Any
+import json
+import time
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.utils.token_counter import count_tokens
+from ai_agent_system.src.utils.concurrency import bounded_map
+from ai_agent_system.src.services.provider_errors import ProviderError, provider_error_from_response, parse_retry_after
+from ai_agent_system.src.services.api_key_pool import (
+    APIKeyPool, parse_api_keys, outcome_for_status, KEY_SUCCESS, KEY_ERROR, KEY_CANCELLED
+)
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+from ai_agent_system.src.services.http_transport import HTTPTransport, get_http_transport, close_http_transport
 import asyncio
 import logging # Import logging
 
@@ -11,27 +21,83 @@ logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(level
 logger = logging.getLogger(__name__)
 
 class UpstageClient:
-    def __init__(self, api_key: str = None):
-        self.api_key = api_key if api_key else settings.UPSTAGE_API_KEY
-        if not self.api_key:
+    def __init__(
+        self,
+        api_key: str = None,
+        api_keys: Optional[List[Any]] = None,
+        base_url: Optional[str] = None,
+        provider_name: str = "upstage",
+        pricing: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        # One explicit key, an explicit pool, or UPSTAGE_API_KEYS / UPSTAGE_API_KEY from settings
+        if api_key:
+            keys = [api_key]
+        elif api_keys:
+            keys = api_keys
+        else:
+            keys = parse_api_keys(settings.UPSTAGE_API_KEYS) or [settings.UPSTAGE_API_KEY]
+        if not any(keys):
             raise ValueError("Upstage API key not provided or not found in settings.")
+        self.key_pool = APIKeyPool(keys)
+        self.api_key = self.key_pool.primary.key
         
-        self.base_url = "https://api.upstage.ai/v1/model"
-        self.headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        self.client = httpx.AsyncClient(headers=self.headers)
+        # base_url/provider_name let the same wire format target another server (e.g. the fake provider)
+        self.base_url = (base_url or settings.UPSTAGE_BASE_URL).rstrip("/")
+        self.provider_name = provider_name
+        self.headers = self._headers(self.api_key)
+        self._client: Optional[httpx.AsyncClient] = None
+        self.rate_limiter = get_rate_limiter()
         
         # --- Cost Management and Usage Monitoring ---
         self.api_call_count = 0
         self.total_input_tokens = 0
         self.total_output_tokens = 0
-        # Placeholder: could load pricing dynamically or from config
-        self.pricing_per_thousand_input_tokens = 0.001 # Example $
-        self.pricing_per_thousand_output_tokens = 0.002 # Example $
+        self.usage_by_model: Dict[str, Dict[str, int]] = {}
+        # model -> ($/1K input, $/1K output), from the provider registry (see ProviderSpec.build_client)
+        self.pricing: Dict[str, Tuple[float, float]] = dict(pricing or {})
+        # Streaming: time-to-first-token accounting
+        self.stream_count = 0
+        self.total_time_to_first_token_ms = 0.0
         # --- End Cost Management ---
 
+    def _count_usage(self, model_name: str, input_tokens: int = 0, output_tokens: int = 0):
+        self.total_input_tokens += input_tokens
+        self.total_output_tokens += output_tokens
+        usage = self.usage_by_model.setdefault(model_name, {"input_tokens": 0, "output_tokens": 0})
+        usage["input_tokens"] += input_tokens
+        usage["output_tokens"] += output_tokens
+
+    def _estimated_costs(self) -> Tuple[float, float]:
+        """$ (input, output) so far at the per-model pricing; models without pricing count as 0"""
+        input_cost = output_cost = 0.0
+        for model, usage in self.usage_by_model.items():
+            price = self.pricing.get(model)
+            if price:
+                input_cost += usage["input_tokens"] / 1000 * price[0]
+                output_cost += usage["output_tokens"] / 1000 * price[1]
+        return input_cost, output_cost
+
+    @property
+    def transport(self) -> HTTPTransport:
+        # Shared pooled transport, looked up per call: connections are reused across clients
+        # and calls, and a transport closed by another owner is rebuilt instead of reused
+        return get_http_transport()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The shared transport's client, unless a dedicated one was assigned"""
+        return self._client if self._client is not None else self.transport.client
+
+    @client.setter
+    def client(self, client: Optional[httpx.AsyncClient]):
+        self._client = client
+
+    def _headers(self, api_key: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json"
+        }
+
     async def text_generation(
         self,
         prompt: str,
@@ -39,8 +105,15 @@ class UpstageClient:
         temperature: float = 0.7,
         max_tokens: int = 500,
         top_p: float = 1.0,
-        stop_sequences: Optional[List[str]] = None
+        stop_sequences: Optional[List[str]] = None,
+        raise_on_error: bool = False,
+        timeout: Optional[float] = None
     ) -> Optional[str]:
+        """
+        Generate text with the Upstage API.
+        Returns None on failure, or raises ProviderError/RateLimitError when raise_on_error is set.
+        timeout overrides the default 30s HTTP timeout (e.g. from a request deadline).
+        """
         url = f"{self.base_url}/{model_name}/generate"
         payload = {
             "prompt": prompt,
@@ -51,17 +124,29 @@ class UpstageClient:
         }
 
         self.api_call_count += 1
-        input_token_estimate = len(prompt.split()) # Simple token estimate
-        self.total_input_tokens += input_token_estimate
+        input_token_estimate = count_tokens(prompt, model_name)
+        self._count_usage(model_name, input_tokens=input_token_estimate)
         logger.info(f"Upstage API Call {self.api_call_count}: Model='{model_name}', Input Tokens (est)={input_token_estimate}")
 
+        # Client-side pacing per key: reserve the worst case, return the unused part afterwards
+        pooled_key = self.key_pool.acquire()
+        key_outcome, retry_after = KEY_ERROR, None
+        rate_limit = self.rate_limiter.get(self.provider_name, model_name, pooled_key.key)
+        reserved_tokens = input_token_estimate + max_tokens
+
+        output_token_estimate = 0
+        acquired = False
         try:
-            response = await self.client.post(url, json=payload, timeout=30.0)
+            await rate_limit.acquire(reserved_tokens)
+            acquired = True
+            response = await self.client.post(
+                url, json=payload, headers=self._headers(pooled_key.key), timeout=timeout if timeout is not None else 30.0
+            )
+            rate_limit.update_from_headers(response.headers)
             response.raise_for_status()
             
             result = response.json()
             generated_text = None
-            output_token_estimate = 0
             
             if result and "choices" in result and len(result["choices"]) > 0 and "text" in result["choices"][0]:
                 generated_text = result["choices"][0]["text"]
@@ -69,37 +154,198 @@ class UpstageClient:
                 if "usage" in result and "completion_tokens" in result["usage"]:
                     output_token_estimate = result["usage"]["completion_tokens"]
                 else: # Fallback to estimate
-                    output_token_estimate = len(generated_text.split())
+                    output_token_estimate = count_tokens(generated_text, model_name)
 
             elif result and "completion" in result:
                 generated_text = result["completion"]
-                output_token_estimate = len(generated_text.split()) # Estimate
+                output_token_estimate = count_tokens(generated_text, model_name)
 
             if generated_text:
-                self.total_output_tokens += output_token_estimate
+                self._count_usage(model_name, output_tokens=output_token_estimate)
                 logger.info(f"Upstage API Success: Output Tokens (est)={output_token_estimate}")
+            key_outcome = KEY_SUCCESS
             
             return generated_text
+        except asyncio.CancelledError:
+            key_outcome = KEY_CANCELLED
+            raise
         except httpx.HTTPStatusError as e:
             logger.error(f"HTTP error generating text with Upstage API: {e.response.status_code} - {e.response.text}")
+            key_outcome, retry_after = outcome_for_status(e.response.status_code), parse_retry_after(e.response.headers)
+            if e.response.status_code == 429:
+                rate_limit.on_rate_limited(e.response.headers)
+            if raise_on_error:
+                raise provider_error_from_response(self.provider_name, e.response) from e
             return None
         except httpx.RequestError as e:
             logger.error(f"Request error generating text with Upstage API: {e}")
+            if raise_on_error:
+                raise ProviderError(str(e), self.provider_name) from e
             return None
         except Exception as e:
             logger.error(f"An unexpected error occurred while calling Upstage API: {e}")
+            if raise_on_error:
+                raise ProviderError(str(e), self.provider_name) from e
             return None
+        finally:
+            self.key_pool.release(pooled_key, key_outcome, retry_after)
+            if acquired:  # Failures and cancellations give back the unused reservation too
+                rate_limit.reconcile(reserved_tokens, input_token_estimate + output_token_estimate)
+
+    async def text_generation_many(
+        self,
+        prompts: List[str],
+        concurrency: int = 8,
+        ordered: bool = False,
+        **generation_kwargs
+    ) -> AsyncIterator[Tuple[int, Optional[str]]]:
+        """
+        Generate text for many prompts with a bounded in-flight window.
+        The window shrinks automatically when Upstage returns 429 and rate-limited
+        prompts are retried.
+
+        Args:
+            prompts: Prompts to generate for
+            concurrency: Maximum concurrent requests
+            ordered: Yield in input order instead of completion order
+            **generation_kwargs: Passed through to text_generation()
+
+        Yields:
+            (prompt index, generated text or None) tuples
+        """
+        async def _generate(prompt: str) -> Optional[str]:
+            return await self.text_generation(prompt=prompt, raise_on_error=True, **generation_kwargs)
+
+        async for index, text in bounded_map(prompts, _generate, concurrency=concurrency, ordered=ordered):
+            yield index, text
+
+    async def text_generation_stream(
+        self,
+        prompt: str,
+        model_name: str = "llama-2-70b-chat",
+        temperature: float = 0.7,
+        max_tokens: int = 500,
+        top_p: float = 1.0,
+        stop_sequences: Optional[List[str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        Stream generated text as server-sent events, yielding deltas as they arrive.
+        Unlike text_generation(), errors are raised to the consumer (as ProviderError)
+        because a partial stream cannot be represented as a single None result.
+        Usage is accounted when the stream finishes (or is abandoned).
+        """
+        url = f"{self.base_url}/{model_name}/generate"
+        payload = {
+            "prompt": prompt,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": top_p,
+            "stop_sequences": stop_sequences if stop_sequences else [],
+            "stream": True
+        }
+
+        self.api_call_count += 1
+        input_token_estimate = count_tokens(prompt, model_name)
+        self._count_usage(model_name, input_tokens=input_token_estimate)
+        logger.info(f"Upstage API Stream {self.api_call_count}: Model='{model_name}', Input Tokens (est)={input_token_estimate}")
+
+        pooled_key = self.key_pool.acquire()
+        key_outcome, retry_after = KEY_ERROR, None
+        rate_limit = self.rate_limiter.get(self.provider_name, model_name, pooled_key.key)
+        reserved_tokens = input_token_estimate + max_tokens
+
+        start_time = time.perf_counter()
+        first_token_received = False
+        generated_parts: List[str] = []
+        usage_output_tokens: Optional[int] = None
+
+        acquired = False
+        try:
+            await rate_limit.acquire(reserved_tokens)
+            acquired = True
+            async with self.client.stream("POST", url, json=payload, headers=self._headers(pooled_key.key), timeout=30.0) as response:
+                rate_limit.update_from_headers(response.headers)
+                if response.is_error:
+                    await response.aread()
+                    response.raise_for_status()
+                key_outcome = KEY_SUCCESS
+
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    chunk = json.loads(data)
+                    if chunk.get("usage") and "completion_tokens" in chunk["usage"]:
+                        usage_output_tokens = chunk["usage"]["completion_tokens"]
+
+                    delta = None
+                    if chunk.get("choices"):
+                        choice = chunk["choices"][0]
+                        delta = choice.get("text") or (choice.get("delta") or {}).get("content")
+                    elif "completion" in chunk:
+                        delta = chunk["completion"]
+
+                    if delta:
+                        if not first_token_received:
+                            first_token_received = True
+                            self.stream_count += 1
+                            self.total_time_to_first_token_ms += (time.perf_counter() - start_time) * 1000
+                        generated_parts.append(delta)
+                        yield delta
+        except asyncio.CancelledError:
+            key_outcome = KEY_CANCELLED
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(f"HTTP error streaming text with Upstage API: {e.response.status_code} - {e.response.text}")
+            key_outcome, retry_after = outcome_for_status(e.response.status_code), parse_retry_after(e.response.headers)
+            if e.response.status_code == 429:
+                rate_limit.on_rate_limited(e.response.headers)
+            raise provider_error_from_response(self.provider_name, e.response) from e
+        except httpx.RequestError as e:
+            logger.error(f"Request error streaming text with Upstage API: {e}")
+            raise ProviderError(str(e), self.provider_name) from e
+        finally:
+            self.key_pool.release(pooled_key, key_outcome, retry_after)
+            output_tokens = usage_output_tokens if usage_output_tokens is not None else count_tokens("".join(generated_parts), model_name)
+            self._count_usage(model_name, output_tokens=output_tokens)
+            if acquired:  # Nothing to give back if the call never got through the rate limiter
+                rate_limit.reconcile(reserved_tokens, input_token_estimate + output_tokens)
+            if generated_parts:
+                logger.info(f"Upstage API Stream Finished: Output Tokens (est)={output_tokens}")
+
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """Get current usage statistics"""
+        input_cost, output_cost = self._estimated_costs()
+        return {
+            "api_call_count": self.api_call_count,
+            "total_input_tokens": self.total_input_tokens,
+            "total_output_tokens": self.total_output_tokens,
+            "usage_by_model": {model: dict(usage) for model, usage in self.usage_by_model.items()},
+            "estimated_input_cost": input_cost,
+            "estimated_output_cost": output_cost,
+            "estimated_total_cost": input_cost + output_cost,
+            "unpriced_models": sorted(model for model in self.usage_by_model if model not in self.pricing),
+            "avg_time_to_first_token_ms": (
+                self.total_time_to_first_token_ms / self.stream_count if self.stream_count else None
+            ),
+            "api_keys": self.key_pool.get_stats()
+        }
 
     async def close(self):
-        """Closes the HTTP client connection and logs final usage."""
-        await self.client.aclose()
+        """Logs final usage. The shared transport is closed via close_http_transport()."""
         logger.info("--- Upstage API Usage Summary ---")
         logger.info(f"Total API Calls: {self.api_call_count}")
         logger.info(f"Total Estimated Input Tokens: {self.total_input_tokens}")
         logger.info(f"Total Estimated Output Tokens: {self.total_output_tokens}")
-        logger.info(f"Estimated Input Cost: ${self.total_input_tokens / 1000 * self.pricing_per_thousand_input_tokens:.4f}")
-        logger.info(f"Estimated Output Cost: ${self.total_output_tokens / 1000 * self.pricing_per_thousand_output_tokens:.4f}")
-        logger.info(f"Total Estimated Cost: ${ (self.total_input_tokens / 1000 * self.pricing_per_thousand_input_tokens) + (self.total_output_tokens / 1000 * self.pricing_per_thousand_output_tokens):.4f}")
+        input_cost, output_cost = self._estimated_costs()
+        logger.info(f"Estimated Input Cost: ${input_cost:.4f}")
+        logger.info(f"Estimated Output Cost: ${output_cost:.4f}")
+        logger.info(f"Total Estimated Cost: ${input_cost + output_cost:.4f}")
+        logger.info(f"API Keys: {self.key_pool.get_stats()}")
+        logger.info(f"HTTP Pool: {self.transport.get_metrics()}")
 
 # Example usage
 async def main():
@@ -124,6 +370,7 @@ async def main():
         logger.error("Text generation failed.")
         
     await upstage_client.close()
+    await close_http_transport()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
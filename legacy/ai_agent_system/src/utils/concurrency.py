@@ -0,0 +1,142 @@
+# ai_agent_system/src/utils/concurrency.py
+"""
+Bounded Concurrency Helpers
+A bounded in-flight window over a list of work items that shrinks when the
+provider rate-limits us (AIMD) and grows back as calls succeed.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Optional, Sequence, Callable, Awaitable, AsyncIterator, Tuple, TypeVar, Dict, Any
+
+from ai_agent_system.src.services.provider_errors import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase / multiplicative-decrease concurrency limit.
+    The limit halves on a rate limit (at most once per window epoch) and
+    grows by one after a full window of successes.
+    """
+
+    def __init__(self, initial: int, min_limit: int = 1, max_limit: Optional[int] = None, default_pause: float = 1.0):
+        self.max_limit = max(1, max_limit or initial)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = max(self.min_limit, min(initial, self.max_limit))
+        self.default_pause = default_pause
+        self.epoch = 0
+        self.paused_until = 0.0
+        self.rate_limited_count = 0
+        self._successes = 0
+
+    def on_success(self):
+        self._successes += 1
+        if self._successes >= self.limit and self.limit < self.max_limit:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limited(self, launch_epoch: int, retry_after: Optional[float] = None):
+        """Shrink the window; requests launched before the last shrink don't shrink it again"""
+        self.rate_limited_count += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + (retry_after or self.default_pause))
+        if launch_epoch == self.epoch:
+            self.limit = max(self.min_limit, self.limit // 2)
+            self._successes = 0
+            self.epoch += 1
+            logger.warning(f"Rate limited: concurrency window reduced to {self.limit}")
+
+    def pause_remaining(self) -> float:
+        return max(0.0, self.paused_until - time.monotonic())
+
+
+async def bounded_map(
+    items: Sequence[T],
+    worker: Callable[[T], Awaitable[R]],
+    concurrency: int = 8,
+    ordered: bool = False,
+    is_rate_limited: Optional[Callable[[R], bool]] = None,
+    max_rate_limit_retries: int = 3,
+    window: Optional[AdaptiveConcurrency] = None
+) -> AsyncIterator[Tuple[int, Optional[R]]]:
+    """
+    Run worker over items with at most `concurrency` calls in flight.
+
+    Rate-limited items (RateLimitError raised, or is_rate_limited(result) true) shrink
+    the window and are retried up to max_rate_limit_retries times. Other exceptions
+    are logged and yield None for that item.
+
+    Args:
+        items: Work items
+        worker: Async callable applied to each item
+        concurrency: Maximum in-flight calls (the adaptive window never exceeds it)
+        ordered: Yield in input order instead of completion order
+        is_rate_limited: Optional predicate marking a returned result as rate limited
+        max_rate_limit_retries: Retries per item after rate limiting
+        window: Optional shared AdaptiveConcurrency (e.g. across several batches)
+
+    Yields:
+        (index, result) tuples
+    """
+    window = window or AdaptiveConcurrency(concurrency)
+    pending = deque(range(len(items)))
+    retries: Dict[int, int] = {}
+    in_flight: Dict[asyncio.Task, Tuple[int, int]] = {}
+    completed: Dict[int, Any] = {}
+    next_index = 0
+
+    try:
+        while pending or in_flight:
+            while pending and len(in_flight) < window.limit and window.pause_remaining() == 0:
+                index = pending.popleft()
+                task = asyncio.ensure_future(worker(items[index]))
+                in_flight[task] = (index, window.epoch)
+
+            if not in_flight:
+                await asyncio.sleep(window.pause_remaining())
+                continue
+
+            done, _ = await asyncio.wait(
+                in_flight.keys(),
+                return_when=asyncio.FIRST_COMPLETED,
+                timeout=window.pause_remaining() or None
+            )
+
+            for task in done:
+                index, launch_epoch = in_flight.pop(task)
+                result = None
+                retry_after = None
+                rate_limited = False
+                try:
+                    result = task.result()
+                    rate_limited = bool(is_rate_limited and is_rate_limited(result))
+                except RateLimitError as e:
+                    rate_limited = True
+                    retry_after = e.retry_after
+                except Exception as e:
+                    logger.error(f"Batch item {index} failed: {e}")
+
+                if rate_limited:
+                    window.on_rate_limited(launch_epoch, retry_after)
+                    retries[index] = retries.get(index, 0) + 1
+                    if retries[index] <= max_rate_limit_retries:
+                        pending.appendleft(index)
+                        continue
+                else:
+                    window.on_success()
+
+                if not ordered:
+                    yield index, result
+                    continue
+                completed[index] = result
+                while next_index in completed:
+                    yield next_index, completed.pop(next_index)
+                    next_index += 1
+    finally:
+        for task in in_flight:
+            task.cancel()
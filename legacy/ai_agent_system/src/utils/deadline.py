@@ -0,0 +1,40 @@
+# ai_agent_system/src/utils/deadline.py
+"""
+Deadlines
+An absolute point in time a request must finish by, passed down through
+fallbacks and retries so every step only gets what is left of the budget.
+"""
+import time
+from typing import Optional
+
+
+class Deadline:
+    """Monotonic deadline with helpers for splitting the remaining budget"""
+
+    def __init__(self, expires_at: float, budget: float):
+        self.expires_at = expires_at
+        self.budget = budget
+
+    @classmethod
+    def after(cls, seconds: float) -> "Deadline":
+        return cls(time.monotonic() + seconds, seconds)
+
+    @classmethod
+    def resolve(cls, deadline: Optional["Deadline"] = None, timeout_budget: Optional[float] = None) -> Optional["Deadline"]:
+        """Combine an inherited deadline and a local budget, keeping whichever ends first"""
+        if timeout_budget is None:
+            return deadline
+        local = cls.after(timeout_budget)
+        if deadline is None or local.expires_at < deadline.expires_at:
+            return local
+        return deadline
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, steps_left: int) -> float:
+        """Even share of the remaining budget for the next of steps_left steps"""
+        return self.remaining() / max(1, steps_left)
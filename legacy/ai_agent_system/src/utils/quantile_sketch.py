@@ -0,0 +1,113 @@
+# ai_agent_system/src/utils/quantile_sketch.py
+"""
+Quantile Sketch
+Log-bucketed histogram (DDSketch-style) for latency and throughput
+percentiles in fixed memory. Every quantile is within relative_accuracy of
+the true value, and sketches with the same accuracy merge exactly, so
+workers or shards can each keep one and combine them into a single report.
+"""
+import math
+from typing import Optional, Dict, Any, Sequence
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketch:
+    """Mergeable quantile sketch over non-negative values"""
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self.buckets: Dict[int, int] = {}  # bucket index -> count; bucket i covers (gamma^(i-1), gamma^i]
+        self.zero_count = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def add(self, value: float, count: int = 1):
+        if value < 0:
+            raise ValueError("QuantileSketch only holds non-negative values")
+        if value == 0:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.sum += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        """Fold other into this sketch (both must use the same relative_accuracy)"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum += other.sum
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Value at quantile q (0..1), None when empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of the bucket in relative terms, clamped to what was observed
+                value = 2 * self._gamma ** index / (self._gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def summary(self, quantiles: Sequence[float] = DEFAULT_QUANTILES, digits: int = 2) -> Dict[str, Any]:
+        """count/mean/min/max plus p50-style keys for the requested quantiles"""
+        def _round(value: Optional[float]) -> Optional[float]:
+            return round(value, digits) if value is not None else None
+
+        summary = {
+            "count": self.count,
+            "mean": _round(self.mean()),
+            "min": _round(self.min),
+            "max": _round(self.max)
+        }
+        for q in quantiles:
+            summary[f"p{q * 100:g}"] = _round(self.quantile(q))
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-safe state, e.g. to ship a worker's sketch to the process that merges them"""
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+            "zero_count": self.zero_count,
+            "count": self.count,
+            "sum": self.sum,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"])
+        sketch.buckets = {int(index): count for index, count in data["buckets"].items()}
+        sketch.zero_count = data["zero_count"]
+        sketch.count = data["count"]
+        sketch.sum = data["sum"]
+        sketch.min = data["min"]
+        sketch.max = data["max"]
+        return sketch
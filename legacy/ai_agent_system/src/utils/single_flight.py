@@ -0,0 +1,84 @@
+# ai_agent_system/src/utils/single_flight.py
+"""
+Request Coalescing (single flight)
+Concurrent calls with the same key share one in-flight upstream call.
+
+The shared call runs as its own task and each caller awaits it through
+asyncio.shield, so a caller giving up never cancels the work for the others.
+The task is only cancelled once every waiter has gone.
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Callable, Awaitable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """One in-flight call and the number of callers awaiting it"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Deduplicates concurrent async calls by key"""
+
+    def __init__(self):
+        self._calls: Dict[str, _Call] = {}
+
+        # --- Metrics ---
+        self.calls = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def _forget(self, key: str, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run fn() once for all concurrent callers using the same key.
+
+        Args:
+            key: Request key identifying identical calls
+            fn: Zero-argument coroutine function performing the call
+
+        Returns:
+            The shared result (exceptions are re-raised to every waiter)
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            call.task.add_done_callback(lambda _, key=key, call=call: self._forget(key, call))
+            self._calls[key] = call
+            self.calls += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                # Last interested caller gave up; stop the upstream call
+                self.abandoned += 1
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._calls)
+        }
@@ -0,0 +1,218 @@
+# ai_agent_system/src/utils/token_counter.py
+"""
+Token Counting and Prompt Budgeting
+Pluggable per-model tokenizers (cached) with a fast script-aware approximation.
+
+Whitespace splitting badly undercounts Korean, which has few spaces but
+roughly one token per Hangul syllable, so every estimate goes through here.
+"""
+import logging
+import re
+from functools import lru_cache
+from typing import Optional, List, Dict, Callable, Tuple, Any
+
+from ai_agent_system.src.config.settings import settings
+
+# Try to import optional tokenizer backends, fall back to approximation if not available
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+try:
+    from tokenizers import Tokenizer as HFTokenizer
+    HF_TOKENIZERS_AVAILABLE = True
+except ImportError:
+    HF_TOKENIZERS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Context window sizes (prompt + completion) per model prefix; longest prefix wins
+MODEL_CONTEXT_WINDOWS: Dict[str, int] = {
+    "solar-pro": 32768,
+    "solar-mini": 32768,
+    "solar": 4096,
+    "gpt-4o-mini": 128000,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "llama-2-70b-chat": 4096,
+}
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Per-message overhead of chat formats (role markers, separators)
+CHAT_MESSAGE_OVERHEAD_TOKENS = 4
+CHAT_REPLY_PRIMING_TOKENS = 2
+
+# Hangul, CJK ideographs and kana tokenize at roughly one token per character
+_DENSE_SCRIPT_PATTERN = re.compile(r'[\u1100-\u11FF\u3040-\u30FF\u3130-\u318F\u4E00-\u9FFF\uAC00-\uD7A3]')
+_CHARS_PER_TOKEN_OTHER = 4.0
+
+# A tokenizer is anything with encode(text) -> List[int] and decode(ids) -> str
+TokenizerFactory = Callable[[str], Optional[Any]]
+_tokenizer_factories: List[Tuple[str, TokenizerFactory]] = []
+
+
+def approximate_tokens(text: str) -> int:
+    """
+    Fast, dependency-free token estimate for hot paths.
+    Counts dense-script characters (Hangul, CJK) as one token each and
+    everything else at ~4 characters per token.
+    """
+    if not text:
+        return 0
+    dense_chars = len(_DENSE_SCRIPT_PATTERN.findall(text))
+    other_chars = len(text) - dense_chars
+    return max(1, dense_chars + int(round(other_chars / _CHARS_PER_TOKEN_OTHER)))
+
+
+def register_tokenizer(model_prefix: str, factory: TokenizerFactory):
+    """
+    Register a tokenizer factory for models starting with model_prefix.
+    Later registrations take precedence over earlier ones.
+
+    Args:
+        model_prefix: Model name prefix (e.g. 'solar', 'gpt-')
+        factory: Callable taking the model name and returning a tokenizer or None
+    """
+    _tokenizer_factories.insert(0, (model_prefix, factory))
+    get_tokenizer.cache_clear()
+
+
+class _HFTokenizerAdapter:
+    """Adapts a Hugging Face tokenizers.Tokenizer to the encode/decode interface"""
+
+    def __init__(self, tokenizer: "HFTokenizer"):
+        self._tokenizer = tokenizer
+
+    def encode(self, text: str) -> List[int]:
+        return self._tokenizer.encode(text, add_special_tokens=False).ids
+
+    def decode(self, ids: List[int]) -> str:
+        return self._tokenizer.decode(ids)
+
+
+def _tiktoken_factory(model: str) -> Optional[Any]:
+    if not TIKTOKEN_AVAILABLE:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def _upstage_factory(model: str) -> Optional[Any]:
+    # Solar tokenizers are not bundled; point UPSTAGE_TOKENIZER_PATH at a local tokenizer.json
+    if not HF_TOKENIZERS_AVAILABLE or not settings.UPSTAGE_TOKENIZER_PATH:
+        return None
+    return _HFTokenizerAdapter(HFTokenizer.from_file(settings.UPSTAGE_TOKENIZER_PATH))
+
+
+@lru_cache(maxsize=32)
+def get_tokenizer(model: Optional[str]) -> Optional[Any]:
+    """Get the cached tokenizer for a model, or None if only approximation is available"""
+    if not model:
+        return None
+    for prefix, factory in _tokenizer_factories:
+        if model.startswith(prefix):
+            try:
+                tokenizer = factory(model)
+            except Exception as e:
+                logger.warning(f"Failed to load tokenizer for '{model}', using approximation: {e}")
+                return None
+            if tokenizer is not None:
+                return tokenizer
+    return None
+
+
+register_tokenizer("gpt-", _tiktoken_factory)
+register_tokenizer("solar", _upstage_factory)
+
+
+def count_tokens(text: Optional[str], model: Optional[str] = None, approximate: Optional[bool] = None) -> int:
+    """
+    Count tokens in text for a model.
+
+    Args:
+        text: Text to count
+        model: Model name used to pick the tokenizer
+        approximate: Force the fast approximation (defaults to TOKEN_COUNT_MODE setting)
+
+    Returns:
+        Token count (exact when a tokenizer is available, otherwise approximate)
+    """
+    if not text:
+        return 0
+    if approximate is None:
+        approximate = settings.TOKEN_COUNT_MODE == "approximate"
+    tokenizer = None if approximate else get_tokenizer(model)
+    if tokenizer is None:
+        return approximate_tokens(text)
+    return len(tokenizer.encode(text))
+
+
+def count_message_tokens(messages: List[Dict[str, str]], model: Optional[str] = None, approximate: Optional[bool] = None) -> int:
+    """Count tokens for a chat message list including per-message formatting overhead"""
+    total = CHAT_REPLY_PRIMING_TOKENS
+    for message in messages:
+        total += CHAT_MESSAGE_OVERHEAD_TOKENS + count_tokens(message.get("content", ""), model, approximate)
+    return total
+
+
+def get_context_window(model: Optional[str]) -> int:
+    """Get the context window for a model (longest matching prefix)"""
+    if not model:
+        return DEFAULT_CONTEXT_WINDOW
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if model.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+def fit_max_tokens(prompt: str, model: Optional[str], max_tokens: int) -> int:
+    """
+    Clamp max_tokens so prompt + completion fits the model's context window.
+
+    Returns:
+        The usable completion budget (0 if the prompt alone fills the window)
+    """
+    remaining = get_context_window(model) - count_tokens(prompt, model)
+    return max(0, min(max_tokens, remaining))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: Optional[str] = None, keep: str = "start") -> str:
+    """
+    Trim text to at most max_tokens tokens.
+
+    Args:
+        text: Text to trim
+        max_tokens: Token budget
+        model: Model name used to pick the tokenizer
+        keep: 'start' keeps the beginning, 'end' keeps the most recent context
+
+    Returns:
+        Trimmed text
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    tokenizer = get_tokenizer(model) if settings.TOKEN_COUNT_MODE != "approximate" else None
+    if tokenizer is not None:
+        ids = tokenizer.encode(text)
+        kept = ids[:max_tokens] if keep == "start" else ids[-max_tokens:]
+        return tokenizer.decode(kept)
+
+    # Approximation: binary search the longest slice that fits the budget
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        candidate = text[:mid] if keep == "start" else text[len(text) - mid:]
+        if approximate_tokens(candidate) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] if keep == "start" else text[len(text) - low:]
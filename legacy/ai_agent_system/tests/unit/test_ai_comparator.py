@@ -0,0 +1,110 @@
+# ai_agent_system/tests/unit/test_ai_comparator.py
+import pytest
+import asyncio
+import json
+import logging
+from unittest.mock import MagicMock, patch
+from ai_agent_system.src.services.ai_router import AIProvider, AIResponse
+from ai_agent_system.src.services.ai_comparator import AIComparator, ComparisonReport
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def make_response(provider, text, latency_ms):
+    return AIResponse(text=text, provider=provider, model="model", success=text is not None, latency_ms=latency_ms)
+
+
+@pytest.fixture
+def comparator():
+    router = MagicMock()
+    state = {"in_flight": 0, "peak": 0}
+
+    async def generate_with_both(prompt, **kwargs):
+        state["in_flight"] += 1
+        state["peak"] = max(state["peak"], state["in_flight"])
+        await asyncio.sleep(0.01 if prompt != "slow" else 0.05)
+        state["in_flight"] -= 1
+        if prompt == "fail":
+            raise RuntimeError("boom")
+        return {
+            "upstage": make_response(AIProvider.UPSTAGE, f"upstage answer to {prompt}", 100.0),
+            "openai": make_response(AIProvider.OPENAI, None if prompt == "down" else "ok", 300.0),
+        }
+
+    router.generate_with_both = generate_with_both
+    with patch("ai_agent_system.src.services.ai_comparator.get_ai_router", return_value=router):
+        comparator = AIComparator()
+    comparator.state = state
+    return comparator
+
+
+@pytest.mark.asyncio
+async def test_iter_batch_compare_bounds_concurrency_and_streams_to_disk(comparator, tmp_path):
+    prompts = ["slow"] + [f"prompt {i}" for i in range(9)] + ["down"]
+    report = ComparisonReport()
+    output_path = tmp_path / "out" / "results.jsonl"
+
+    seen = []
+    async for index, result in comparator.iter_batch_compare(
+        prompts, concurrency=3, report=report, output_path=str(output_path)
+    ):
+        seen.append(index)
+        assert report.total == len(seen)  # Updated before each result is yielded
+        assert len(output_path.read_text().splitlines()) == len(seen)  # On disk as soon as it finishes
+        assert "pairwise_similarity" in result.comparison_summary  # Scored without holding results back
+        if len(seen) == 1:
+            assert comparator.state["in_flight"] > 0  # Yielded while other comparisons are still running
+
+    assert comparator.state["peak"] == 3
+    assert sorted(seen) == list(range(len(prompts)))
+    assert seen[0] != 0  # Completion order: the slow first prompt finishes later
+    lines = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert [line["index"] for line in lines] == seen
+    summary = report.to_dict()
+    assert summary["upstage_wins"] == len(prompts)
+    assert summary["avg_upstage_latency_ms"] == 100.0
+    assert summary["avg_openai_latency_ms"] == 300.0
+
+
+@pytest.mark.asyncio
+async def test_batch_compare_keeps_prompt_order_and_reports_failures(comparator):
+    results = await comparator.batch_compare(["slow", "fail", "x"], concurrency=2)
+
+    assert [r.prompt for r in results] == ["slow", "fail", "x"]
+    assert results[1].winner is None
+    report = comparator.generate_report(results)
+    assert report["total_comparisons"] == 3 and report["failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_report_percentiles_merge_across_shards(comparator):
+    prompts = [f"prompt {i}" for i in range(6)] + ["down"]
+    shards = [ComparisonReport(), ComparisonReport()]
+    async for index, result in comparator.iter_batch_compare(prompts, concurrency=4):
+        shards[index % 2].add(result)
+
+    merged = ComparisonReport.from_state(json.loads(json.dumps(shards[0].to_state()))).merge(shards[1])
+    report = merged.to_dict()
+
+    assert report["total_comparisons"] == 7
+    assert report["providers"]["upstage"]["latency_ms"]["p99"] == 100.0
+    assert report["providers"]["openai"]["success_rate"] == round(6 / 7, 3)
+    assert report["providers"]["openai"]["latency_ms"]["count"] == 6
+    assert report["providers"]["upstage"]["tokens_per_second"]["p50"] > 0
+
+
+@pytest.mark.asyncio
+async def test_batch_compare_adds_similarity_scores(comparator):
+    results = await comparator.batch_compare(
+        ["a", "down"], references=["upstage answer to a", None], score_batch_size=2
+    )
+
+    summary = results[0].comparison_summary
+    assert 0.0 <= summary["pairwise_similarity"] < 1.0
+    assert summary["upstage_reference_similarity"] == pytest.approx(1.0)
+    assert results[1].comparison_summary["pairwise_similarity"] is None  # OpenAI failed
+    assert "upstage_reference_similarity" not in results[1].comparison_summary
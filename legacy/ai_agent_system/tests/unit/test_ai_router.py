@@ -0,0 +1,480 @@
+# ai_agent_system/tests/unit/test_ai_router.py
+import pytest
+import asyncio
+import logging
+from unittest.mock import AsyncMock, MagicMock, patch
+from ai_agent_system.src.services.ai_router import AIRouter, AIProvider, AIResponse
+from ai_agent_system.src.services.response_cache import ResponseCache
+from ai_agent_system.src.services.circuit_breaker import CircuitBreakerRegistry
+from ai_agent_system.src.services.hedging import HedgePolicy
+from ai_agent_system.src.services.provider_selector import ProviderSelector
+from ai_agent_system.src.services.scheduler import RequestScheduler, Priority
+from ai_agent_system.src.services.api_key_pool import APIKeyPool
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def make_stream_client(deltas=None, delay=0.0, error=None):
+    """Fake provider client whose text_generation_stream yields the given deltas"""
+    client = MagicMock()
+
+    async def text_generation_stream(**kwargs):
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        for delta in deltas or []:
+            yield delta
+
+    client.text_generation_stream = text_generation_stream
+    return client
+
+
+@pytest.fixture
+def router():
+    router = AIRouter()
+    router.primary_provider = AIProvider.UPSTAGE
+    router.fallback_enabled = True
+    router.max_retries = 1
+    router.upstage_client = None
+    router.openai_client = None
+    router.response_cache = ResponseCache(db_path="")
+    router.circuit_breakers = CircuitBreakerRegistry(enabled=True, failure_threshold=2, recovery_timeout=60)
+    router.hedging = HedgePolicy(enabled=False)
+    router.selector = ProviderSelector(policy="static")
+    router.scheduler = RequestScheduler(max_in_flight=8, interactive_reserved=1)
+    return router
+
+
+@pytest.mark.asyncio
+async def test_generate_uses_primary_provider(router):
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(return_value="primary text")
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.success
+    assert response.text == "primary text"
+    assert response.provider == AIProvider.UPSTAGE
+    assert not response.fallback_used
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_yields_deltas_and_final_response(router):
+    router.upstage_client = make_stream_client(["안녕", "하세요"])
+
+    chunks = [chunk async for chunk in router.generate_stream(prompt="test prompt")]
+
+    assert [c.text for c in chunks if not c.done] == ["안녕", "하세요"]
+    final = chunks[-1]
+    assert final.done
+    assert final.response.success
+    assert final.response.text == "안녕하세요"
+    assert final.response.time_to_first_token_ms is not None
+    assert not final.response.fallback_used
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_falls_back_when_primary_stalls(router):
+    router.upstage_client = make_stream_client(["slow"], delay=1.0)
+    router.openai_client = make_stream_client(["fast"])
+
+    chunks = [chunk async for chunk in router.generate_stream(prompt="test prompt", first_token_timeout=0.05)]
+
+    final = chunks[-1]
+    assert final.response.success
+    assert final.response.provider == AIProvider.OPENAI
+    assert final.response.text == "fast"
+    assert final.response.fallback_used
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_falls_back_on_error_before_first_token(router):
+    router.upstage_client = make_stream_client(error=RuntimeError("boom"))
+    router.openai_client = make_stream_client(["fallback"])
+
+    chunks = [chunk async for chunk in router.generate_stream(prompt="test prompt")]
+
+    assert chunks[-1].response.provider == AIProvider.OPENAI
+    assert chunks[-1].response.fallback_used
+
+
+@pytest.mark.asyncio
+async def test_generate_stream_reports_failure_when_all_providers_fail(router):
+    router.upstage_client = make_stream_client([])
+    router.openai_client = make_stream_client(error=RuntimeError("down"))
+
+    chunks = [chunk async for chunk in router.generate_stream(prompt="test prompt")]
+
+    assert len(chunks) == 1
+    assert chunks[0].done
+    assert not chunks[0].response.success
+    assert chunks[0].response.error == "All AI providers failed"
+
+
+@pytest.mark.asyncio
+async def test_generate_many_returns_every_prompt_in_order(router):
+    router.fallback_enabled = False
+    router.upstage_client = MagicMock()
+
+    async def text_generation(prompt, **kwargs):
+        await asyncio.sleep(0.01 if prompt == "a" else 0)
+        return prompt.upper()
+
+    router.upstage_client.text_generation = text_generation
+
+    results = [r async for r in router.generate_many(["a", "b", "c"], concurrency=2, ordered=True)]
+
+    assert [index for index, _ in results] == [0, 1, 2]
+    assert [response.text for _, response in results] == ["A", "B", "C"]
+
+
+@pytest.mark.asyncio
+async def test_call_provider_marks_rate_limited_responses(router):
+    from ai_agent_system.src.services.provider_errors import RateLimitError
+
+    router.fallback_enabled = False
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(side_effect=RateLimitError("429", "upstage"))
+
+    response = await router.generate(prompt="test prompt")
+
+    assert not response.success
+    assert response.rate_limited
+
+
+@pytest.mark.asyncio
+async def test_generate_caches_temperature_zero_by_default(router):
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(return_value="cached text")
+
+    first = await router.generate(prompt="test prompt", temperature=0)
+    second = await router.generate(prompt="test prompt", temperature=0)
+
+    assert first.success and not first.cached
+    assert second.cached
+    assert second.text == "cached text"
+    assert second.provider == AIProvider.UPSTAGE
+    router.upstage_client.text_generation.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_generate_cache_is_opt_in_for_sampling(router):
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(return_value="text")
+
+    await router.generate(prompt="test prompt", temperature=0.7)
+    await router.generate(prompt="test prompt", temperature=0.7)
+    assert router.upstage_client.text_generation.await_count == 2
+
+    await router.generate(prompt="test prompt", temperature=0.7, use_cache=True)
+    response = await router.generate(prompt="test prompt", temperature=0.7, use_cache=True)
+    assert response.cached
+    assert router.upstage_client.text_generation.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_generate_does_not_cache_failures(router):
+    router.fallback_enabled = False
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(side_effect=[None, "recovered"])
+
+    first = await router.generate(prompt="test prompt", temperature=0)
+    second = await router.generate(prompt="test prompt", temperature=0)
+
+    assert not first.success
+    assert second.success and not second.cached
+
+
+@pytest.mark.asyncio
+async def test_generate_coalesces_identical_concurrent_requests(router):
+    router.response_cache = None
+    router.upstage_client = MagicMock()
+
+    async def slow_generation(**kwargs):
+        await asyncio.sleep(0.01)
+        return "shared text"
+
+    router.upstage_client.text_generation = AsyncMock(side_effect=slow_generation)
+
+    responses = await asyncio.gather(*[router.generate(prompt="test prompt", temperature=0) for _ in range(3)])
+
+    assert all(response is responses[0] for response in responses)
+    assert responses[0].text == "shared text"
+    router.upstage_client.text_generation.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_followers_keep_their_own_deadline_and_lane(router):
+    router.response_cache = None
+    router.fallback_enabled = False
+    router.upstage_client = MagicMock()
+
+    async def slow_generation(**kwargs):
+        await asyncio.sleep(0.05)
+        return "shared text"
+
+    router.upstage_client.text_generation = AsyncMock(side_effect=slow_generation)
+
+    hurried, patient = await asyncio.gather(
+        router.generate(prompt="test prompt", temperature=0, timeout_budget=0.01),
+        router.generate(prompt="test prompt", temperature=0)
+    )
+
+    assert hurried.deadline_exceeded
+    assert patient.success and patient.text == "shared text"  # Not handed the leader's timeout
+
+    interactive, bulk = await asyncio.gather(
+        router.generate(prompt="test prompt", temperature=0),
+        router.generate(prompt="test prompt", temperature=0, priority=Priority.BULK)
+    )
+
+    assert interactive is not bulk  # Different lanes never share one call
+    assert interactive.success and bulk.success
+
+
+@pytest.mark.asyncio
+async def test_open_circuit_skips_primary(router):
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(side_effect=Exception("timeout"))
+    router.openai_client = MagicMock()
+    router.openai_client.text_generation = AsyncMock(return_value="fallback text")
+
+    for _ in range(2):
+        await router.generate(prompt="test prompt")
+    assert router.upstage_client.text_generation.await_count == 2
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.success
+    assert response.fallback_used
+    assert router.upstage_client.text_generation.await_count == 2
+    assert router.get_usage_stats()["circuit_breakers"]["upstage/solar-pro"]["state"] == "open"
+
+
+def make_delayed_client(text, delay):
+    client = MagicMock()
+    client.api_key = "test-key"
+
+    async def text_generation(**kwargs):
+        await asyncio.sleep(delay)
+        return text
+
+    client.text_generation = AsyncMock(side_effect=text_generation)
+    return client
+
+
+@pytest.mark.asyncio
+async def test_generate_hedges_slow_primary(router):
+    router.hedging = HedgePolicy(enabled=True, delay_ms=10, budget_ratio=1.0)
+    router.upstage_client = make_delayed_client("slow primary", 1.0)
+    router.openai_client = make_delayed_client("fast hedge", 0.0)
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.success
+    assert response.hedged
+    assert response.provider == AIProvider.OPENAI
+    assert response.text == "fast hedge"
+    assert router.get_usage_stats()["hedging"]["hedges_won"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_hedge_loser_counts_toward_the_hedge_delay(router):
+    router.hedging = HedgePolicy(enabled=True, delay_ms=10, budget_ratio=1.0)
+    router.upstage_client = make_delayed_client("slow primary", 1.0)
+    router.openai_client = make_delayed_client("fast hedge", 0.0)
+
+    await router.generate(prompt="test prompt")
+    await asyncio.sleep(0.01)  # Let the cancelled primary unwind
+
+    stats = router.get_usage_stats()["hedging"]
+    assert stats["censored_samples"] == 1
+    assert stats["p95_ms"]["upstage/solar-pro"] >= 10  # The slow primary's cut-off time, not nothing
+
+
+def test_spare_capacity_checks_the_key_the_pool_hands_out(router, monkeypatch):
+    router.openai_client = make_delayed_client("hedge", 0.0)
+    router.openai_client.key_pool = APIKeyPool(["key-busy", "key-next"])
+    router.openai_client.key_pool.acquire()  # key-busy has a call outstanding
+    model = router._get_default_model(AIProvider.OPENAI)
+    next_limit = get_rate_limiter().get("openai", model, "key-next")
+    monkeypatch.setattr(next_limit, "has_capacity", lambda tokens=0: False)
+
+    assert not router._has_spare_capacity(AIProvider.OPENAI, "test prompt", 100)
+
+
+@pytest.mark.asyncio
+async def test_generate_does_not_hedge_without_budget(router):
+    router.hedging = HedgePolicy(enabled=True, delay_ms=10, budget_ratio=0.0)
+    router.upstage_client = make_delayed_client("primary", 0.05)
+    router.openai_client = make_delayed_client("hedge", 0.0)
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.provider == AIProvider.UPSTAGE
+    assert not response.hedged
+    router.openai_client.text_generation.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_latency_policy_routes_to_faster_provider(router):
+    router.selector = ProviderSelector(policy="latency", exploration=0.0)
+    router.selector.record("upstage", "solar-pro", 2000.0, True)
+    router.selector.record("openai", "gpt-4o-mini", 200.0, True)
+    router.upstage_client = make_delayed_client("upstage text", 0.0)
+    router.openai_client = make_delayed_client("openai text", 0.0)
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.provider == AIProvider.OPENAI
+    assert not response.fallback_used
+    router.upstage_client.text_generation.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_explicit_model_pins_static_primary(router):
+    router.selector = ProviderSelector(policy="latency", exploration=0.0)
+    router.selector.record("upstage", "solar-pro", 2000.0, True)
+    router.selector.record("openai", "gpt-4o-mini", 200.0, True)
+    router.upstage_client = make_delayed_client("upstage text", 0.0)
+    router.openai_client = make_delayed_client("openai text", 0.0)
+
+    response = await router.generate(prompt="test prompt", model_name="solar-mini")
+
+    assert response.provider == AIProvider.UPSTAGE
+
+
+@pytest.mark.asyncio
+async def test_generate_many_runs_in_bulk_lane(router):
+    router.upstage_client = make_delayed_client("text", 0.0)
+
+    results = [item async for item in router.generate_many(["a", "b"], concurrency=2)]
+
+    assert len(results) == 2
+    stats = router.get_usage_stats()["scheduler"]
+    assert stats["bulk"]["dispatched"] == 2
+    assert stats["interactive"]["dispatched"] == 0
+
+
+@pytest.mark.asyncio
+async def test_generate_returns_failure_when_scheduler_rejects(router):
+    router.scheduler = RequestScheduler(max_in_flight=1, max_queue_size=1, reject_when_full=True)
+    router.upstage_client = make_delayed_client("text", 0.05)
+
+    responses = await asyncio.gather(*[router.generate(prompt=f"prompt {i}") for i in range(3)])
+
+    assert [r.success for r in responses].count(True) == 2
+    assert any("queue is full" in (r.error or "") for r in responses)
+
+
+@pytest.mark.asyncio
+async def test_generate_splits_deadline_between_primary_and_fallback(router):
+    router.upstage_client = make_delayed_client("too slow", 5.0)
+    router.openai_client = make_delayed_client("fallback text", 0.0)
+
+    start = asyncio.get_running_loop().time()
+    response = await router.generate(prompt="test prompt", timeout_budget=0.2)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert response.success
+    assert response.fallback_used
+    assert elapsed < 0.2
+    primary_timeout = router.upstage_client.text_generation.await_args.kwargs["timeout"]
+    assert 0 < primary_timeout <= 0.1
+
+
+@pytest.mark.asyncio
+async def test_generate_fails_fast_when_deadline_exceeded(router):
+    router.upstage_client = make_delayed_client("too slow", 5.0)
+    router.openai_client = make_delayed_client("also too slow", 5.0)
+
+    start = asyncio.get_running_loop().time()
+    response = await router.generate(prompt="test prompt", timeout_budget=0.1)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert not response.success
+    assert response.deadline_exceeded
+    assert "Deadline exceeded" in response.error
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_client_timeout_without_deadline_falls_back(router):
+    router.upstage_client = MagicMock()
+    router.upstage_client.text_generation = AsyncMock(side_effect=asyncio.TimeoutError())
+    router.openai_client = make_delayed_client("fallback text", 0.0)
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.success and response.fallback_used
+    assert not response.deadline_exceeded
+
+
+def test_provider_clients_are_created_lazily():
+    with patch("ai_agent_system.src.services.ai_router.settings") as mock_settings, \
+            patch("ai_agent_system.src.services.provider_registry.settings") as mock_registry_settings, \
+            patch("ai_agent_system.src.services.provider_registry.UpstageClient") as mock_upstage:
+        mock_settings.AI_PRIMARY_PROVIDER = "upstage"
+        mock_registry_settings.UPSTAGE_API_KEY = "test-key"
+        mock_registry_settings.OPENAI_API_KEY = None
+        mock_registry_settings.OPENAI_API_KEYS = None
+        router = AIRouter()
+        mock_upstage.assert_not_called()
+
+        assert router.upstage_client is mock_upstage.return_value
+        assert router.upstage_client is mock_upstage.return_value
+        assert router.openai_client is None
+        mock_upstage.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_warmup_opens_connections_and_probes(router):
+    router.upstage_client = make_delayed_client("ok", 0.0)
+    router.upstage_client.base_url = "https://api.upstage.ai/v1/model"
+    router.openai_client = make_delayed_client("ok", 0.0)
+    router.openai_client.base_url = "https://api.openai.com/v1/"
+    transport = MagicMock()
+    transport.warmup = AsyncMock(return_value={"https://api.upstage.ai": True, "https://api.openai.com": True})
+
+    with patch("ai_agent_system.src.services.ai_router.get_http_transport", return_value=transport):
+        result = await router.warmup(probe=True)
+
+    transport.warmup.assert_awaited_once_with(
+        ["https://api.upstage.ai/v1/model", "https://api.openai.com/v1/"], connections_per_origin=1
+    )
+    assert result["probes"] == {"upstage": True, "openai": True}
+    assert router.upstage_client.text_generation.await_args.kwargs["max_tokens"] == 1
+    assert router.get_usage_stats()["response_cache"]["sets"] == 0
+
+
+@pytest.mark.asyncio
+async def test_close_closes_the_response_cache(router, tmp_path):
+    router.response_cache = ResponseCache(db_path=str(tmp_path / "cache.sqlite3"))
+    router.upstage_client = make_delayed_client("cached text", 0.0)
+    router.upstage_client.close = AsyncMock()
+    await router.generate(prompt="test prompt", temperature=0)
+
+    await router.close()
+
+    assert router.response_cache._db is None
+    router.response_cache._memory.clear()
+    second = await router.generate(prompt="test prompt", temperature=0)
+    assert second.cached  # Disk tier reopened on use after close
+
+
+@pytest.mark.asyncio
+async def test_async_context_manager_warms_up_and_closes(router):
+    router.warmup = AsyncMock(return_value={"connections": {}})
+    router.close = AsyncMock()
+
+    async with router as entered:
+        assert entered is router
+        router.warmup.assert_awaited_once()
+        router.close.assert_not_awaited()
+
+    router.close.assert_awaited_once()
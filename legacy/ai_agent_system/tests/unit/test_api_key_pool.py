@@ -0,0 +1,100 @@
+# ai_agent_system/tests/unit/test_api_key_pool.py
+import pytest
+import logging
+from ai_agent_system.src.services.api_key_pool import (
+    APIKeyPool, parse_api_keys, outcome_for_status,
+    KEY_SUCCESS, KEY_ERROR, KEY_RATE_LIMITED, KEY_AUTH_ERROR, KEY_CANCELLED
+)
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def test_parse_api_keys():
+    assert parse_api_keys("key_a:3, key_b,,key_c:0.5") == [("key_a", 3.0), ("key_b", 1.0), ("key_c", 0.5)]
+    assert parse_api_keys(None) == []
+
+
+def test_requires_a_key():
+    with pytest.raises(ValueError):
+        APIKeyPool([None])
+
+
+def test_weighted_least_outstanding_selection():
+    pool = APIKeyPool([("heavy", 2.0), ("light", 1.0)])
+
+    picks = [pool.acquire().key for _ in range(6)]
+
+    assert picks.count("heavy") == 4
+    assert picks.count("light") == 2
+
+
+def test_release_frees_capacity():
+    pool = APIKeyPool(["a", "b"])
+
+    first = pool.acquire()
+    pool.release(first)
+
+    assert pool.acquire() is first
+    assert first.successes == 1
+
+
+def test_peek_matches_acquire_without_counting():
+    pool = APIKeyPool(["a", "b"])
+    pool.acquire()
+
+    peeked = pool.peek()
+
+    assert peeked.key == "b" and peeked.outstanding == 0
+    assert pool.acquire() is peeked
+
+
+def test_cancelled_release_is_neutral():
+    pool = APIKeyPool(["a", "b"])
+
+    key = pool.acquire()
+    pool.release(key, KEY_CANCELLED)
+
+    assert key.outstanding == 0
+    assert (key.successes, key.errors, key.rate_limited, key.auth_errors) == (0, 0, 0, 0)
+    assert key.cooldown_until == 0
+
+
+def test_rate_limited_key_cools_down():
+    pool = APIKeyPool(["a", "b"], rate_limit_cooldown=60)
+    key_a = pool.keys[0]
+
+    pool.release(pool.acquire(), KEY_RATE_LIMITED)
+
+    assert all(pool.acquire() is not key_a for _ in range(3))
+    assert pool.get_stats()[key_a.fingerprint]["rate_limited"] == 1
+
+
+def test_all_keys_cooling_uses_first_to_recover():
+    pool = APIKeyPool(["a", "b"])
+    key_a, key_b = pool.keys
+
+    pool.release(pool.acquire(), KEY_AUTH_ERROR, retry_after=None)  # a: auth cooldown
+    pool.release(pool.acquire(), KEY_RATE_LIMITED, retry_after=1.0)  # b: short cooldown
+
+    assert pool.acquire() is key_b
+    assert key_a.auth_errors == 1
+
+
+def test_single_key_is_never_cooled_down():
+    pool = APIKeyPool(["only"])
+
+    pool.release(pool.acquire(), KEY_RATE_LIMITED, retry_after=60)
+
+    assert pool.keys[0].cooldown_until == 0.0
+
+
+def test_outcome_for_status():
+    assert outcome_for_status(429) == KEY_RATE_LIMITED
+    assert outcome_for_status(401) == KEY_AUTH_ERROR
+    assert outcome_for_status(403) == KEY_AUTH_ERROR
+    assert outcome_for_status(500) == KEY_ERROR
+    assert KEY_SUCCESS == "success"
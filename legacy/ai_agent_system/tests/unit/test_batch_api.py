@@ -0,0 +1,161 @@
+# ai_agent_system/tests/unit/test_batch_api.py
+import pytest
+import asyncio
+import json
+import logging
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.batch_api import BatchProcessor, BatchStore, parse_batch_output
+from ai_agent_system.src.services.fake_provider import FakeProviderServer, FakeProviderConfig
+from ai_agent_system.src.services.openai_client import OpenAIClient
+from ai_agent_system.src.services.ai_router import AIRouter, AIProvider
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def fast_config(**overrides) -> FakeProviderConfig:
+    values = dict(latency_ms=1.0, latency_distribution="fixed", tokens_per_second=0, output_tokens=4, batch_latency_ms=20.0)
+    values.update(overrides)
+    return FakeProviderConfig(**values)
+
+
+def make_processor(server, tmp_path, **overrides) -> BatchProcessor:
+    client = OpenAIClient(api_key="fake-key", base_url=f"{server.url}/v1", provider_name="fake")
+    values = dict(
+        store=BatchStore(db_path=str(tmp_path / "batches.sqlite3")),
+        work_dir=str(tmp_path / "files"),
+        max_batch_size=10,
+        flush_interval=0.05,
+        poll_interval=0.01
+    )
+    values.update(overrides)
+    return BatchProcessor(client, **values)
+
+
+def test_parse_batch_output():
+    content = "\n".join([
+        json.dumps({"custom_id": "a", "response": {"status_code": 200, "body": {
+            "model": "gpt-4o-mini", "choices": [{"message": {"role": "assistant", "content": "hi"}}]
+        }}, "error": None}),
+        json.dumps({"custom_id": "b", "response": {"status_code": 500, "body": {"error": {"message": "boom"}}}}),
+        json.dumps({"custom_id": "c", "response": None, "error": {"code": "expired", "message": "Batch expired"}}),
+    ])
+
+    results = {r.custom_id: r for r in parse_batch_output(content)}
+
+    assert results["a"].success and results["a"].text == "hi" and results["a"].model == "gpt-4o-mini"
+    assert not results["b"].success and results["b"].error == "boom"
+    assert not results["c"].success and results["c"].error == "Batch expired"
+
+
+@pytest.mark.asyncio
+async def test_requests_accumulate_into_one_batch(tmp_path):
+    async with FakeProviderServer(fast_config()) as server:
+        processor = make_processor(server, tmp_path)
+        futures = [await processor.submit(f"prompt {i}", model_name="fake-model") for i in range(3)]
+
+        results = await asyncio.wait_for(asyncio.gather(*futures), 5)
+        await processor.close()
+
+    assert all(r.success and r.text for r in results)
+    assert server.get_stats()["batches"] == 1  # Flushed once by the timer
+    batch_files = list((tmp_path / "files").iterdir())
+    assert len(batch_files) == 1
+    lines = [json.loads(line) for line in batch_files[0].read_text().splitlines()]
+    assert [line["body"]["messages"][0]["content"] for line in lines] == ["prompt 0", "prompt 1", "prompt 2"]
+    assert processor.get_stats()["batches_finished"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_submitted_without_waiting(tmp_path):
+    async with FakeProviderServer(fast_config()) as server:
+        processor = make_processor(server, tmp_path, max_batch_size=2, flush_interval=60)
+        futures = [await processor.submit(f"prompt {i}") for i in range(2)]
+
+        results = await asyncio.wait_for(asyncio.gather(*futures), 5)
+        await processor.close()
+
+    assert all(r.success for r in results)
+
+
+@pytest.mark.asyncio
+async def test_failed_requests_resolve_with_errors(tmp_path):
+    async with FakeProviderServer(fast_config(server_error_rate=1.0)) as server:
+        processor = make_processor(server, tmp_path)
+        future = await processor.submit("prompt")
+        await processor.flush()
+
+        result = await asyncio.wait_for(future, 5)
+        await processor.close()
+
+    assert not result.success
+    assert result.error == "Injected server error"
+
+
+@pytest.mark.asyncio
+async def test_resume_after_restart(tmp_path):
+    async with FakeProviderServer(fast_config(batch_latency_ms=100.0)) as server:
+        first = make_processor(server, tmp_path)
+        await first.submit("in flight", custom_id="job-1")
+        await first.flush()
+        await first.submit("never sent", custom_id="job-2")
+        await first.close()  # "Crash" before the batch finishes and before job-2 is flushed
+
+        second = make_processor(server, tmp_path)
+        assert len(await second.resume()) == 2
+        future = await second.submit("in flight", custom_id="job-1")  # Reattach by id
+        result = await asyncio.wait_for(future, 5)
+
+        for _ in range(100):
+            if await second.get_result("job-2"):
+                break
+            await asyncio.sleep(0.02)
+        await second.close()
+
+    assert result.success
+    assert (await make_processor(server, tmp_path).get_result("job-2")).success
+    assert server.get_stats()["batches"] == 2
+
+
+@pytest.mark.asyncio
+async def test_resubmit_after_restart_reattaches_without_resume(tmp_path):
+    async with FakeProviderServer(fast_config(batch_latency_ms=100.0)) as server:
+        first = make_processor(server, tmp_path)
+        await first.submit("in flight", custom_id="j1")
+        await first.flush()
+        await first.submit("never sent", custom_id="j2")
+        await first.close()
+
+        second = make_processor(server, tmp_path)
+        futures = [
+            await second.submit("in flight", custom_id="j1"),
+            await second.submit("never sent", custom_id="j2")
+        ]
+        await second.flush()
+        results = await asyncio.wait_for(asyncio.gather(*futures), 5)
+        await second.close()
+
+    assert all(result.success for result in results)
+
+
+@pytest.mark.asyncio
+async def test_router_generate_batch(monkeypatch):
+    async with FakeProviderServer(fast_config()) as server:
+        monkeypatch.setattr(settings, "FAKE_PROVIDER_URL", server.url)
+        monkeypatch.setattr(settings, "FAKE_PROVIDER_API_FORMAT", "openai")
+        monkeypatch.setattr(settings, "AI_BATCH_PROVIDER", "fake")
+        monkeypatch.setattr(settings, "AI_BATCH_DB_PATH", "")
+        monkeypatch.setattr(settings, "AI_BATCH_DIR", "")
+        monkeypatch.setattr(settings, "AI_BATCH_POLL_SECONDS", 0.01)
+        router = AIRouter()
+
+        responses = await asyncio.wait_for(router.generate_batch(["one", "two"], max_tokens=3), 5)
+        stats = router.get_usage_stats()["batch_api"]
+        await router.get_batch_processor().close()
+
+    assert [r.success for r in responses] == [True, True]
+    assert all(r.provider == AIProvider.FAKE and len(r.text.split()) == 3 for r in responses)
+    assert stats["batches_created"] == 1
@@ -0,0 +1,148 @@
+# ai_agent_system/tests/unit/test_cascade.py
+import pytest
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock
+from ai_agent_system.src.services.ai_router import AIRouter, AIProvider
+from ai_agent_system.src.services.cascade import CascadeTracker, json_messages_validator, parse_cascade_tiers
+from ai_agent_system.src.services.circuit_breaker import CircuitBreakerRegistry
+from ai_agent_system.src.services.hedging import HedgePolicy
+from ai_agent_system.src.services.provider_selector import ProviderSelector
+from ai_agent_system.src.services.scheduler import RequestScheduler
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+VALID = json.dumps({"messages": [{"speaker": "A", "content": "hi"}, {"speaker": "B", "content": "hello"}]})
+
+
+def make_model_client(answers):
+    """Fake provider client answering per model_name"""
+    client = MagicMock()
+    client.api_key = "cascade-key"
+
+    async def text_generation(**kwargs):
+        answer = answers[kwargs["model_name"]]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    client.text_generation = AsyncMock(side_effect=text_generation)
+    return client
+
+
+@pytest.fixture
+def router():
+    router = AIRouter()
+    router.primary_provider = AIProvider.UPSTAGE
+    router.fallback_enabled = True
+    router.max_retries = 1
+    router.upstage_client = None
+    router.openai_client = None
+    router.response_cache = None
+    router.circuit_breakers = CircuitBreakerRegistry(enabled=False)
+    router.hedging = HedgePolicy(enabled=False)
+    router.selector = ProviderSelector(policy="static")
+    router.scheduler = RequestScheduler(max_in_flight=8, interactive_reserved=1)
+    return router
+
+
+def test_parse_cascade_tiers():
+    assert parse_cascade_tiers("upstage:solar-mini, OpenAI:gpt-4o-mini,bogus") == [
+        ("upstage", "solar-mini"), ("openai", "gpt-4o-mini")
+    ]
+    assert parse_cascade_tiers("") == []
+
+
+def test_json_messages_validator():
+    validate = json_messages_validator(expected_count=2)
+
+    assert validate(VALID)
+    assert validate(f"```json\n{VALID}\n```")
+    assert validate(json.dumps([{"text": "a"}, {"text": "b"}]))
+    assert not validate(json.dumps({"messages": [{"content": "only one"}]}))
+    assert not validate(json.dumps({"messages": [{"content": "a"}, {"content": " "}]}))
+    assert not validate("Sure! Here is the conversation:")
+
+
+def test_tracker_escalation_rate_per_task_type():
+    tracker = CascadeTracker()
+    tracker.record_outcome("conversation", "upstage:solar-mini", escalated=False)
+    tracker.record_escalation("conversation", "upstage:solar-mini", "invalid")
+    tracker.record_outcome("conversation", "upstage:solar-pro", escalated=True)
+    tracker.record_outcome("summary", "upstage:solar-mini", escalated=False)
+
+    stats = tracker.get_stats()
+
+    assert stats["conversation"]["escalation_rate"] == 0.5
+    assert stats["conversation"]["escalations"] == {"upstage:solar-mini": {"invalid": 1}}
+    assert stats["summary"]["escalation_rate"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_cascade_accepts_small_model_answer(router):
+    router.upstage_client = make_model_client({"solar-mini": VALID, "solar-pro": VALID})
+
+    response = await router.generate_cascade(
+        "prompt", json_messages_validator(2), task_type="conversation", tiers=[(AIProvider.UPSTAGE, "solar-mini")]
+    )
+
+    assert response.success and response.model == "solar-mini"
+    assert not response.escalated
+    assert router.upstage_client.text_generation.await_count == 1
+    assert router.get_usage_stats()["cascade"]["conversation"]["accepted_by"] == {"upstage:solar-mini": 1}
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_on_validation_failure(router):
+    router.upstage_client = make_model_client({"solar-mini": "not json", "solar-pro": VALID})
+
+    response = await router.generate_cascade(
+        "prompt", json_messages_validator(2), task_type="conversation", tiers=[(AIProvider.UPSTAGE, "solar-mini")]
+    )
+
+    assert response.success and response.model == "solar-pro"
+    assert response.escalated
+    stats = router.cascade.get_stats()["conversation"]
+    assert stats["escalation_rate"] == 1.0
+    assert stats["escalations"] == {"upstage:solar-mini": {"invalid": 1}}
+
+
+@pytest.mark.asyncio
+async def test_cascade_escalates_on_error_and_raising_validator(router):
+    router.upstage_client = make_model_client({"solar-mini": RuntimeError("boom"), "solar-pro": VALID})
+    router.openai_client = make_model_client({"gpt-4o-mini": "{}"})
+
+    def validator(text):
+        return json.loads(text)["messages"]  # KeyError on "{}" rejects the answer
+
+    response = await router.generate_cascade(
+        "prompt",
+        validator,
+        tiers=[(AIProvider.UPSTAGE, "solar-mini"), (AIProvider.OPENAI, "gpt-4o-mini")]
+    )
+
+    assert response.success and response.model == "solar-pro"
+    assert router.cascade.get_stats()["default"]["escalations"] == {
+        "upstage:solar-mini": {"error": 1},
+        "openai:gpt-4o-mini": {"invalid": 1}
+    }
+
+
+@pytest.mark.asyncio
+async def test_cascade_fails_when_final_answer_is_invalid(router):
+    router.fallback_enabled = False
+    router.upstage_client = make_model_client({"solar-mini": "bad", "solar-pro": "still bad"})
+
+    response = await router.generate_cascade(
+        "prompt", json_messages_validator(), tiers=[(AIProvider.UPSTAGE, "solar-mini")]
+    )
+
+    assert not response.success
+    assert response.text == "still bad"
+    assert response.error == "Response failed validation"
+    assert router.cascade.get_stats()["default"]["failure_rate"] == 1.0
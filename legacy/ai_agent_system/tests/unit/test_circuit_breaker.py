@@ -0,0 +1,91 @@
+# ai_agent_system/tests/unit/test_circuit_breaker.py
+import pytest
+import logging
+from ai_agent_system.src.services.circuit_breaker import CircuitBreaker, CircuitBreakerRegistry, CircuitState
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def make_breaker(**kwargs):
+    options = dict(failure_threshold=3, error_rate_threshold=0.5, window_size=10, min_requests=4,
+                   recovery_timeout=60, half_open_max_calls=1)
+    options.update(kwargs)
+    return CircuitBreaker(name="test", **options)
+
+
+def test_opens_after_consecutive_failures():
+    breaker = make_breaker()
+
+    for _ in range(3):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.get_stats()["rejected"] == 1
+
+
+def test_opens_on_rolling_error_rate():
+    breaker = make_breaker(failure_threshold=100)
+
+    for failed in [False, True, False, True]:
+        breaker.record_failure() if failed else breaker.record_success()
+
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_half_open_allows_limited_probes_and_closes_on_success():
+    breaker = make_breaker(recovery_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # only one probe at a time
+
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+
+def test_half_open_probe_failure_reopens():
+    breaker = make_breaker(recovery_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.get_stats()["times_opened"] == 2
+
+
+def test_release_frees_probe_slot():
+    breaker = make_breaker(recovery_timeout=0)
+    for _ in range(3):
+        breaker.record_failure()
+
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+
+def test_registry_keys_by_provider_and_model():
+    registry = CircuitBreakerRegistry(enabled=True, failure_threshold=1)
+
+    registry.get("upstage", "solar-pro").record_failure()
+
+    assert registry.is_open("upstage", "solar-pro")
+    assert not registry.is_open("upstage", "solar-mini")
+    assert registry.allow_request("openai", "gpt-4o-mini")
+    assert registry.get_stats()["upstage/solar-pro"]["state"] == "open"
+
+
+def test_disabled_registry_always_allows():
+    registry = CircuitBreakerRegistry(enabled=False, failure_threshold=1)
+    registry.get("upstage", "solar-pro").record_failure()
+
+    assert registry.allow_request("upstage", "solar-pro")
@@ -0,0 +1,87 @@
+# ai_agent_system/tests/unit/test_comparison_jobs.py
+import pytest
+import asyncio
+import logging
+from unittest.mock import MagicMock, patch
+from ai_agent_system.src.services.ai_router import AIProvider, AIResponse
+from ai_agent_system.src.services.ai_comparator import AIComparator
+from ai_agent_system.src.services.comparison_jobs import ComparisonCheckpoint, ComparisonJob
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+@pytest.fixture
+def comparator():
+    router = MagicMock()
+    router.calls = []
+
+    async def generate_with_both(prompt, **kwargs):
+        router.calls.append(prompt)
+        await asyncio.sleep(0.01)
+        if prompt == "fails":
+            return {}
+        return {
+            "upstage": AIResponse(text=f"u {prompt}", provider=AIProvider.UPSTAGE, model="m", success=True, latency_ms=10.0),
+            "openai": AIResponse(text=f"o {prompt}", provider=AIProvider.OPENAI, model="m", success=True, latency_ms=20.0),
+        }
+
+    router.generate_with_both = generate_with_both
+    with patch("ai_agent_system.src.services.ai_comparator.get_ai_router", return_value=router):
+        comparator = AIComparator()
+    comparator.router = router
+    return comparator
+
+
+@pytest.mark.asyncio
+async def test_restart_skips_completed_items(comparator, tmp_path):
+    db_path = str(tmp_path / "jobs.sqlite3")
+    prompts = [f"prompt {i}" for i in range(20)]
+
+    first = ComparisonJob(comparator, "nightly", ComparisonCheckpoint(db_path))
+    task = asyncio.ensure_future(first.run(prompts, concurrency=2, score_batch_size=1))
+    while len(first.checkpoint.completed_hashes("nightly")) < 5:
+        await asyncio.sleep(0.005)
+    task.cancel()  # Cancelled mid-run
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    first.checkpoint.close()
+    done_before = len(comparator.router.calls)
+
+    second = ComparisonJob(comparator, "nightly", ComparisonCheckpoint(db_path))
+    report = await second.run(prompts, score_batch_size=1)
+
+    assert len(comparator.router.calls) - done_before <= 20 - 5
+    assert len(set(comparator.router.calls)) == 20
+    assert report.to_dict()["total_comparisons"] == 20
+    assert [index for index, _ in second.results()] == list(range(20))
+    status = second.status()
+    assert status["status"] == "completed" and status["completed"] == 20
+    assert status["concurrency"] == 2  # Continued at the original concurrency
+
+
+@pytest.mark.asyncio
+async def test_failed_items_are_retried_and_params_must_match(comparator):
+    job = ComparisonJob(comparator, "job", ComparisonCheckpoint(db_path=""))
+    await job.run(["ok", "fails"], max_tokens=50)
+    await job.run(["ok", "fails"], max_tokens=50)
+
+    assert comparator.router.calls.count("ok") == 1
+    assert comparator.router.calls.count("fails") == 2
+    status = job.status()
+    assert status["status"] == "partial" and (status["completed"], status["total"]) == (1, 2)
+    with pytest.raises(ValueError):
+        await job.run(["ok"], max_tokens=100)
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompts_are_compared_once(comparator):
+    job = ComparisonJob(comparator, "dupes", ComparisonCheckpoint(db_path=""))
+    await job.run(["a", "b", "a"])
+
+    assert sorted(comparator.router.calls) == ["a", "b"]
+    status = job.status()
+    assert status["status"] == "completed" and (status["completed"], status["total"]) == (2, 2)
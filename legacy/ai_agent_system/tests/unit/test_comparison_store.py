@@ -0,0 +1,96 @@
+# ai_agent_system/tests/unit/test_comparison_store.py
+import pytest
+import asyncio
+import logging
+from unittest.mock import MagicMock, patch
+from ai_agent_system.src.services.ai_router import AIProvider, AIResponse
+from ai_agent_system.src.services.ai_comparator import AIComparator, ComparisonResult
+from ai_agent_system.src.services.comparison_store import ComparisonStore
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def make_result(i, winner="upstage", openai_ok=True):
+    def response(provider, latency, ok=True):
+        return {
+            "text": f"{provider} answer {i}\nsecond line" if ok else None,
+            "provider": provider,
+            "model": f"{provider}-model",
+            "success": ok,
+            "error": None if ok else "boom",
+            "metrics": {"response_length": 20, "word_count": 4, "latency_ms": latency, "estimated_tokens": 6}
+        }
+    return ComparisonResult(
+        prompt=f"prompt {i}",
+        timestamp="2026-01-01T00:00:00+00:00",
+        upstage_response=response("upstage", 100.0 + i),
+        openai_response=response("openai", 300.0, openai_ok),
+        comparison_summary={},
+        winner=winner
+    )
+
+
+def test_append_load_filter_and_aggregate(tmp_path):
+    store = ComparisonStore(str(tmp_path))
+    with store.writer("run-a", chunk_size=4) as writer:
+        for i in range(10):
+            writer.append(i, make_result(i, openai_ok=i % 5 != 0))
+    with store.writer("run-b") as writer:
+        writer.append(0, make_result(0, winner=None, openai_ok=False))
+
+    table = store.load()
+
+    assert store.runs() == ["run-a", "run-b"]
+    assert len(table) == 11
+    assert len(list((tmp_path / "run-a").glob("chunk-*.npz"))) == 3
+    assert table.win_counts() == {"failures": 1, "upstage": 10, "openai": 0, "tie": 0}
+    run_a = table.filter(run="run-a")
+    assert run_a.provider_summary("openai")["success_rate"] == 0.8
+    assert run_a.provider_summary("upstage")["p50_latency_ms"] == pytest.approx(104.5)
+    failed = table.filter(winner=None)
+    assert failed.string("prompt", 0) == "prompt 0" and failed.string("openai_error", 0) == "boom"
+    assert failed.string("openai_text", 0) is None
+    assert table.filter(run="run-a").string("upstage_text", 7) == "upstage answer 7\nsecond line"
+    assert set(table.summary_by_run()) == {"run-a", "run-b"}
+
+
+def test_reopened_run_appends_after_existing_rows(tmp_path):
+    store = ComparisonStore(str(tmp_path))
+    with store.writer("run") as writer:
+        writer.append(0, make_result(0))
+    with store.writer("run") as writer:
+        writer.append(1, make_result(1))
+
+    table = store.load(["run"])
+
+    assert list(table["index"]) == [0, 1]
+    assert [table.string("prompt", row) for row in range(2)] == ["prompt 0", "prompt 1"]
+
+
+@pytest.mark.asyncio
+async def test_batch_compare_appends_while_running(tmp_path):
+    router = MagicMock()
+    store = ComparisonStore(str(tmp_path))
+    visible = []
+
+    async def generate_with_both(prompt, **kwargs):
+        await asyncio.sleep(0.01)
+        visible.append(len(store.load()))
+        return {"upstage": AIResponse(text="a", provider=AIProvider.UPSTAGE, model="m", success=True, latency_ms=5.0)}
+
+    router.generate_with_both = generate_with_both
+    with patch("ai_agent_system.src.services.ai_comparator.get_ai_router", return_value=router):
+        comparator = AIComparator()
+
+    with store.writer("live", chunk_size=2) as writer:
+        results = await comparator.batch_compare(
+            [f"p{i}" for i in range(6)], concurrency=1, run_writer=writer, score_batch_size=1
+        )
+
+    assert len(results) == 6
+    assert max(visible) >= 4  # Earlier chunks were on disk before the batch finished
+    assert len(store.load()) == 6
@@ -0,0 +1,106 @@
+# ai_agent_system/tests/unit/test_concurrency.py
+import pytest
+import asyncio
+import logging
+from ai_agent_system.src.utils.concurrency import AdaptiveConcurrency, bounded_map
+from ai_agent_system.src.services.provider_errors import RateLimitError
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_caps_in_flight_calls():
+    in_flight = 0
+    peak = 0
+
+    async def worker(item):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return item * 2
+
+    results = [r async for r in bounded_map(list(range(20)), worker, concurrency=3)]
+
+    assert peak == 3
+    assert sorted(results) == [(i, i * 2) for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_ordered_yields_input_order():
+    async def worker(item):
+        await asyncio.sleep(item)
+        return item
+
+    delays = [0.03, 0.01, 0.02, 0.0]
+    results = [r async for r in bounded_map(delays, worker, concurrency=4, ordered=True)]
+
+    assert [index for index, _ in results] == [0, 1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_unordered_yields_as_completed():
+    async def worker(item):
+        await asyncio.sleep(item)
+        return item
+
+    results = [r async for r in bounded_map([0.03, 0.0], worker, concurrency=2)]
+
+    assert [index for index, _ in results] == [1, 0]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_retries_and_shrinks_window_on_rate_limit():
+    calls = {}
+
+    async def worker(item):
+        calls[item] = calls.get(item, 0) + 1
+        if item == 0 and calls[item] == 1:
+            raise RateLimitError("429", "upstage", retry_after=0.01)
+        return item
+
+    window = AdaptiveConcurrency(4)
+    results = dict([r async for r in bounded_map([0, 1, 2, 3], worker, window=window)])
+
+    assert results == {0: 0, 1: 1, 2: 2, 3: 3}
+    assert calls[0] == 2
+    assert window.rate_limited_count == 1
+    assert window.epoch == 1
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_gives_up_after_max_retries_with_predicate():
+    async def worker(item):
+        return "rate-limited"
+
+    results = [r async for r in bounded_map(
+        [1], worker, is_rate_limited=lambda r: r == "rate-limited", max_rate_limit_retries=1,
+        window=AdaptiveConcurrency(1, default_pause=0.0)
+    )]
+
+    assert results == [(0, "rate-limited")]
+
+
+@pytest.mark.asyncio
+async def test_bounded_map_errors_yield_none():
+    async def worker(item):
+        raise ValueError("boom")
+
+    assert [r async for r in bounded_map([1], worker)] == [(0, None)]
+
+
+def test_adaptive_concurrency_halves_once_per_epoch_and_recovers():
+    window = AdaptiveConcurrency(8, default_pause=0.0)
+
+    window.on_rate_limited(launch_epoch=0)
+    window.on_rate_limited(launch_epoch=0)  # launched before the shrink
+    assert window.limit == 4
+
+    for _ in range(4):
+        window.on_success()
+    assert window.limit == 5
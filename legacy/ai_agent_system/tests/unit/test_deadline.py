@@ -0,0 +1,36 @@
+# ai_agent_system/tests/unit/test_deadline.py
+import pytest
+import time
+import logging
+from ai_agent_system.src.utils.deadline import Deadline
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def test_remaining_and_share():
+    deadline = Deadline.after(10.0)
+
+    assert 9.0 < deadline.remaining() <= 10.0
+    assert 4.5 < deadline.share(2) <= 5.0
+    assert not deadline.expired()
+
+
+def test_expired_deadline():
+    deadline = Deadline.after(0.0)
+    time.sleep(0.001)
+
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
+
+
+def test_resolve_keeps_earliest_deadline():
+    inherited = Deadline.after(1.0)
+
+    assert Deadline.resolve(inherited, None) is inherited
+    assert Deadline.resolve(inherited, 5.0) is inherited
+    assert Deadline.resolve(inherited, 0.5).remaining() <= 0.5
+    assert Deadline.resolve(None, None) is None
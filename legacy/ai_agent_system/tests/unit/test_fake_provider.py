@@ -0,0 +1,139 @@
+# ai_agent_system/tests/unit/test_fake_provider.py
+import pytest
+import logging
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.fake_provider import FakeProviderServer, FakeProviderConfig
+from ai_agent_system.src.services.upstage_client import UpstageClient
+from ai_agent_system.src.services.openai_client import OpenAIClient
+from ai_agent_system.src.services.provider_errors import ProviderError, RateLimitError
+from ai_agent_system.src.services.ai_router import AIRouter, AIProvider
+from ai_agent_system.src.services.response_cache import ResponseCache
+from ai_agent_system.src.services.http_transport import close_http_transport
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def fast_config(**overrides) -> FakeProviderConfig:
+    values = dict(latency_ms=1.0, latency_distribution="fixed", tokens_per_second=0, output_tokens=8, seed=7)
+    values.update(overrides)
+    return FakeProviderConfig(**values)
+
+
+@pytest.mark.asyncio
+async def test_upstage_shape_generate_and_stream():
+    async with FakeProviderServer(fast_config()) as server:
+        client = UpstageClient(api_key="fake-key", base_url=f"{server.url}/v1/model", provider_name="fake")
+
+        text = await client.text_generation(prompt="hello", model_name="fake-model", max_tokens=5)
+        deltas = [delta async for delta in client.text_generation_stream(prompt="hello", model_name="fake-model", max_tokens=5)]
+
+    assert len(text.split()) == 5
+    assert len(deltas) == 5
+    assert "".join(deltas) == text  # Same prompt, same completion
+    assert client.total_output_tokens == 10
+    assert server.get_stats()["requests"] == 2
+    assert server.get_stats()["streams"] == 1
+
+
+@pytest.mark.asyncio
+async def test_openai_shape_generate_and_stream():
+    async with FakeProviderServer(fast_config()) as server:
+        client = OpenAIClient(api_key="fake-key", base_url=f"{server.url}/v1", provider_name="fake")
+
+        text = await client.text_generation(prompt="hello", model_name="fake-model")
+        deltas = [delta async for delta in client.text_generation_stream(prompt="hello", model_name="fake-model")]
+
+    assert len(text.split()) == 8
+    assert "".join(deltas) == text
+    assert client.total_output_tokens == 16
+
+
+@pytest.mark.asyncio
+async def test_abandoned_openai_stream_frees_its_transport_slot():
+    async with FakeProviderServer(fast_config()) as server:
+        client = OpenAIClient(api_key="fake-key-abandon", base_url=f"{server.url}/v1", provider_name="fake")
+        in_flight_before = client.transport.in_flight
+
+        stream = client.text_generation_stream(prompt="hello", model_name="fake-model")
+        assert await stream.__anext__()
+        await stream.aclose()  # Consumer stops after the first delta
+
+        assert client.transport.in_flight == in_flight_before
+
+
+@pytest.mark.asyncio
+async def test_clients_survive_the_shared_transport_being_closed():
+    async with FakeProviderServer(fast_config()) as server:
+        upstage = UpstageClient(api_key="fake-key", base_url=f"{server.url}/v1/model", provider_name="fake")
+        openai = OpenAIClient(api_key="fake-key", base_url=f"{server.url}/v1", provider_name="fake")
+        await upstage.text_generation(prompt="hello", model_name="fake-model")
+        await openai.text_generation(prompt="hello", model_name="fake-model")
+
+        await close_http_transport()  # E.g. another router shutting down
+
+        assert await upstage.text_generation(prompt="hello", model_name="fake-model", raise_on_error=True)
+        assert await openai.text_generation(prompt="hello", model_name="fake-model", raise_on_error=True)
+
+
+@pytest.mark.asyncio
+async def test_injected_rate_limits_and_server_errors():
+    # Separate keys per scenario: a 429 pauses the client-side bucket for the key
+    async with FakeProviderServer(fast_config(rate_limit_rate=1.0, retry_after=2.5)) as server:
+        client = UpstageClient(api_key="fake-key-429", base_url=f"{server.url}/v1/model", provider_name="fake")
+        with pytest.raises(RateLimitError) as excinfo:
+            await client.text_generation(prompt="hello", model_name="fake-model", raise_on_error=True)
+    assert excinfo.value.retry_after == pytest.approx(2.5)
+    assert excinfo.value.provider == "fake"
+
+    async with FakeProviderServer(fast_config(server_error_rate=1.0)) as server:
+        client = UpstageClient(api_key="fake-key-5xx", base_url=f"{server.url}/v1/model", provider_name="fake")
+        with pytest.raises(ProviderError) as excinfo:
+            await client.text_generation(prompt="hello", model_name="fake-model", raise_on_error=True)
+    assert excinfo.value.status_code in (500, 502, 503)
+    assert server.get_stats()["server_errors"] == 1
+
+
+@pytest.mark.asyncio
+async def test_server_side_requests_per_minute_limit():
+    async with FakeProviderServer(fast_config(requests_per_minute=2)) as server:
+        client = UpstageClient(api_key="fake-key-rpm", base_url=f"{server.url}/v1/model", provider_name="fake")
+        results = [await client.text_generation(prompt="hello", model_name="fake-model") for _ in range(3)]
+
+    assert results[0] and results[1]
+    assert results[2] is None
+    assert server.get_stats()["rate_limited"] == 1
+
+
+def test_latency_distributions():
+    assert FakeProviderServer(fast_config(latency_ms=100.0)).sample_latency() == pytest.approx(0.1)
+
+    server = FakeProviderServer(fast_config(latency_ms=100.0, latency_distribution="lognormal", latency_jitter=0.5))
+    samples = sorted(server.sample_latency() for _ in range(2001))
+    assert 0.08 < samples[1000] < 0.12  # Median stays at latency_ms
+    assert samples[-1] > 0.2  # Long tail
+
+    with pytest.raises(ValueError):
+        FakeProviderServer(fast_config(latency_distribution="bimodal"))
+
+
+@pytest.mark.asyncio
+async def test_router_targets_fake_provider_through_settings(monkeypatch):
+    async with FakeProviderServer(fast_config()) as server:
+        monkeypatch.setattr(settings, "FAKE_PROVIDER_URL", server.url)
+        monkeypatch.setattr(settings, "FAKE_PROVIDER_API_FORMAT", "openai")
+        router = AIRouter()
+        router.primary_provider = AIProvider.FAKE
+        router.response_cache = ResponseCache(db_path="")
+        router.scheduler = None
+
+        response = await router.generate(prompt="hello", max_tokens=4)
+
+    assert response.success
+    assert response.provider == AIProvider.FAKE
+    assert response.model == "fake-model"
+    assert len(response.text.split()) == 4
+    assert router.get_usage_stats()["fake"]["api_call_count"] == 1
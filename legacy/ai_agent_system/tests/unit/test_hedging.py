@@ -0,0 +1,56 @@
+# ai_agent_system/tests/unit/test_hedging.py
+import pytest
+import logging
+from ai_agent_system.src.services.hedging import HedgePolicy, LatencyWindow
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def test_latency_window_percentile():
+    window = LatencyWindow(size=100)
+    for latency in range(1, 101):
+        window.record(float(latency))
+
+    assert window.percentile(0.95) == 96.0
+    assert window.percentile(0.5) == 51.0
+    assert LatencyWindow().percentile(0.95) is None
+
+
+def test_hedge_delay_uses_live_percentile_after_min_samples():
+    policy = HedgePolicy(enabled=True, delay_ms=0, percentile=0.95, min_samples=10)
+
+    for _ in range(9):
+        policy.record_latency("upstage", "solar-pro", 1000.0)
+    assert policy.hedge_delay("upstage", "solar-pro") is None
+
+    policy.record_latency("upstage", "solar-pro", 1000.0)
+    assert policy.hedge_delay("upstage", "solar-pro") == 1.0
+
+
+def test_fixed_delay_overrides_percentile():
+    policy = HedgePolicy(enabled=True, delay_ms=250)
+
+    assert policy.hedge_delay("upstage", "solar-pro") == 0.25
+
+
+def test_disabled_policy_never_hedges():
+    policy = HedgePolicy(enabled=False, delay_ms=250)
+
+    assert policy.hedge_delay("upstage", "solar-pro") is None
+
+
+def test_budget_limits_hedge_rate():
+    policy = HedgePolicy(enabled=True, delay_ms=100, budget_ratio=0.05)
+
+    hedges = 0
+    for _ in range(100):
+        policy.hedge_delay("upstage", "solar-pro")
+        if policy.try_spend():
+            hedges += 1
+
+    assert hedges == 5
+    assert policy.get_stats()["budget_exhausted"] == 95
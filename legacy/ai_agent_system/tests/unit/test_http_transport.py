@@ -0,0 +1,96 @@
+# ai_agent_system/tests/unit/test_http_transport.py
+import pytest
+import httpx
+import asyncio
+from ai_agent_system.src.services.http_transport import (
+    HTTPTransport, HTTP2_AVAILABLE, get_http_transport, close_http_transport
+)
+
+
+def _make_transport(handler, max_connections=2):
+    transport = HTTPTransport(max_connections=max_connections, max_keepalive_connections=max_connections, http2=False)
+    transport.client._transport._inner = httpx.MockTransport(handler)
+    return transport
+
+
+@pytest.mark.asyncio
+async def test_request_updates_pool_metrics():
+    transport = _make_transport(lambda request: httpx.Response(200, json={"ok": True}))
+
+    response = await transport.client.post("https://api.example.com/generate", json={})
+
+    assert response.json() == {"ok": True}
+    metrics = transport.get_metrics()
+    assert metrics["total_requests"] == 1
+    assert metrics["in_flight"] == 0
+    assert metrics["peak_in_flight"] == 1
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_requests_beyond_max_connections_wait_for_slot():
+    async def slow_handler(request):
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    transport = _make_transport(slow_handler, max_connections=1)
+
+    await asyncio.gather(*[transport.client.get("https://api.example.com/") for _ in range(3)])
+
+    metrics = transport.get_metrics()
+    assert metrics["peak_in_flight"] == 1
+    assert metrics["peak_saturation"] == 1.0
+    assert metrics["waited_requests"] == 2
+    assert metrics["max_wait_ms"] >= 40
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_streamed_response_holds_slot_until_closed():
+    transport = _make_transport(lambda request: httpx.Response(200, content=b"data: hello\n\n"))
+
+    async with transport.client.stream("POST", "https://api.example.com/stream") as response:
+        assert transport.in_flight == 1
+        await response.aread()
+
+    assert transport.in_flight == 0
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_warmup_reports_reachable_origins():
+    def handler(request):
+        if request.url.host == "down.example.com":
+            raise httpx.ConnectError("unreachable", request=request)
+        return httpx.Response(405)
+
+    transport = _make_transport(handler)
+
+    results = await transport.warmup([
+        "https://api.example.com/v1/model",
+        "https://api.example.com/v1/chat",
+        "https://down.example.com/v1"
+    ])
+
+    assert results == {"https://api.example.com": True, "https://down.example.com": False}
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_http_transport_is_shared_until_closed():
+    first = get_http_transport()
+    assert get_http_transport() is first
+
+    await close_http_transport()
+    assert get_http_transport() is not first
+    await close_http_transport()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not HTTP2_AVAILABLE, reason="HTTP/2 needs the 'h2' package")
+async def test_http2_slots_allow_multiplexed_streams():
+    transport = HTTPTransport(max_connections=2, http2=True, max_streams_per_connection=10)
+
+    assert transport.get_metrics()["max_in_flight"] == 20
+    assert HTTPTransport(max_connections=2, http2=False).get_metrics()["max_in_flight"] == 2
+    await transport.aclose()
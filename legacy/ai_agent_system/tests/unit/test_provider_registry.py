@@ -0,0 +1,143 @@
+# ai_agent_system/tests/unit/test_provider_registry.py
+import pytest
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock
+from ai_agent_system.src.config.settings import settings
+from ai_agent_system.src.services.ai_router import AIRouter, AIProvider
+from ai_agent_system.src.services.provider_registry import (
+    ProviderRegistry, ProviderSpec, builtin_providers, load_extra_providers
+)
+from ai_agent_system.src.services.openai_client import OpenAIClient
+from ai_agent_system.src.services.circuit_breaker import CircuitBreakerRegistry
+from ai_agent_system.src.services.hedging import HedgePolicy
+from ai_agent_system.src.services.provider_selector import ProviderSelector
+from ai_agent_system.src.services.scheduler import RequestScheduler
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def make_client(text=None, error=None):
+    client = MagicMock()
+    client.api_key = f"registry-key-{id(client)}"
+    client.text_generation = AsyncMock(return_value=text, side_effect=error)
+    return client
+
+
+def make_spec(name, client, fallback=True) -> ProviderSpec:
+    return ProviderSpec(name=name, client_factory=lambda: client, default_model=f"{name}-model", fallback=fallback)
+
+
+@pytest.fixture
+def router():
+    router = AIRouter()
+    router.primary_provider = AIProvider.UPSTAGE
+    router.fallback_enabled = True
+    router.max_retries = 1
+    router.response_cache = None
+    router.circuit_breakers = CircuitBreakerRegistry(enabled=False)
+    router.hedging = HedgePolicy(enabled=False)
+    router.selector = ProviderSelector(policy="static")
+    router.scheduler = RequestScheduler(max_in_flight=8, interactive_reserved=1)
+    return router
+
+
+def test_ai_provider_compares_to_plain_names():
+    assert AIProvider("openai") == AIProvider.OPENAI == "openai"
+    assert AIProvider.UPSTAGE.value == "upstage"
+    assert {AIProvider.FAKE: 1}["fake"] == 1
+
+
+def test_load_extra_providers():
+    specs = load_extra_providers(json.dumps([
+        {"name": "vLLM", "base_url": "http://gpu-1:8000/v1", "default_model": "llama-3-8b",
+         "rpm": 600, "tpm": 1000000, "pricing": {"llama-3-8b": [0.0001, 0.0002]}},
+        {"name": "broken", "api_format": "grpc", "base_url": "x", "default_model": "m"},
+        {"name": "missing-model", "base_url": "x"},
+    ]))
+
+    assert [spec.name for spec in specs] == ["vllm"]
+    spec = specs[0]
+    assert spec.estimate_cost("llama-3-8b", 1000, 1000) == pytest.approx(0.0003)
+    assert spec.estimate_cost("other", 1000, 1000) is None
+    client = spec.build_client()
+    assert isinstance(client, OpenAIClient)
+    assert client.provider_name == "vllm" and client.base_url.startswith("http://gpu-1:8000/v1")
+
+    # Client usage stats are priced from the spec, not from constants in the client
+    client._count_usage("llama-3-8b", input_tokens=1000, output_tokens=1000)
+    client._count_usage("unlisted-model", input_tokens=1000)
+    stats = client.get_usage_stats()
+    assert stats["estimated_total_cost"] == pytest.approx(0.0003)
+    assert stats["unpriced_models"] == ["unlisted-model"]
+
+
+def test_resolve_rejects_unknown_providers():
+    registry = ProviderRegistry(builtin_providers())
+
+    assert registry.resolve(" OpenAI ") == AIProvider.OPENAI
+    with pytest.raises(ValueError, match="Unknown AI provider 'opnai'"):
+        registry.resolve("opnai")
+
+
+@pytest.mark.asyncio
+async def test_router_entry_points_reject_unknown_providers(router, monkeypatch):
+    with pytest.raises(ValueError):
+        await router.generate(prompt="p", force_provider="opnai")
+    with pytest.raises(ValueError):
+        await router.generate_cascade("p", validator=lambda text: True, tiers=[("upstge", "solar-mini")])
+    monkeypatch.setattr(settings, "AI_BATCH_PROVIDER", "opnai")
+    with pytest.raises(ValueError):
+        router.get_batch_processor()
+
+
+def test_fallback_chain_order(monkeypatch):
+    registry = ProviderRegistry(builtin_providers() + [make_spec("vllm", None)])
+
+    assert registry.fallback_chain("upstage") == ["openai", "vllm"]
+    assert registry.fallback_chain("fake") == ["upstage", "openai", "vllm"]
+
+    monkeypatch.setattr(settings, "AI_FALLBACK_CHAIN", "vllm, upstage, unknown")
+    assert registry.fallback_chain("upstage") == ["vllm"]
+
+    with pytest.raises(ValueError):
+        registry.register(make_spec("vllm", None))
+
+
+@pytest.mark.asyncio
+async def test_fallback_walks_the_whole_chain(router):
+    router.providers = ProviderRegistry([
+        make_spec("upstage", make_client(error=RuntimeError("down"))),
+        make_spec("region-b", make_client(error=RuntimeError("also down"))),
+        make_spec("unconfigured", None),
+        make_spec("vllm", make_client(text="self-hosted")),
+    ])
+
+    response = await router.generate(prompt="test prompt")
+
+    assert response.success and response.fallback_used
+    assert response.provider == "vllm" and response.model == "vllm-model"
+
+
+@pytest.mark.asyncio
+async def test_generate_with_all_and_health(router):
+    router.providers = ProviderRegistry([
+        make_spec("upstage", make_client(text="a")),
+        make_spec("openai", make_client(text="b")),
+        make_spec("vllm", make_client(text="c")),
+        make_spec("unconfigured", None),
+    ])
+
+    results = await router.generate_with_all("test prompt")
+    both = await router.generate_with_both("test prompt")
+    health = router.get_usage_stats()["providers"]
+
+    assert {name: r.text for name, r in results.items()} == {"upstage": "a", "openai": "b", "vllm": "c"}
+    assert set(both) == {"upstage", "openai"}
+    assert health["vllm"]["client"] == "ready"
+    assert health["unconfigured"]["client"] == "unavailable"
+    assert health["vllm"]["default_model"] == "vllm-model"
@@ -0,0 +1,86 @@
+# ai_agent_system/tests/unit/test_provider_selector.py
+import pytest
+import logging
+import random
+from ai_agent_system.src.services.provider_selector import ProviderSelector, ProviderStats
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+CANDIDATES = [("upstage", "upstage", "solar-pro"), ("openai", "openai", "gpt-4o-mini")]
+
+
+def test_ewma_latency_and_error_rate():
+    stats = ProviderStats(alpha=0.5)
+
+    stats.record(100.0, True)
+    stats.record(200.0, True)
+    stats.record(0.0, False)
+
+    assert stats.ewma_latency_ms == 150.0
+    assert stats.ewma_error_rate == 0.5
+    assert stats.expected_latency_ms() == 300.0
+    assert stats.throughput() > 0
+
+
+def test_static_policy_returns_default():
+    selector = ProviderSelector(policy="static")
+    selector.record("openai", "gpt-4o-mini", 10.0, True)
+
+    assert selector.choose(CANDIDATES, default="upstage") == "upstage"
+
+
+def test_unknown_policy_falls_back_to_static():
+    selector = ProviderSelector(policy="fastest")
+
+    assert selector.policy == "static"
+
+
+def test_latency_policy_explores_unmeasured_then_picks_fastest():
+    selector = ProviderSelector(policy="latency", exploration=0.0)
+    selector.record("upstage", "solar-pro", 500.0, True)
+
+    assert selector.choose(CANDIDATES, default="upstage") == "openai"  # never measured
+
+    selector.record("openai", "gpt-4o-mini", 100.0, True)
+    assert selector.choose(CANDIDATES, default="upstage") == "openai"
+
+
+def test_latency_policy_penalises_errors():
+    selector = ProviderSelector(policy="latency", alpha=0.5, exploration=0.0)
+    selector.record("upstage", "solar-pro", 300.0, True)
+    selector.record("openai", "gpt-4o-mini", 100.0, True)
+    for _ in range(4):
+        selector.record("openai", "gpt-4o-mini", 0.0, False)
+
+    assert selector.choose(CANDIDATES, default="openai") == "upstage"
+
+
+def test_weighted_policy_prefers_faster_provider():
+    selector = ProviderSelector(policy="weighted", exploration=0.0, rng=random.Random(7))
+    selector.record("upstage", "solar-pro", 900.0, True)
+    selector.record("openai", "gpt-4o-mini", 100.0, True)
+
+    picks = [selector.choose(CANDIDATES, default="upstage") for _ in range(200)]
+
+    assert picks.count("openai") > picks.count("upstage")
+
+
+def test_no_candidates_returns_default():
+    selector = ProviderSelector(policy="latency")
+
+    assert selector.choose([], default="upstage") == "upstage"
+
+
+def test_latency_policy_avoids_provider_that_only_failed():
+    selector = ProviderSelector(policy="latency", exploration=0.0)
+    for _ in range(50):
+        selector.record("upstage", "solar-pro", 5.0, False)
+    selector.record("openai", "gpt-4o-mini", 800.0, True)
+
+    assert selector.get_stats()["providers"]["upstage/solar-pro"]["expected_latency_ms"] is not None
+    assert [selector.choose(CANDIDATES, default="upstage") for _ in range(5)] == ["openai"] * 5
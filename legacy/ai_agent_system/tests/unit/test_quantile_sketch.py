@@ -0,0 +1,58 @@
+# ai_agent_system/tests/unit/test_quantile_sketch.py
+import pytest
+import json
+import logging
+import random
+from ai_agent_system.src.utils.quantile_sketch import QuantileSketch
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def test_quantiles_within_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(5, 1) for _ in range(20000)]
+    sketch = QuantileSketch(relative_accuracy=0.01)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.5, 0.9, 0.99):
+        assert sketch.quantile(q) == pytest.approx(exact_quantile(values, q), rel=0.011)
+    assert sketch.quantile(0.0) == pytest.approx(min(values), rel=0.011)
+    assert sketch.quantile(1.0) == pytest.approx(max(values), rel=0.011)
+    assert len(sketch.buckets) < 1000
+
+
+def test_merge_matches_single_sketch_and_round_trips():
+    rng = random.Random(3)
+    values = [rng.expovariate(1 / 200) for _ in range(5000)] + [0.0] * 10
+    whole = QuantileSketch()
+    shards = [QuantileSketch() for _ in range(4)]
+    for i, value in enumerate(values):
+        whole.add(value)
+        shards[i % 4].add(value)
+
+    merged = QuantileSketch()
+    for shard in shards:
+        merged.merge(QuantileSketch.from_dict(json.loads(json.dumps(shard.to_dict()))))
+
+    assert merged.summary() == whole.summary()
+    assert merged.count == len(values) and merged.zero_count == 10
+
+
+def test_empty_and_invalid():
+    sketch = QuantileSketch()
+    assert sketch.quantile(0.5) is None
+    assert sketch.summary() == {"count": 0, "mean": None, "min": None, "max": None, "p50": None, "p90": None, "p99": None}
+    with pytest.raises(ValueError):
+        sketch.add(-1)
+    with pytest.raises(ValueError):
+        sketch.merge(QuantileSketch(relative_accuracy=0.05))
@@ -0,0 +1,98 @@
+# ai_agent_system/tests/unit/test_rate_limiter.py
+import pytest
+import time
+import logging
+from ai_agent_system.src.services.rate_limiter import (
+    ProviderRateLimit, RateLimiter, TokenBucket, key_fingerprint, parse_reset_duration
+)
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def test_parse_reset_duration_formats():
+    assert parse_reset_duration("1s") == 1.0
+    assert parse_reset_duration("6m0s") == 360.0
+    assert parse_reset_duration("250ms") == 0.25
+    assert parse_reset_duration("2.5") == 2.5
+    assert parse_reset_duration(None) is None
+    assert parse_reset_duration("soon") is None
+
+
+def test_token_bucket_wait_time_reflects_refill_rate():
+    bucket = TokenBucket(capacity=60, period=60.0)  # 1 unit per second
+    bucket.take(60)
+    assert 1.9 < bucket.wait_time(2) <= 2.0
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_when_request_bucket_is_empty():
+    limit = ProviderRateLimit(requests_per_minute=600, tokens_per_minute=100000)  # 10 req/s
+    limit.requests.take(600)
+
+    waited = await limit.acquire(tokens=10)
+
+    assert 0.05 < waited < 0.5
+    assert limit.throttled == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_limits_by_tokens_per_minute():
+    limit = ProviderRateLimit(requests_per_minute=1000, tokens_per_minute=6000)  # 100 tokens/s
+    assert limit.try_acquire(tokens=6000)
+    assert not limit.try_acquire(tokens=10)
+
+    waited = await limit.acquire(tokens=10)
+    assert waited >= 0.05
+
+
+def test_reconcile_returns_unused_reservation():
+    limit = ProviderRateLimit(requests_per_minute=100, tokens_per_minute=1000)
+    limit.try_acquire(tokens=800)
+
+    limit.reconcile(reserved_tokens=800, actual_tokens=300)
+
+    assert limit.tokens.tokens == pytest.approx(700, abs=1)
+
+
+def test_update_from_headers_resyncs_buckets():
+    limit = ProviderRateLimit(requests_per_minute=100, tokens_per_minute=1000)
+
+    limit.update_from_headers({
+        "x-ratelimit-remaining-requests": "3",
+        "x-ratelimit-remaining-tokens": "0",
+        "x-ratelimit-reset-tokens": "2s"
+    })
+
+    assert limit.requests.tokens == pytest.approx(3, abs=0.1)
+    assert limit.tokens.wait_time(1) > 1.5
+
+
+def test_on_rate_limited_honours_retry_after():
+    limit = ProviderRateLimit(requests_per_minute=100, tokens_per_minute=1000)
+
+    limit.on_rate_limited({"retry-after": "5"})
+
+    assert limit.rate_limited_responses == 1
+    assert not limit.try_acquire()
+    assert limit.requests.wait_time(1) > 4.5
+
+
+def test_disabled_limiter_never_blocks():
+    limit = ProviderRateLimit(requests_per_minute=1, tokens_per_minute=1, enabled=False)
+    assert all(limit.try_acquire(tokens=100) for _ in range(5))
+
+
+def test_rate_limiter_buckets_per_provider_model_and_key():
+    limiter = RateLimiter(limits={"upstage": (10, 1000)}, enabled=True)
+
+    a = limiter.get("upstage", "solar-pro", "key-a")
+    assert limiter.get("upstage", "solar-pro", "key-a") is a
+    assert limiter.get("upstage", "solar-pro", "key-b") is not a
+    assert limiter.get("upstage", "solar-mini", "key-a") is not a
+    assert a.requests.capacity == 10
+    assert f"upstage/solar-pro/{key_fingerprint('key-a')}" in limiter.get_stats()
+    assert "key-a" not in str(limiter.get_stats())
@@ -0,0 +1,76 @@
+# ai_agent_system/tests/unit/test_response_cache.py
+import pytest
+import logging
+from ai_agent_system.src.services.response_cache import ResponseCache, make_cache_key
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def test_cache_key_depends_on_prompt_and_params():
+    params = {"temperature": 0, "max_tokens": 100}
+    key = make_cache_key("upstage", "solar-pro", "prompt", params)
+
+    assert key == make_cache_key("upstage", "solar-pro", "prompt", dict(params))
+    assert key != make_cache_key("upstage", "solar-pro", "other prompt", params)
+    assert key != make_cache_key("openai", "solar-pro", "prompt", params)
+    assert key != make_cache_key("upstage", "solar-pro", "prompt", {"temperature": 0, "max_tokens": 200})
+
+
+@pytest.mark.asyncio
+async def test_memory_lru_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2, db_path="")
+
+    await cache.set("a", {"text": "A"})
+    await cache.set("b", {"text": "B"})
+    assert await cache.get("a") == {"text": "A"}  # 'a' is now most recent
+    await cache.set("c", {"text": "C"})
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == {"text": "A"}
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["memory_hits"] == 2
+    assert stats["misses"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_misses():
+    cache = ResponseCache(db_path="")
+
+    await cache.set("a", {"text": "A"}, ttl_seconds=-1)
+
+    assert await cache.get("a") is None
+    assert cache.get_stats()["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_survives_new_instance(tmp_path):
+    db_path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(db_path=db_path)
+    await cache.set("a", {"text": "안녕"})
+    cache.close()
+
+    reopened = ResponseCache(db_path=db_path)
+    assert await reopened.get("a") == {"text": "안녕"}
+    assert await reopened.get("a") == {"text": "안녕"}
+    stats = reopened.get_stats()
+    assert stats["disk_hits"] == 1
+    assert stats["memory_hits"] == 1
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_disk_tier_size_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr("ai_agent_system.src.services.response_cache._DISK_EVICTION_INTERVAL", 1)
+    cache = ResponseCache(max_entries=1, db_path=str(tmp_path / "cache.sqlite3"), max_disk_entries=2)
+
+    for key in ["a", "b", "c"]:
+        await cache.set(key, {"text": key})
+
+    assert await cache.get("a") is None
+    assert await cache.get("b") == {"text": "b"}
+    cache.close()
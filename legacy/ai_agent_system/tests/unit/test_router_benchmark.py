@@ -0,0 +1,64 @@
+# ai_agent_system/tests/unit/test_router_benchmark.py
+import pytest
+import logging
+from ai_agent_system.benchmarks.router_benchmark import (
+    BenchmarkConfig, run_benchmark, build_report, compare_results, percentile
+)
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def tiny_config(**overrides) -> BenchmarkConfig:
+    values = dict(requests=20, concurrency=4, rate=200.0, latency_ms=1.0, latency_distribution="fixed", batch_size=2)
+    values.update(overrides)
+    return BenchmarkConfig(**values)
+
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.5) == 50.0
+    assert percentile(values, 0.95) == 95.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_closed_loop_generate_with_fallback():
+    results = await run_benchmark(tiny_config(primary_error_rate=1.0))
+
+    assert results["requests"] == 20
+    assert results["succeeded"] == 20
+    assert results["fallback_rate"] > 0
+    assert results["throughput_rps"] > 0
+    assert results["latency_ms"]["p50"] <= results["latency_ms"]["p99"]
+    assert results["fake_providers"]["secondary"]["requests"] > 0
+
+
+@pytest.mark.asyncio
+async def test_open_loop_batch_compare():
+    config = tiny_config(scenario="batch_compare", mode="open", requests=5)
+    report = build_report(config, await run_benchmark(config))
+
+    assert report["results"]["succeeded"] == 5
+    assert report["results"]["items_per_s"] > report["results"]["throughput_rps"]
+    assert report["config"]["scenario"] == "batch_compare"
+    # Both providers answer every comparison
+    assert report["results"]["fake_providers"]["primary"]["requests"] == 10
+    assert report["results"]["fake_providers"]["secondary"]["requests"] == 10
+
+
+def test_compare_results_flags_regressions():
+    baseline = {"results": {"throughput_rps": 100.0, "latency_ms": {"p50": 50.0, "p95": 100.0}}}
+    current = {"results": {"throughput_rps": 80.0, "latency_ms": {"p50": 51.0, "p95": 150.0}}}
+
+    comparison = compare_results(baseline, current)
+
+    assert comparison["throughput_rps"]["regressed"]
+    assert comparison["throughput_rps"]["change_pct"] == -20.0
+    assert not comparison["latency_ms.p50"]["regressed"]  # Within tolerance
+    assert comparison["latency_ms.p95"]["regressed"]
+    assert "latency_ms.p99" not in comparison
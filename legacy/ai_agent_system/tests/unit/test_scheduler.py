@@ -0,0 +1,166 @@
+# ai_agent_system/tests/unit/test_scheduler.py
+import pytest
+import asyncio
+import logging
+from ai_agent_system.src.services.scheduler import RequestScheduler, Priority, SchedulerFullError
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+async def occupy(scheduler, count, priority=Priority.INTERACTIVE):
+    for _ in range(count):
+        await scheduler.acquire(priority)
+
+
+@pytest.mark.asyncio
+async def test_global_in_flight_cap():
+    scheduler = RequestScheduler(max_in_flight=2, interactive_reserved=0)
+    await occupy(scheduler, 2)
+
+    waiter = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+
+    scheduler.release()
+    await asyncio.wait_for(waiter, timeout=1)
+    assert scheduler.get_stats()["in_flight"] == 2
+
+
+@pytest.mark.asyncio
+async def test_interactive_served_before_bulk():
+    scheduler = RequestScheduler(max_in_flight=1, interactive_reserved=0)
+    await occupy(scheduler, 1)
+    order = []
+
+    async def request(priority, name):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    bulk = asyncio.ensure_future(request(Priority.BULK, "bulk"))
+    await asyncio.sleep(0)
+    interactive = asyncio.ensure_future(request(Priority.INTERACTIVE, "interactive"))
+    await asyncio.sleep(0)
+
+    scheduler.release()
+    await asyncio.gather(bulk, interactive)
+    assert order == ["interactive", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_cannot_take_reserved_slots():
+    scheduler = RequestScheduler(max_in_flight=3, interactive_reserved=1)
+    await occupy(scheduler, 2, Priority.BULK)
+
+    bulk = asyncio.ensure_future(scheduler.acquire(Priority.BULK))
+    await asyncio.sleep(0)
+    assert not bulk.done()
+
+    await asyncio.wait_for(scheduler.acquire(Priority.INTERACTIVE), timeout=1)
+    bulk.cancel()
+
+
+@pytest.mark.asyncio
+async def test_weighted_fair_queuing_between_tenants():
+    scheduler = RequestScheduler(max_in_flight=1, interactive_reserved=0)
+    await occupy(scheduler, 1, Priority.BULK)
+    order = []
+
+    async def request(tenant, weight):
+        async with scheduler.slot(Priority.BULK, tenant, weight):
+            order.append(tenant)
+
+    tasks = [asyncio.ensure_future(request("big_job", 1.0)) for _ in range(4)]
+    tasks += [asyncio.ensure_future(request("small_job", 1.0)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    scheduler.release(Priority.BULK)
+    await asyncio.gather(*tasks)
+    # The small job is interleaved instead of waiting behind the whole big job
+    assert order[:4] == ["big_job", "small_job", "big_job", "small_job"]
+
+
+@pytest.mark.asyncio
+async def test_reject_when_queue_full():
+    scheduler = RequestScheduler(max_in_flight=1, max_queue_size=1, reject_when_full=True)
+    await occupy(scheduler, 1)
+    queued = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(SchedulerFullError):
+        await scheduler.acquire()
+    assert scheduler.get_stats()["interactive"]["rejected"] == 1
+    queued.cancel()
+
+
+@pytest.mark.asyncio
+async def test_backpressure_waits_for_queue_space():
+    scheduler = RequestScheduler(max_in_flight=1, max_queue_size=1, reject_when_full=False)
+    await occupy(scheduler, 1)
+    queued = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+    blocked = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+    assert scheduler.get_stats()["interactive"]["queued"] == 1
+
+    scheduler.release()
+    await asyncio.wait_for(queued, timeout=1)
+    scheduler.release()
+    await asyncio.wait_for(blocked, timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_is_skipped():
+    scheduler = RequestScheduler(max_in_flight=1, interactive_reserved=0)
+    await occupy(scheduler, 1)
+    cancelled = asyncio.ensure_future(scheduler.acquire())
+    waiting = asyncio.ensure_future(scheduler.acquire())
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.sleep(0)
+    scheduler.release()
+
+    await asyncio.wait_for(waiting, timeout=1)
+    stats = scheduler.get_stats()
+    assert stats["in_flight"] == 1
+    assert stats["interactive"]["queued"] == 0
+    assert stats["interactive"]["dispatched"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_leave_the_lane_at_once():
+    scheduler = RequestScheduler(max_in_flight=1, interactive_reserved=0)
+    await occupy(scheduler, 1)
+    burst = [asyncio.ensure_future(scheduler.acquire(Priority.BULK, tenant="burst")) for _ in range(5)]
+    await asyncio.sleep(0)
+
+    for task in burst:
+        task.cancel()
+    await asyncio.gather(*burst, return_exceptions=True)
+
+    lane = scheduler._lanes[Priority.BULK]
+    assert not lane.heap and lane.queued == 0
+    assert lane.tenant_finish.get("burst", 0.0) == 0.0  # Its reserved virtual time was given back
+
+
+@pytest.mark.asyncio
+async def test_shadow_dropped_under_load_instead_of_queued():
+    scheduler = RequestScheduler(max_in_flight=4, interactive_reserved=1, shadow_max_load=0.5)
+
+    await scheduler.acquire(Priority.SHADOW)  # Idle: runs
+    await occupy(scheduler, 1)
+    with pytest.raises(SchedulerFullError):
+        await scheduler.acquire(Priority.SHADOW)  # At the shadow load cap
+
+    scheduler.release(Priority.SHADOW)
+    await occupy(scheduler, 2, Priority.BULK)
+    waiter = asyncio.ensure_future(scheduler.acquire(Priority.BULK))
+    await asyncio.sleep(0)
+    with pytest.raises(SchedulerFullError):
+        await scheduler.acquire(Priority.SHADOW)  # Real work is waiting
+    waiter.cancel()
+    assert scheduler.get_stats()["shadow"]["rejected"] == 2
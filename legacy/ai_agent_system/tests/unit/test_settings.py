@@ -48,7 +48,7 @@ def test_settings_validation_missing_db_url(clear_env_vars, capsys):
     from importlib import reload
     
     with pytest.raises(SystemExit) as excinfo:
-        reload(ai_agent_system.src.config.settings)
+        reload(ai_agent_system.src.config.settings).settings.validate()
     assert excinfo.value.code == 1
     
     captured = capsys.readouterr()
@@ -0,0 +1,155 @@
+# ai_agent_system/tests/unit/test_shadow_traffic.py
+import pytest
+import asyncio
+import logging
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+from ai_agent_system.src.services.ai_router import AIRouter, AIProvider
+from ai_agent_system.src.services.circuit_breaker import CircuitBreakerRegistry
+from ai_agent_system.src.services.hedging import HedgePolicy
+from ai_agent_system.src.services.provider_selector import ProviderSelector
+from ai_agent_system.src.services.scheduler import RequestScheduler, Priority
+from ai_agent_system.src.services.rate_limiter import get_rate_limiter
+from ai_agent_system.src.services.comparison_store import ComparisonStore
+from ai_agent_system.src.services.shadow_traffic import attach_shadow_comparisons
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+def make_client(text, delay=0.0):
+    client = MagicMock()
+    client.api_key = "test-key"
+
+    async def text_generation(**kwargs):
+        await asyncio.sleep(delay)
+        return text
+
+    client.text_generation = AsyncMock(side_effect=text_generation)
+    return client
+
+
+@pytest.fixture
+def router():
+    router = AIRouter()
+    router.primary_provider = AIProvider.UPSTAGE
+    router.fallback_enabled = True
+    router.max_retries = 1
+    router.response_cache = None
+    router.coalesce_enabled = False
+    router.circuit_breakers = CircuitBreakerRegistry(enabled=True, failure_threshold=2, recovery_timeout=60)
+    router.hedging = HedgePolicy(enabled=False)
+    router.selector = ProviderSelector(policy="static")
+    router.scheduler = RequestScheduler(max_in_flight=8, interactive_reserved=1, shadow_max_load=0.5)
+    router.upstage_client = make_client("upstage answer")
+    router.openai_client = make_client("openai answer", delay=0.2)
+    return router
+
+
+async def drain(router):
+    while router._shadow_tasks:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_shadow_pairs_are_compared_and_persisted(router, tmp_path):
+    store = ComparisonStore(str(tmp_path))
+    sink = attach_shadow_comparisons(router, store, run_id="shadow", sample_rate=1.0, score_batch_size=2)
+
+    start = time.time()
+    responses = [await router.generate(prompt=f"prompt {i}") for i in range(3)]
+    elapsed = time.time() - start
+
+    assert all(r.provider == AIProvider.UPSTAGE and r.success for r in responses)
+    assert elapsed < 0.2  # The slow shadow provider adds no caller latency
+    await drain(router)
+    sink.close()
+
+    table = store.load()
+    assert len(table) == 3
+    assert sink.report.to_dict()["total_comparisons"] == 3
+    assert router.get_usage_stats()["shadow"]["completed"] == 3
+    assert router.openai_client.text_generation.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_shadow_results_are_written_off_the_event_loop(router, tmp_path):
+    sink = attach_shadow_comparisons(router, ComparisonStore(str(tmp_path)), run_id="shadow", sample_rate=1.0)
+    writer_threads = []
+    append = sink.run_writer.append
+
+    def recording_append(index, result):
+        writer_threads.append(threading.get_ident())
+        append(index, result)
+
+    sink.run_writer.append = recording_append
+    await router.generate(prompt="prompt")
+    await drain(router)
+    sink.close()
+
+    assert len(writer_threads) == 1
+    assert threading.get_ident() not in writer_threads
+
+
+@pytest.mark.asyncio
+async def test_shadow_respects_sample_rate(router):
+    attach_shadow_comparisons(router, sample_rate=0.0)
+
+    await router.generate(prompt="prompt")
+    await router.generate(prompt="forced", force_provider=AIProvider.UPSTAGE)
+
+    assert not router._shadow_tasks
+    assert router.get_usage_stats()["shadow"]["sampled"] == 0
+    router.openai_client.text_generation.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_shadow_dropped_first_under_load(router):
+    sink = attach_shadow_comparisons(router, sample_rate=1.0)
+    for _ in range(4):
+        await router.scheduler.acquire(Priority.INTERACTIVE)  # At the shadow cap (half of 8 slots)
+
+    response = await router.generate(prompt="busy")
+
+    assert response.success
+    await drain(router)
+    stats = router.get_usage_stats()["shadow"]
+    assert stats["dropped"] == 1 and stats["completed"] == 0
+    assert sink.report.to_dict()["total_comparisons"] == 0
+    router.openai_client.text_generation.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_shadow_dropped_without_scheduler_or_rate_limit_headroom(router, monkeypatch):
+    attach_shadow_comparisons(router, sample_rate=1.0)
+    router.scheduler = None
+    await router.generate(prompt="unbounded")
+    await drain(router)
+
+    router.scheduler = RequestScheduler(max_in_flight=8, interactive_reserved=1)
+    rate_limit = get_rate_limiter().get("openai", router._get_default_model(AIProvider.OPENAI), "test-key")
+    monkeypatch.setattr(rate_limit, "has_capacity", lambda tokens=0: False)
+    await router.generate(prompt="throttled")
+    await drain(router)
+
+    assert router.get_usage_stats()["shadow"]["dropped"] == 2
+    router.openai_client.text_generation.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_followers_are_not_shadowed_again(router):
+    router.coalesce_enabled = True
+    router.upstage_client = make_client("upstage answer", delay=0.05)
+    sink = attach_shadow_comparisons(router, sample_rate=1.0)
+
+    responses = await asyncio.gather(*[router.generate(prompt="same", temperature=0) for _ in range(3)])
+    await drain(router)
+
+    assert all(r.success for r in responses)
+    assert router.upstage_client.text_generation.await_count == 1
+    assert router.get_usage_stats()["shadow"]["sampled"] == 1
+    assert sink.report.to_dict()["total_comparisons"] == 1
@@ -0,0 +1,54 @@
+# ai_agent_system/tests/unit/test_similarity_scorer.py
+import pytest
+import logging
+from ai_agent_system.src.services import similarity_scorer
+from ai_agent_system.src.services.similarity_scorer import SimilarityScorer
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+UPSTAGE = ["서울은 대한민국의 수도입니다.", "The cat sat on the mat.", None, "완전히 다른 이야기"]
+OPENAI = ["대한민국의 수도는 서울입니다.", "A cat was sitting on the mat.", "only one side", "quantum chromodynamics"]
+REFERENCES = ["대한민국의 수도는 서울이다.", None, None, None]
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_score_batch(monkeypatch, vectorized):
+    if vectorized and not similarity_scorer.SKLEARN_AVAILABLE:
+        pytest.skip("scikit-learn not installed")
+    monkeypatch.setattr(similarity_scorer, "SKLEARN_AVAILABLE", vectorized)
+
+    scores = SimilarityScorer().score_batch(UPSTAGE, OPENAI, REFERENCES)
+
+    assert len(scores) == 4
+    assert scores[0]["pairwise_similarity"] > 0.3  # Same facts, different word order
+    assert scores[0]["openai_reference_similarity"] > scores[0]["upstage_reference_similarity"]
+    assert "upstage_reference_similarity" not in scores[1]
+    assert scores[2]["pairwise_similarity"] is None  # Missing text
+    assert scores[3]["pairwise_similarity"] < scores[0]["pairwise_similarity"]
+    assert all(0.0 <= s["pairwise_similarity"] <= 1.0 for s in scores if s["pairwise_similarity"] is not None)
+
+
+def test_identical_and_empty_batches():
+    scorer = SimilarityScorer()
+
+    assert scorer.score_batch(["같은 문장"], ["같은  문장"])[0]["pairwise_similarity"] == pytest.approx(1.0)
+    assert scorer.score_batch([None], [""]) == [{"pairwise_similarity": None}]
+    assert scorer.score_batch([], []) == []
+
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_scores_do_not_depend_on_batching(monkeypatch, vectorized):
+    if vectorized and not similarity_scorer.SKLEARN_AVAILABLE:
+        pytest.skip("scikit-learn not installed")
+    monkeypatch.setattr(similarity_scorer, "SKLEARN_AVAILABLE", vectorized)
+    scorer = SimilarityScorer()
+
+    together = scorer.score_batch(UPSTAGE, OPENAI, REFERENCES)
+    one_by_one = [scorer.score_batch([u], [o], [r])[0] for u, o, r in zip(UPSTAGE, OPENAI, REFERENCES)]
+
+    assert together == one_by_one
@@ -0,0 +1,96 @@
+# ai_agent_system/tests/unit/test_single_flight.py
+import pytest
+import asyncio
+import logging
+from ai_agent_system.src.utils.single_flight import SingleFlight
+
+
+# Suppress actual logging during tests
+@pytest.fixture(autouse=True)
+def caplog_fixture(caplog):
+    caplog.set_level(logging.CRITICAL)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result():
+    flight = SingleFlight()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return object()
+
+    results = await asyncio.gather(*[flight.do("key", fetch) for _ in range(5)])
+
+    assert calls == 1
+    assert all(result is results[0] for result in results)
+    assert flight.get_stats()["coalesced"] == 4
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0)
+        return "result"
+
+    await asyncio.gather(flight.do("a", fetch), flight.do("b", fetch))
+
+    assert flight.get_stats()["calls"] == 2
+
+
+@pytest.mark.asyncio
+async def test_exception_is_shared_by_all_waiters():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flight.do("key", fetch), flight.do("key", fetch), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    flight = SingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.ensure_future(flight.do("key", fetch))
+    second = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+    assert first.cancelled()
+    assert flight.get_stats()["abandoned"] == 0
+
+
+@pytest.mark.asyncio
+async def test_upstream_cancelled_when_all_waiters_leave():
+    flight = SingleFlight()
+    upstream_cancelled = asyncio.Event()
+
+    async def fetch():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+
+    waiter = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.wait_for(upstream_cancelled.wait(), timeout=1)
+
+    assert flight.get_stats()["abandoned"] == 1
+    assert flight.in_flight() == 0
@@ -0,0 +1,75 @@
+# ai_agent_system/tests/unit/test_token_counter.py
+import pytest
+from ai_agent_system.src.utils import token_counter
+from ai_agent_system.src.utils.token_counter import (
+    approximate_tokens, count_tokens, count_message_tokens, fit_max_tokens,
+    get_context_window, register_tokenizer, truncate_to_tokens
+)
+
+
+class CharTokenizer:
+    """One token per character, for deterministic tests"""
+
+    def encode(self, text):
+        return [ord(c) for c in text]
+
+    def decode(self, ids):
+        return "".join(chr(i) for i in ids)
+
+
+@pytest.fixture
+def char_tokenizer():
+    original = list(token_counter._tokenizer_factories)
+    register_tokenizer("test-model", lambda model: CharTokenizer())
+    yield
+    token_counter._tokenizer_factories[:] = original
+    token_counter.get_tokenizer.cache_clear()
+
+
+def test_approximate_tokens_counts_korean_per_syllable():
+    # Whitespace splitting would report 2 words here
+    assert approximate_tokens("대한민국 수도는") == 7
+
+
+def test_approximate_tokens_english_by_characters():
+    assert approximate_tokens("hello world!") == 3
+    assert approximate_tokens("") == 0
+
+
+def test_count_tokens_uses_registered_tokenizer(char_tokenizer):
+    assert count_tokens("abcdef", "test-model") == 6
+    assert count_tokens("abcdef", "test-model", approximate=True) == 2
+
+
+def test_count_tokens_unknown_model_falls_back_to_approximation():
+    assert count_tokens("안녕하세요", "unknown-model") == 5
+
+
+def test_count_message_tokens_adds_overhead(char_tokenizer):
+    messages = [{"role": "user", "content": "abc"}, {"role": "assistant", "content": "de"}]
+    assert count_message_tokens(messages, "test-model") == 2 + (4 + 3) + (4 + 2)
+
+
+def test_get_context_window_longest_prefix():
+    assert get_context_window("gpt-4o-mini-2024") == 128000
+    assert get_context_window("gpt-4-0613") == 8192
+    assert get_context_window(None) == token_counter.DEFAULT_CONTEXT_WINDOW
+
+
+def test_fit_max_tokens_clamps_to_remaining_window():
+    prompt = "가" * 4000
+    assert fit_max_tokens(prompt, "llama-2-70b-chat", 500) == 96
+    assert fit_max_tokens("short", "gpt-4o", 500) == 500
+    assert fit_max_tokens("가" * 5000, "llama-2-70b-chat", 500) == 0
+
+
+def test_truncate_to_tokens_with_tokenizer(char_tokenizer):
+    assert truncate_to_tokens("abcdef", 4, "test-model") == "abcd"
+    assert truncate_to_tokens("abcdef", 4, "test-model", keep="end") == "cdef"
+
+
+def test_truncate_to_tokens_approximate():
+    text = "가나다라마바사"
+    assert truncate_to_tokens(text, 3) == "가나다"
+    assert truncate_to_tokens(text, 3, keep="end") == "마바사"
+    assert truncate_to_tokens(text, 100) == text
@@ -25,6 +25,10 @@ def mock_httpx_async_client():
         instance.aclose = AsyncMock()
         yield instance
 
+def use_mock_transport(client, handler):
+    """Give this client its own mocked httpx client; the process-wide shared transport stays untouched"""
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
 @pytest.mark.asyncio
 async def test_upstage_client_init_no_api_key_raises_error(mock_settings):
     mock_settings.UPSTAGE_API_KEY = None
@@ -111,3 +115,99 @@ async def test_close_client(mock_httpx_async_client):
     client = UpstageClient()
     await client.close()
     mock_httpx_async_client.aclose.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_text_generation_stream_yields_deltas_and_records_usage():
+    sse_body = (
+        'data: {"choices": [{"text": "Hello"}]}\n\n'
+        'data: {"choices": [{"text": " world"}]}\n\n'
+        'data: {"choices": [], "usage": {"completion_tokens": 2}}\n\n'
+        'data: [DONE]\n\n'
+    ).encode()
+    client = UpstageClient("test_upstage_api_key")
+    use_mock_transport(client, lambda request: httpx.Response(200, content=sse_body))
+
+    deltas = [delta async for delta in client.text_generation_stream(prompt="test prompt")]
+
+    assert deltas == ["Hello", " world"]
+    assert client.total_output_tokens == 2
+    assert client.stream_count == 1
+    assert client.total_time_to_first_token_ms >= 0
+
+@pytest.mark.asyncio
+async def test_stream_cancelled_while_rate_limited_refunds_nothing_and_spares_the_key():
+    from ai_agent_system.src.services.rate_limiter import TokenBucket
+
+    client = UpstageClient("test_upstage_api_key")
+    rate_limit = client.rate_limiter.get("upstage", "solar-cancel-test", client.api_key)
+    rate_limit.tokens = TokenBucket(1_000_000, period=1e9)  # Effectively no refill during the test
+    rate_limit.tokens.take(10_000)
+    rate_limit.requests.block_for(60)  # Every call waits in acquire()
+    tokens_before = rate_limit.tokens.tokens
+
+    async def consume():
+        return [delta async for delta in client.text_generation_stream(prompt="test prompt", model_name="solar-cancel-test")]
+
+    task = asyncio.ensure_future(consume())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert rate_limit.tokens.tokens == pytest.approx(tokens_before, abs=1)
+    key_stats = client.key_pool.get_stats()[client.key_pool.keys[0].fingerprint]
+    assert key_stats["errors"] == 0
+    assert client.key_pool.keys[0].outstanding == 0
+
+@pytest.mark.asyncio
+async def test_failed_call_gives_back_the_unused_reservation():
+    from ai_agent_system.src.services.rate_limiter import TokenBucket
+
+    client = UpstageClient("test_upstage_api_key")
+    use_mock_transport(client, lambda request: httpx.Response(500, json={"error": "boom"}))
+    rate_limit = client.rate_limiter.get("upstage", "solar-refund-test", client.api_key)
+    rate_limit.tokens = TokenBucket(1_000_000, period=1e9)  # Effectively no refill during the test
+    tokens_before = rate_limit.tokens.tokens
+
+    assert await client.text_generation(prompt="test prompt", model_name="solar-refund-test", max_tokens=500) is None
+
+    assert tokens_before - rate_limit.tokens.tokens < 10  # Only the prompt is charged, not max_tokens
+
+@pytest.mark.asyncio
+async def test_text_generation_raises_rate_limit_error_when_requested():
+    from ai_agent_system.src.services.provider_errors import RateLimitError
+
+    client = UpstageClient("test_upstage_api_key")
+    use_mock_transport(
+        client,
+        lambda request: httpx.Response(429, headers={"retry-after": "0.01"}, json={"error": "rate limited"})
+    )
+
+    assert await client.text_generation(prompt="test prompt") is None
+    with pytest.raises(RateLimitError) as excinfo:
+        await client.text_generation(prompt="test prompt", raise_on_error=True)
+    assert excinfo.value.retry_after == 0.01
+    assert client.rate_limiter.get("upstage", "llama-2-70b-chat", client.api_key).rate_limited_responses == 2
+
+@pytest.mark.asyncio
+async def test_text_generation_rotates_away_from_rate_limited_key():
+    seen_keys = []
+
+    def handler(request):
+        key = request.headers["Authorization"].split(" ", 1)[1]
+        seen_keys.append(key)
+        if key == "pool_key_a":
+            return httpx.Response(429, headers={"retry-after": "60"}, json={"error": "rate limited"})
+        return httpx.Response(200, json={"choices": [{"text": "ok"}]})
+
+    client = UpstageClient(api_keys=[("pool_key_a", 2.0), ("pool_key_b", 1.0)])
+    use_mock_transport(client, handler)
+
+    assert await client.text_generation(prompt="test prompt", model_name="solar-pool-test") is None
+    assert await client.text_generation(prompt="test prompt", model_name="solar-pool-test") == "ok"
+    assert await client.text_generation(prompt="test prompt", model_name="solar-pool-test") == "ok"
+
+    assert seen_keys == ["pool_key_a", "pool_key_b", "pool_key_b"]
+    stats = client.key_pool.get_stats()
+    assert stats[client.key_pool.keys[0].fingerprint]["rate_limited"] == 1
+    assert stats[client.key_pool.keys[1].fingerprint]["successes"] == 2
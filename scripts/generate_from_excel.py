@@ -49,6 +49,16 @@ DEFAULT_MODEL = "solar-pro"
 MAX_RETRIES = 3
 RETRY_DELAY = 2.0
 
+# 연결 풀 설정 (모든 대화 생성 요청이 하나의 커넥션 풀을 공유)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+
+try:
+    import h2  # noqa: F401  (HTTP/2 지원: pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 
 # === Data Classes ===
 
@@ -405,6 +415,34 @@ class UpstageClient:
             )
         self.api_key = api_key
         self.base_url = UPSTAGE_BASE_URL
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """재시도/대화 간 TCP+TLS 연결을 재사용하는 공유 클라이언트"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=60.0,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+                ),
+            )
+        return self._client
+
+    async def warmup(self):
+        """첫 요청 전에 DNS 조회와 TLS 연결을 미리 수행"""
+        try:
+            await self._get_client().head(self.base_url, timeout=10.0)
+        except httpx.HTTPError as e:
+            print(f"  [Warn] 연결 예열 실패: {e}")
+
+    async def aclose(self):
+        """커넥션 풀 종료"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def generate_conversation(
         self, config: ConversationConfig, prompt_builder: PromptBuilder
@@ -430,18 +468,17 @@ class UpstageClient:
 
         for attempt in range(MAX_RETRIES):
             try:
-                async with httpx.AsyncClient(timeout=60.0) as client:
-                    response = await client.post(
-                        f"{self.base_url}/chat/completions",
-                        headers=headers,
-                        json=payload,
-                    )
-                    response.raise_for_status()
-                    result = response.json()
+                response = await self._get_client().post(
+                    f"{self.base_url}/chat/completions",
+                    headers=headers,
+                    json=payload,
+                )
+                response.raise_for_status()
+                result = response.json()
 
-                    content = result["choices"][0]["message"]["content"]
-                    messages = self._parse_response(content, config)
-                    return messages
+                content = result["choices"][0]["message"]["content"]
+                messages = self._parse_response(content, config)
+                return messages
 
             except httpx.HTTPStatusError as e:
                 print(
@@ -735,29 +772,34 @@ async def main():
         print(f"  [Error] {e}")
         sys.exit(1)
 
-    prompt_builder = PromptBuilder()
-    converter = TalkStudioConverter()
-    fallback = FallbackGenerator()
+    try:
+        await client.warmup()
+
+        prompt_builder = PromptBuilder()
+        converter = TalkStudioConverter()
+        fallback = FallbackGenerator()
 
-    all_outputs = []
+        all_outputs = []
 
-    for i, config in enumerate(configs):
-        print(f"\n  [{i + 1}/{len(configs)}] {config.conversation_id}")
-        print(f"    맥락: {config.context[:50]}{'...' if len(config.context) > 50 else ''}")
-        print(f"    참여자: {', '.join([p.nickname for p in config.participants])}")
+        for i, config in enumerate(configs):
+            print(f"\n  [{i + 1}/{len(configs)}] {config.conversation_id}")
+            print(f"    맥락: {config.context[:50]}{'...' if len(config.context) > 50 else ''}")
+            print(f"    참여자: {', '.join([p.nickname for p in config.participants])}")
 
-        # API 호출
-        messages = await client.generate_conversation(config, prompt_builder)
+            # API 호출
+            messages = await client.generate_conversation(config, prompt_builder)
 
-        if messages is None:
-            print("    -> API 실패, Fallback 사용")
-            messages = fallback.generate(config)
-        else:
-            print(f"    -> 성공! {len(messages)}개 메시지 생성")
+            if messages is None:
+                print("    -> API 실패, Fallback 사용")
+                messages = fallback.generate(config)
+            else:
+                print(f"    -> 성공! {len(messages)}개 메시지 생성")
 
-        # TalkStudio 형식으로 변환
-        output = converter.convert(config, messages)
-        all_outputs.append(output)
+            # TalkStudio 형식으로 변환
+            output = converter.convert(config, messages)
+            all_outputs.append(output)
+    finally:
+        await client.aclose()
 
     # 3. JSON 저장
     output_path = Path(args.output)
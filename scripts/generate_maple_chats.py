@@ -34,6 +34,41 @@ if not UPSTAGE_API_KEY:
     raise ValueError("UPSTAGE_API_KEY 환경변수가 설정되지 않았습니다.")
 UPSTAGE_BASE_URL = "https://api.upstage.ai/v1/solar"
 
+# 연결 풀 설정 (모든 대화 생성 요청이 하나의 커넥션 풀을 공유)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+
+try:
+    import h2  # noqa: F401  (HTTP/2 지원: pip install httpx[http2])
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """프로세스 전체에서 재사용하는 공유 HTTP 클라이언트 (TCP+TLS 연결 재사용)"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """공유 HTTP 클라이언트 종료"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
 # 거래 설정
 TRADE_AMOUNTS = [50000, 70000, 100000, 100000, 100000]  # 5만, 7만, 10만, 10만, 10만원
 
@@ -120,41 +155,41 @@ JSON 형식으로만 응답하세요:
         "max_tokens": 1000
     }
 
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                f"{UPSTAGE_BASE_URL}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=60.0
-            )
-            response.raise_for_status()
-            result = response.json()
-
-            if "choices" in result and len(result["choices"]) > 0:
-                content = result["choices"][0]["message"]["content"]
-                # JSON 파싱
-                try:
-                    # JSON 블록 추출
-                    if "```json" in content:
-                        content = content.split("```json")[1].split("```")[0]
-                    elif "```" in content:
-                        content = content.split("```")[1].split("```")[0]
-
-                    chat_data = json.loads(content.strip())
-                    return chat_data.get("messages", [])
-                except json.JSONDecodeError as e:
-                    print(f"JSON 파싱 실패: {e}")
-                    print(f"원본 응답: {content}")
-                    return None
-
-            return None
-        except httpx.HTTPStatusError as e:
-            print(f"HTTP 오류: {e.response.status_code} - {e.response.text}")
-            return None
-        except Exception as e:
-            print(f"오류 발생: {e}")
-            return None
+    client = get_http_client()
+    try:
+        response = await client.post(
+            f"{UPSTAGE_BASE_URL}/chat/completions",
+            headers=headers,
+            json=payload,
+            timeout=60.0
+        )
+        response.raise_for_status()
+        result = response.json()
+
+        if "choices" in result and len(result["choices"]) > 0:
+            content = result["choices"][0]["message"]["content"]
+            # JSON 파싱
+            try:
+                # JSON 블록 추출
+                if "```json" in content:
+                    content = content.split("```json")[1].split("```")[0]
+                elif "```" in content:
+                    content = content.split("```")[1].split("```")[0]
+
+                chat_data = json.loads(content.strip())
+                return chat_data.get("messages", [])
+            except json.JSONDecodeError as e:
+                print(f"JSON 파싱 실패: {e}")
+                print(f"원본 응답: {content}")
+                return None
+
+        return None
+    except httpx.HTTPStatusError as e:
+        print(f"HTTP 오류: {e.response.status_code} - {e.response.text}")
+        return None
+    except Exception as e:
+        print(f"오류 발생: {e}")
+        return None
 
 
 def create_fallback_chat(item: dict, amount: int, trade_date: datetime):
@@ -238,35 +273,38 @@ async def main():
 
     all_chats = []
 
-    for i, amount in enumerate(TRADE_AMOUNTS):
-        item = GAME_ITEMS[i]
-        trade_date = get_random_date()
-        seller = NICKNAMES_SELLER[i]
-        buyer = NICKNAMES_BUYER[i]
-
-        print(f"\n[{i+1}/5] 생성 중...")
-        print(f"  아이템: {item['name']}")
-        print(f"  금액: {amount // 10000}만원")
-        print(f"  날짜: {format_korean_date(trade_date)}")
-
-        # Upstage API로 대화 생성
-        messages = await generate_chat_with_upstage(item, amount, trade_date)
-
-        if not messages:
-            print("  -> API 실패, 기본 대화 사용")
-            messages = create_fallback_chat(item, amount, trade_date)
-        else:
-            print(f"  -> 성공! {len(messages)}개 메시지 생성")
-
-        # Store 형식으로 변환
-        chat_data = build_chat_store_data(messages, seller, buyer, trade_date)
-        chat_data["metadata"]["item"] = item
-        chat_data["metadata"]["amount"] = amount
-        chat_data["metadata"]["amount_display"] = f"{amount // 10000}만원"
-        chat_data["metadata"]["disclaimer"] = "SAMPLE DATA - 데모용 가상 대화. 실제 거래가 아님."
-        chat_data["metadata"]["is_sample"] = True
-
-        all_chats.append(chat_data)
+    try:
+        for i, amount in enumerate(TRADE_AMOUNTS):
+            item = GAME_ITEMS[i]
+            trade_date = get_random_date()
+            seller = NICKNAMES_SELLER[i]
+            buyer = NICKNAMES_BUYER[i]
+
+            print(f"\n[{i+1}/5] 생성 중...")
+            print(f"  아이템: {item['name']}")
+            print(f"  금액: {amount // 10000}만원")
+            print(f"  날짜: {format_korean_date(trade_date)}")
+
+            # Upstage API로 대화 생성
+            messages = await generate_chat_with_upstage(item, amount, trade_date)
+
+            if not messages:
+                print("  -> API 실패, 기본 대화 사용")
+                messages = create_fallback_chat(item, amount, trade_date)
+            else:
+                print(f"  -> 성공! {len(messages)}개 메시지 생성")
+
+            # Store 형식으로 변환
+            chat_data = build_chat_store_data(messages, seller, buyer, trade_date)
+            chat_data["metadata"]["item"] = item
+            chat_data["metadata"]["amount"] = amount
+            chat_data["metadata"]["amount_display"] = f"{amount // 10000}만원"
+            chat_data["metadata"]["disclaimer"] = "SAMPLE DATA - 데모용 가상 대화. 실제 거래가 아님."
+            chat_data["metadata"]["is_sample"] = True
+
+            all_chats.append(chat_data)
+    finally:
+        await close_http_client()
 
     # JSON 파일로 저장
     output_path = "scripts/generated_chats.json"